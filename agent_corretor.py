@@ -1,9 +1,22 @@
-import streamlit as st
+import hashlib
 import os
-import google.generativeai as genai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
 from mimetypes import guess_type
 import sys
 from dotenv import load_dotenv
+from backends import BACKEND_PADRAO, criar_backend
+from correcao import (SCHEMA_CORRECAO, Correcao, agregar_correcoes, amplitudes_notas, desvios_notas,
+                      marcar_reaproveitada, parse_correcao, problemas_correcao, separar_correcoes_agrupadas)
+from cache_correcao import CACHE_ATIVO, chave_correcao, obter_cache
+from duplicatas import DUPLICATAS_ATIVO, LIMIAR_SIMILARIDADE, normalizar_texto, obter_indice
+from extracao_texto import preparar_media
+from preprocessamento_imagem import preparar_imagem
+from limitador import estimar_tokens, executar_com_retentativas, obter_limitador
+from metricas import MetricasCorrecao, emitir
 
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -12,57 +25,37 @@ load_dotenv()
 API_KEY = os.getenv('GEMINI_API_KEY')
 MODEL_NAME = "gemini-1.5-flash"
 
-# Configura a API do Google
-if API_KEY:
-    genai.configure(api_key=API_KEY)
-else:
-    # Em um cenário de agente real, isso poderia logar um erro ou levantar uma exceção
-    print("Erro: Chave de API da Gemini não encontrada.")
-
-# --- Funções do Agente Corretor ---
-
-def get_info_enem():
-    """
-    Retorna um dicionário com os critérios, pontuação e instruções para o ENEM.
-    Esta função encapsula o conhecimento especializado do agente.
-    """
-    return {
-        'criterios': """
-- **Competência 1**: Domínio da modalidade escrita formal da língua portuguesa.
-- **Competência 2**: Compreensão da proposta de redação e aplicação de conceitos para desenvolver o tema.
-- **Competência 3**: Seleção, organização e interpretação de informações, fatos e argumentos.
-- **Competência 4**: Conhecimento dos mecanismos linguísticos para a argumentação.
-- **Competência 5**: Elaboração de proposta de intervenção para o problema, respeitando os direitos humanos.
-""",
-        'pontuacao': "A pontuação total da redação do ENEM é de 0 a 1000 pontos.",
-        'instrucao_pontuacao': "Forneça uma pontuação para cada competência (0 a 200) e uma pontuação total."
-    }
+# Correção em conjunto: total de amostras por redação, amostras da primeira rodada
+# e amplitude máxima das notas (por competência) para considerar que concordam
+ENSEMBLE_AMOSTRAS = int(os.getenv('CORRETOR_ENSEMBLE_AMOSTRAS', '5'))
+ENSEMBLE_PRIMEIRA_RODADA = int(os.getenv('CORRETOR_ENSEMBLE_PRIMEIRA_RODADA', '2'))
+ENSEMBLE_TOLERANCIA = int(os.getenv('CORRETOR_ENSEMBLE_TOLERANCIA', '40'))
 
-def executar_correcao_enem(file_path: str, tema: str) -> str:
-    """
-    Função principal do Agente Corretor.
-    Recebe o caminho do arquivo da redação e o tema, e retorna a correção bruta.
-    """
-    if not API_KEY:
-        return "Erro: A chave da API não foi configurada."
+# Correções completas de quase-duplicatas feitas em segundo plano, ao mesmo tempo
+COMPLETAS_SIMULTANEAS = int(os.getenv('CORRETOR_DUPLICATAS_COMPLETAS', '4'))
 
-    try:
-        # 1. Obter o conhecimento especializado do ENEM
-        info_enem = get_info_enem()
+# A API do Google é configurada na primeira chamada (ver backends.obter_modelo),
+# para que importar este módulo não carregue o SDK
+if not API_KEY and BACKEND_PADRAO == 'gemini':
+    # Em um cenário de agente real, isso poderia logar um erro ou levantar uma exceção
+    print("Erro: Chave de API da Gemini não encontrada.")
 
-        # 2. Construir o prompt detalhado para a IA
-        corpo_prompt = """
+# Template do prompt de correção (também faz parte da chave do cache).
+# A rubrica e o formato de saída não dependem da redação: são montados uma vez
+# (ver compilar_prompt) e enviados como instrução de sistema; só PROMPT_TEMA
+# varia entre as chamadas.
+PROMPT_AVALIACAO = """
 Você é um Agente de IA especialista em correção de redações do ENEM. Sua única função é avaliar uma redação com base nas 5 competências oficiais. Seja rigoroso, técnico e siga o formato de saída à risca.
 
-**Tema da redação:** "{tema}"
-
 **Critérios de Avaliação (ENEM):**
 {criterios}
 
 **Pontuação:**
 {pontuacao}
 {instrucao_pontuacao}
+"""
 
+FORMATO_SAIDA_TEXTO = """
 **Formato de Saída Obrigatório:**
 Siga estritamente este formato. Não inclua saudações, despedidas, dicas, sugestões ou qualquer texto fora da estrutura definida abaixo.
 
@@ -92,33 +85,717 @@ Competência 5
 Elaborar proposta de intervenção para o problema abordado, respeitando os direitos humanos.
 **Sua nota nessa competência foi: [nota de 0 a 200]**
 [Análise técnica detalhada e objetiva da competência 5, justificando a nota.]
-""".format(tema=tema, **info_enem)
+"""
+
+FORMATO_SAIDA_JSON = """
+**Formato de Saída Obrigatório:**
+Responda apenas com um objeto JSON no esquema fornecido: "nota_total" (0 a 1000) e "competencias",
+uma lista com as 5 competências em ordem, cada uma com "numero" (1 a 5), "titulo", "nota" (0 a 200)
+e "analise" (análise técnica detalhada e objetiva, justificando a nota com exemplos do texto, se necessário).
+"""
+
+PROMPT_TEMA = """**Tema da redação:** "{tema}"
+
+Avalie a redação a seguir.
+"""
+
+# Correção agrupada: várias redações curtas em texto puro numa única chamada.
+# O início e o final repetidos de cada redação permitem conferir que nenhuma
+# correção foi atribuída à redação errada (ver corrigir_textos_agrupados).
+FORMATO_SAIDA_AGRUPADO = """
+**Várias Redações na Mesma Mensagem:**
+A mensagem pode trazer várias redações, cada uma aberta por uma linha "=== REDAÇÃO <id> ===" e seguida do seu tema e do seu texto.
+Corrija cada redação de forma independente, sem compará-la com as demais, e responda com um bloco por redação, na mesma ordem, começando cada bloco assim:
+
+=== CORREÇÃO <id> ===
+Início da redação: [as {palavras} primeiras palavras da redação, copiadas exatamente]
+Final da redação: [as {palavras} últimas palavras da redação, copiadas exatamente]
+
+Em seguida, escreva a correção completa dessa redação no formato de saída acima.
+"""
+
+PROMPT_REDACAO_AGRUPADA = """=== REDAÇÃO {identificador} ===
+**Tema da redação:** "{tema}"
+
+{texto}
+
+"""
+
+PROMPT_LOTE_AGRUPADO = "Corrija as {quantidade} redações a seguir."
+
+# Palavras do início e do final de cada redação que o modelo repete na correção agrupada
+PALAVRAS_ECO_AGRUPADO = 5
 
-        # 3. Preparar o arquivo para envio
-        mime_type, _ = guess_type(file_path)
-        if not mime_type:
-            return f"Erro: Não foi possível determinar o tipo do arquivo: {file_path}"
+PROMPT_CORRECAO = PROMPT_AVALIACAO + FORMATO_SAIDA_TEXTO
+PROMPT_CORRECAO_JSON = PROMPT_AVALIACAO + FORMATO_SAIDA_JSON
 
-        with open(file_path, "rb") as f:
-            media = {"mime_type": mime_type, "data": f.read()}
+# Configuração de geração do modo JSON (resposta estruturada)
+CONFIG_JSON = {'response_mime_type': 'application/json', 'response_schema': SCHEMA_CORRECAO}
 
-        # 4. Executar o modelo generativo
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content([corpo_prompt, media])
-        
-        return response.text.strip()
+# --- Funções do Agente Corretor ---
+
+def get_info_enem():
+    """
+    Retorna um dicionário com os critérios, pontuação e instruções para o ENEM.
+    Esta função encapsula o conhecimento especializado do agente.
+    """
+    return {
+        'criterios': """
+- **Competência 1**: Domínio da modalidade escrita formal da língua portuguesa.
+- **Competência 2**: Compreensão da proposta de redação e aplicação de conceitos para desenvolver o tema.
+- **Competência 3**: Seleção, organização e interpretação de informações, fatos e argumentos.
+- **Competência 4**: Conhecimento dos mecanismos linguísticos para a argumentação.
+- **Competência 5**: Elaboração de proposta de intervenção para o problema, respeitando os direitos humanos.
+""",
+        'pontuacao': "A pontuação total da redação do ENEM é de 0 a 1000 pontos.",
+        'instrucao_pontuacao': "Forneça uma pontuação para cada competência (0 a 200) e uma pontuação total."
+    }
+
+@dataclass(frozen=True)
+class PromptCompilado:
+    """Parte fixa do prompt (instrução de sistema) e template da parte variável."""
+    instrucao_sistema: str
+    template_tema: str
+
+    @property
+    def template(self) -> str:
+        """Prompt completo sem o tema, usado na chave do cache de correções."""
+        return self.instrucao_sistema + self.template_tema
+
+    def para_tema(self, tema: str) -> str:
+        return self.template_tema.format(tema=tema)
 
-    except FileNotFoundError:
+@lru_cache(maxsize=None)
+def compilar_prompt(modo_json: bool = False) -> PromptCompilado:
+    """Monta a rubrica e o formato de saída uma única vez por processo."""
+    template_prompt = PROMPT_CORRECAO_JSON if modo_json else PROMPT_CORRECAO
+    return PromptCompilado(template_prompt.format(**get_info_enem()), PROMPT_TEMA)
+
+@lru_cache(maxsize=None)
+def compilar_prompt_agrupado() -> PromptCompilado:
+    """Rubrica com as instruções de saída agrupada; o template é o bloco de cada redação."""
+    instrucao = (PROMPT_CORRECAO.format(**get_info_enem())
+                 + FORMATO_SAIDA_AGRUPADO.format(palavras=PALAVRAS_ECO_AGRUPADO))
+    return PromptCompilado(instrucao, PROMPT_REDACAO_AGRUPADA)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def obter_backend():
+    """
+    Retorna o backend de modelo do processo, escolhido por CORRETOR_BACKEND
+    ('gemini' ou 'stub', este último offline e determinístico).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = criar_backend(BACKEND_PADRAO, API_KEY, MODEL_NAME)
+        return _backend
+
+def definir_backend(backend):
+    """Substitui o backend do processo (ex.: por um BackendStub em benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+class ErroCorrecao(Exception):
+    """Erro de preparação da correção, com mensagem pronta para o usuário."""
+
+def tipo_mime(nome_arquivo: str, informado: str = None):
+    """Tipo MIME pela extensão do arquivo ou, na falta dela, o tipo informado (ex.: pelo navegador)."""
+    return guess_type(nome_arquivo)[0] or informado
+
+def _ler_arquivo(file_path: str):
+    """Lê o arquivo da redação e retorna (dados, mime_type)."""
+    mime_type = tipo_mime(file_path)
+    if not mime_type:
+        raise ErroCorrecao(f"Erro: Não foi possível determinar o tipo do arquivo: {file_path}")
+    with open(file_path, "rb") as f:
+        return f.read(), mime_type
+
+def _erro_arquivo(erro: Exception, file_path: str) -> str:
+    if isinstance(erro, FileNotFoundError):
         return f"Erro: O arquivo não foi encontrado no caminho: {file_path}"
+    if isinstance(erro, OSError):
+        # Ex.: caminho que é um diretório ou sem permissão de leitura
+        return f"Erro inesperado ao executar a correção: {erro}"
+    return str(erro)
+
+def _preparar_correcao(dados, mime_type: str, tema: str, modo_json: bool = False,
+                       metricas: MetricasCorrecao = None):
+    """
+    Monta o prompt e a mídia da redação a partir do conteúdo do arquivo
+    (bytes ou qualquer buffer, como um memoryview, sem cópia prévia).
+    Retorna (corpo_prompt, media, prompt), onde `corpo_prompt` é só a parte que
+    depende do tema e `prompt` é o PromptCompilado com a rubrica.
+    """
+    # 1. e 2. Rubrica do ENEM já compilada; só o tema é formatado a cada chamada
+    prompt = compilar_prompt(modo_json)
+    corpo_prompt = prompt.para_tema(tema)
+
+    # 3. Conferir o arquivo recebido
+    if not mime_type:
+        raise ErroCorrecao("Erro: Não foi possível determinar o tipo do arquivo.")
+
+    # 4. Enviar só o texto quando ele puder ser extraído localmente (txt, pdf, docx)
+    media, _ = preparar_media(dados, mime_type)
+    # Fotos (ex.: redações manuscritas) são reduzidas e recodificadas antes do envio
+    media, _ = preparar_imagem(media["data"], media["mime_type"])
+
+    if metricas is not None:
+        metricas.mime_type = mime_type
+        metricas.bytes_arquivo = len(dados)
+        metricas.bytes_enviados = len(media["data"])
+
+    return corpo_prompt, media, prompt
+
+def _chamar_modelo(corpo_prompt: str, media: dict, config=None, stream: bool = False,
+                   metricas: MetricasCorrecao = None, instrucao_sistema: str = None):
+    """
+    Executa o modelo generativo respeitando a cota e retentando erros transitórios.
+    A rubrica vai em `instrucao_sistema` (padrão: a do prompt compilado).
+    Retorna a resposta e o número de tokens estimado para a requisição.
+    """
+    backend = obter_backend()
+    limitador = obter_limitador()
+    if instrucao_sistema is None:
+        modo_json = bool(config) and config.get('response_mime_type') == 'application/json'
+        instrucao_sistema = compilar_prompt(modo_json).instrucao_sistema
+    tokens_estimados = estimar_tokens([instrucao_sistema, corpo_prompt, media])
+    metricas = metricas or MetricasCorrecao()
+
+    def chamar():
+        with metricas.etapa('espera_cota'):
+            limitador.adquirir(tokens_estimados)
+        return backend.gerar([corpo_prompt, media], config=config, stream=stream,
+                             instrucao_sistema=instrucao_sistema)
+
+    def ao_retentar(tentativa, erro, espera):
+        metricas.retentativas = tentativa
+
+    return executar_com_retentativas(chamar, ao_retentar=ao_retentar), tokens_estimados
+
+def _registrar_uso(response, tokens_estimados: int, metricas: MetricasCorrecao = None):
+    """Ajusta o limitador com o consumo real de tokens informado pela resposta."""
+    uso = getattr(response, 'usage_metadata', None)
+    if uso is not None and getattr(uso, 'total_token_count', None):
+        obter_limitador().ajustar_tokens(tokens_estimados, uso.total_token_count)
+    if metricas is not None:
+        metricas.registrar_uso(response)
+
+def _validar_resultado(resultado: str, metricas: MetricasCorrecao):
+    """Interpreta a resposta para registrar nas métricas se ela é uma correção válida."""
+    with metricas.etapa('parse'):
+        metricas.sucesso = parse_correcao(resultado).valida
+    if not metricas.sucesso:
+        metricas.erro = "Resposta do modelo fora do formato esperado."
+
+def _texto_redacao(media: dict):
+    """Texto da redação, quando a mídia enviada é texto (extraído ou .txt); senão None."""
+    if not media["mime_type"].startswith("text/"):
+        return None
+    texto = bytes(media["data"]).decode("utf-8", errors="ignore")
+    return texto if texto.strip() else None
+
+def _escopo_modelo(prompt: PromptCompilado) -> str:
+    """Modelo e versão do prompt: correções de outro prompt não são reaproveitadas."""
+    return f"{obter_backend().nome_modelo}:{hashlib.sha256(prompt.template.encode()).hexdigest()[:16]}"
+
+def _buscar_no_cache(dados, mime_type: str, tema: str, prompt: PromptCompilado, metricas: MetricasCorrecao):
+    """
+    Procura a correção exata no cache, pela chave dos bytes originais do arquivo:
+    um acerto dispensa a extração de texto e o preparo de imagens.
+    Retorna (resultado ou None, chave do cache ou None).
+    """
+    if not CACHE_ATIVO or not mime_type:
+        return None, None
+    with metricas.etapa('cache'):
+        chave = chave_correcao(dados, mime_type, tema, obter_backend().nome_modelo, prompt.template)
+        resultado = obter_cache().obter(chave)
+    if resultado is not None:
+        metricas.cache_hit = True
+        metricas.mime_type = mime_type
+        metricas.bytes_arquivo = len(dados)
+    return resultado, chave
+
+def _buscar_duplicata(media: dict, tema: str, prompt: PromptCompilado, metricas: MetricasCorrecao):
+    """
+    Com CORRETOR_DUPLICATAS=1, a correção de uma versão quase idêntica do mesmo
+    tema, marcada como preliminar (ver correcao.marcar_reaproveitada), ou None.
+    """
+    texto = _texto_redacao(media) if DUPLICATAS_ATIVO else None
+    if not texto:
+        return None
+    with metricas.etapa('duplicatas'):
+        semelhante = obter_indice().buscar(texto, tema, _escopo_modelo(prompt), comparar_paragrafos=False)
+    if semelhante is None:
+        return None
+    metricas.similaridade_duplicata = semelhante.similaridade
+    return marcar_reaproveitada(semelhante.resultado, semelhante.similaridade)
+
+def _guardar_resultado(chave, media: dict, tema: str, prompt: PromptCompilado, resultado: str,
+                       metricas: MetricasCorrecao):
+    """
+    Salva uma correção nova no cache e no índice de quase-duplicatas, apenas se
+    ela for válida (recusas e respostas fora do formato não são guardadas).
+    """
+    if not metricas.sucesso:
+        return
+    if chave is not None:
+        with metricas.etapa('cache'):
+            obter_cache().salvar(chave, resultado)
+    texto = _texto_redacao(media) if DUPLICATAS_ATIVO else None
+    if texto:
+        with metricas.etapa('duplicatas'):
+            obter_indice().adicionar(texto, tema, resultado, _escopo_modelo(prompt))
+
+def buscar_correcao_semelhante(file_path: str, tema: str, limiar: float = LIMIAR_SIMILARIDADE):
+    """
+    Procura a correção de uma versão quase idêntica da redação (mesmo tema),
+    mesmo com o índice desligado para o fluxo normal. Retorna um
+    duplicatas.CorrecaoSemelhante, com os parágrafos alterados, ou None.
+    Serve de resultado preliminar enquanto a correção completa é feita
+    (ver corrigir_completa).
+    """
+    _, media, prompt = _preparar_correcao(*_ler_arquivo(file_path), tema)
+    texto = _texto_redacao(media)
+    if not texto:
+        return None
+    return obter_indice().buscar(texto, tema, _escopo_modelo(prompt), limiar)
+
+# --- Correção Completa de Quase-Duplicatas ---
+# A correção reaproveitada é só preliminar: a da redação editada é feita em
+# segundo plano e fica no cache (e no índice), onde a próxima consulta a encontra
+
+_completas = {}  # chave da correção -> Future
+_completas_lock = threading.Lock()
+_executor_completas = None
+
+def _agendar_correcao_completa(dados, mime_type: str, tema: str, modo_json: bool = False):
+    """Inicia (ou reaproveita, se já estiver em andamento) a correção completa da redação."""
+    global _executor_completas
+    chave = chave_correcao(dados, mime_type, tema, obter_backend().nome_modelo, compilar_prompt(modo_json).template)
+    with _completas_lock:
+        futuro = _completas.get(chave)
+        if futuro is not None:
+            return futuro
+        if _executor_completas is None:
+            _executor_completas = ThreadPoolExecutor(max_workers=COMPLETAS_SIMULTANEAS,
+                                                     thread_name_prefix="correcao-completa")
+        futuro = _completas[chave] = _executor_completas.submit(
+            corrigir_bytes, bytes(dados), mime_type, tema, modo_json=modo_json, reaproveitar_duplicatas=False)
+    futuro.add_done_callback(lambda concluido: _descartar_completa(chave, concluido))
+    return futuro
+
+def _descartar_completa(chave: str, futuro):
+    with _completas_lock:
+        if _completas.get(chave) is futuro:
+            del _completas[chave]
+
+def corrigir_completa(dados, mime_type: str, tema: str, modo_json: bool = False) -> str:
+    """
+    Correção feita pelo modelo para esta redação, nunca reaproveitada de uma
+    quase-duplicata. Se ela já estiver em andamento (após um resultado
+    preliminar), aguarda a mesma chamada em vez de fazer outra.
+    """
+    return _agendar_correcao_completa(dados, mime_type, tema, modo_json).result()
+
+def corrigir_bytes(dados, mime_type: str, tema: str, usar_cache: bool = True, modo_json: bool = False,
+                   reaproveitar_duplicatas: bool = True) -> str:
+    """
+    Função principal do Agente Corretor.
+    Recebe o conteúdo do arquivo da redação (bytes ou buffer, como o memoryview
+    de um upload), o tipo MIME e o tema, e retorna a correção bruta, sem passar
+    por arquivos em disco.
+    Correções bem-sucedidas ficam em cache, indexadas pelo conteúdo do arquivo,
+    pelo tema, pelo modelo e pelo template do prompt. Com CORRETOR_DUPLICATAS=1,
+    versões quase idênticas de uma redação já corrigida (mesmo tema) recebem a
+    correção anterior como resultado preliminar, com um aviso na primeira linha
+    (Correcao.reaproveitada; ver duplicatas.py), enquanto a correção completa
+    é feita em segundo plano (ver corrigir_completa).
+    Com `modo_json`, o modelo responde em JSON seguindo SCHEMA_CORRECAO;
+    em ambos os casos o resultado é interpretado por correcao.parse_correcao.
+    As métricas de cada chamada (bytes, tokens, tempo por etapa, cache e
+    retentativas) são enviadas aos sinks registrados em `metricas`.
+    """
+    erro_backend = obter_backend().erro_configuracao()
+    if erro_backend:
+        return erro_backend
+
+    metricas = MetricasCorrecao(modelo=obter_backend().nome_modelo)
+    inicio = time.perf_counter()
+    try:
+        # 5. Consultar o cache pelos bytes originais, antes de qualquer preparo
+        resultado_pronto, chave = None, None
+        if usar_cache:
+            resultado_pronto, chave = _buscar_no_cache(dados, mime_type, tema, compilar_prompt(modo_json), metricas)
+
+        if resultado_pronto is None:
+            with metricas.etapa('preparacao'):
+                corpo_prompt, media, prompt = _preparar_correcao(dados, mime_type, tema, modo_json, metricas)
+            # ... e, em seguida, as quase-duplicatas (que dependem do texto extraído)
+            if usar_cache and reaproveitar_duplicatas:
+                resultado_pronto = _buscar_duplicata(media, tema, prompt, metricas)
+                if resultado_pronto is not None:
+                    _agendar_correcao_completa(dados, mime_type, tema, modo_json)
+        if resultado_pronto is not None:
+            _validar_resultado(resultado_pronto, metricas)
+            return resultado_pronto
+
+        # 6. Executar o modelo generativo
+        config = CONFIG_JSON if modo_json else None
+        with metricas.etapa('modelo'):
+            response, tokens_estimados = _chamar_modelo(corpo_prompt, media, config, metricas=metricas,
+                                                        instrucao_sistema=prompt.instrucao_sistema)
+            resultado = response.text.strip()
+        _registrar_uso(response, tokens_estimados, metricas)
+        _validar_resultado(resultado, metricas)
+
+        if usar_cache:
+            _guardar_resultado(chave, media, tema, prompt, resultado, metricas)
+
+        return resultado
+
+    except ErroCorrecao as e:
+        metricas.erro = str(e)
     except Exception as e:
         # Em um sistema real, isso seria logado de forma mais detalhada
-        return f"Erro inesperado ao executar a correção: {e}"
+        metricas.erro = f"Erro inesperado ao executar a correção: {e}"
+    finally:
+        metricas.tempos['total'] = time.perf_counter() - inicio
+        emitir(metricas)
+    return metricas.erro
+
+def executar_correcao_enem(file_path: str, tema: str, usar_cache: bool = True, modo_json: bool = False) -> str:
+    """
+    Recebe o caminho do arquivo da redação e o tema, e retorna a correção bruta
+    (ver corrigir_bytes).
+    """
+    try:
+        dados, mime_type = _ler_arquivo(file_path)
+    except (ErroCorrecao, OSError) as e:
+        return _erro_arquivo(e, file_path)
+    return corrigir_bytes(dados, mime_type, tema, usar_cache, modo_json)
+
+def corrigir_bytes_stream(dados, mime_type: str, tema: str, usar_cache: bool = True,
+                          reaproveitar_duplicatas: bool = True):
+    """
+    Variante de corrigir_bytes que produz a correção em trechos, à medida
+    que o modelo os gera. Os trechos concatenados formam a mesma correção bruta,
+    que é salva no cache ao final. Erros são produzidos como um trecho de texto.
+    """
+    erro_backend = obter_backend().erro_configuracao()
+    if erro_backend:
+        yield erro_backend
+        return
+
+    metricas = MetricasCorrecao(modelo=obter_backend().nome_modelo)
+    inicio = time.perf_counter()
+    try:
+        resultado_pronto, chave = None, None
+        if usar_cache:
+            resultado_pronto, chave = _buscar_no_cache(dados, mime_type, tema, compilar_prompt(), metricas)
+
+        if resultado_pronto is None:
+            with metricas.etapa('preparacao'):
+                corpo_prompt, media, prompt = _preparar_correcao(dados, mime_type, tema, metricas=metricas)
+            if usar_cache and reaproveitar_duplicatas:
+                resultado_pronto = _buscar_duplicata(media, tema, prompt, metricas)
+                if resultado_pronto is not None:
+                    _agendar_correcao_completa(dados, mime_type, tema)
+        if resultado_pronto is not None:
+            _validar_resultado(resultado_pronto, metricas)
+            yield resultado_pronto
+            return
+
+        inicio_modelo = time.perf_counter()
+        response, tokens_estimados = _chamar_modelo(corpo_prompt, media, stream=True, metricas=metricas,
+                                                    instrucao_sistema=prompt.instrucao_sistema)
+        trechos = []
+        for chunk in response:
+            if not trechos:
+                metricas.tempos['primeiro_trecho'] = time.perf_counter() - inicio_modelo
+            trechos.append(chunk.text)
+            yield chunk.text
+        metricas.tempos['modelo'] = time.perf_counter() - inicio_modelo
+        _registrar_uso(response, tokens_estimados, metricas)
+        resultado = "".join(trechos).strip()
+        _validar_resultado(resultado, metricas)
+
+        if usar_cache:
+            _guardar_resultado(chave, media, tema, prompt, resultado, metricas)
+
+    except ErroCorrecao as e:
+        metricas.erro = str(e)
+        yield str(e)
+    except Exception as e:
+        metricas.erro = f"Erro inesperado ao executar a correção: {e}"
+        yield f"\n{metricas.erro}"
+    finally:
+        metricas.tempos['total'] = time.perf_counter() - inicio
+        emitir(metricas)
+
+def executar_correcao_enem_stream(file_path: str, tema: str, usar_cache: bool = True):
+    """Variante de executar_correcao_enem que produz a correção em trechos (ver corrigir_bytes_stream)."""
+    try:
+        dados, mime_type = _ler_arquivo(file_path)
+    except (ErroCorrecao, OSError) as e:
+        yield _erro_arquivo(e, file_path)
+        return
+    yield from corrigir_bytes_stream(dados, mime_type, tema, usar_cache)
+
+# --- Correção Agrupada (várias redações em texto numa chamada) ---
+
+def _chave_eco(texto: str) -> tuple:
+    """Primeiras e últimas palavras (normalizadas) que o modelo deve repetir para a redação."""
+    palavras = normalizar_texto(texto)
+    return tuple(palavras[:PALAVRAS_ECO_AGRUPADO]), tuple(palavras[-PALAVRAS_ECO_AGRUPADO:])
+
+def _conferir_bloco(bloco, texto: str) -> list:
+    """
+    Problemas do bloco de correção de uma redação na resposta agrupada. O
+    início e o final repetidos precisam coincidir exatamente com os da redação.
+    """
+    if bloco is None:
+        return ["correção ausente ou repetida na resposta"]
+    inicio, final, resultado = bloco
+    problemas = problemas_correcao(parse_correcao(resultado))
+    inicio_esperado, final_esperado = _chave_eco(texto)
+    if tuple(normalizar_texto(final or "")) != final_esperado:
+        problemas.insert(0, f"final da redação não confere ({final!r})")
+    if tuple(normalizar_texto(inicio or "")) != inicio_esperado:
+        problemas.insert(0, f"início da redação não confere ({inicio!r})")
+    return problemas
+
+def corrigir_textos_agrupados(itens: list, usar_cache: bool = True) -> list:
+    """
+    Corrige várias redações em texto puro, [(texto, tema), ...], numa única
+    chamada ao modelo e retorna as correções brutas na ordem de `itens`.
+    Quando o texto foi extraído de um arquivo, o item é (texto, tema, dados,
+    mime_type): a chave do cache e a correção individual usam os bytes
+    originais, exatamente como corrigir_bytes faria com o mesmo upload.
+    Cada redação vai delimitada por um identificador; a resposta é separada
+    por identificador e cada bloco é conferido (início e final da redação
+    repetidos corretamente, 5 competências na escala, total igual à soma).
+    Redações com o mesmo início e final de outra do grupo não poderiam ser
+    distinguidas e vão sozinhas, assim como as de bloco rejeitado (ou todas, se
+    a chamada falhar), por corrigir_bytes. Cache e quase-duplicatas usam a
+    chave da correção individual, então os dois modos se reaproveitam.
+    """
+    erro_backend = obter_backend().erro_configuracao()
+    if erro_backend:
+        return [erro_backend] * len(itens)
+
+    prompt = compilar_prompt_agrupado()
+    prompt_individual = compilar_prompt()
+    resultados = [None] * len(itens)
+    metricas = MetricasCorrecao(modelo=obter_backend().nome_modelo, mime_type="text/plain",
+                                amostras=0, agrupadas=len(itens))
+    inicio = time.perf_counter()
+    pendentes = []  # (posição, identificador, media, chave)
+    ecos = set()
+    rejeitadas = []
+    individuais = []  # posições corrigidas sozinhas: ecos repetidos no grupo e blocos rejeitados
+    try:
+        originais = [item[2:] or (item[0].encode("utf-8"), "text/plain") for item in itens]
+        for posicao, ((texto, tema, *_), (dados, mime_type)) in enumerate(zip(itens, originais)):
+            media = {"mime_type": "text/plain", "data": texto.encode("utf-8")}
+            metricas.bytes_arquivo += len(dados)
+            resultado, chave = None, None
+            if usar_cache:
+                resultado, chave = _buscar_no_cache(dados, mime_type, tema, prompt_individual, metricas)
+                if resultado is None:
+                    resultado = _buscar_duplicata(media, tema, prompt_individual, metricas)
+                    if resultado is not None:
+                        _agendar_correcao_completa(dados, mime_type, tema)
+            if resultado is not None:
+                resultados[posicao] = resultado
+            elif _chave_eco(texto) in ecos:
+                individuais.append(posicao)
+            else:
+                ecos.add(_chave_eco(texto))
+                pendentes.append((posicao, f"R{len(pendentes) + 1}", media, chave))
+
+        if pendentes:
+            corpo = "".join(prompt.template_tema.format(identificador=identificador, tema=itens[posicao][1],
+                                                        texto=itens[posicao][0])
+                            for posicao, identificador, _, _ in pendentes)
+            lote = {"mime_type": "text/plain", "data": corpo.encode("utf-8")}
+            metricas.bytes_enviados = len(lote["data"])
+            try:
+                with metricas.etapa('modelo'):
+                    response, tokens_estimados = _chamar_modelo(
+                        PROMPT_LOTE_AGRUPADO.format(quantidade=len(pendentes)), lote, metricas=metricas,
+                        instrucao_sistema=prompt.instrucao_sistema)
+                _registrar_uso(response, tokens_estimados, metricas)
+                blocos = separar_correcoes_agrupadas(response.text)
+            except Exception as e:
+                metricas.erro = f"Erro inesperado ao executar a correção agrupada: {e}"
+                blocos = {}
+            metricas.amostras = 1
+
+            # Só os blocos que passam na conferência são guardados (cache e índice de duplicatas)
+            metricas.sucesso = True
+            with metricas.etapa('parse'):
+                for posicao, identificador, media, chave in pendentes:
+                    bloco = blocos.get(identificador)
+                    problemas = _conferir_bloco(bloco, itens[posicao][0])
+                    if problemas:
+                        rejeitadas.append((posicao, identificador, problemas))
+                        individuais.append(posicao)
+                        continue
+                    resultados[posicao] = bloco[2]
+                    if usar_cache:
+                        _guardar_resultado(chave, media, itens[posicao][1], prompt_individual, bloco[2], metricas)
+
+        if rejeitadas and metricas.erro is None:
+            metricas.erro = "Correções agrupadas rejeitadas: " + "; ".join(
+                f"{identificador} ({', '.join(problemas)})" for _, identificador, problemas in rejeitadas)
+        if individuais:
+            # Cada uma é corrigida sozinha, com as suas próprias métricas
+            with metricas.etapa('individual'), ThreadPoolExecutor(max_workers=len(individuais)) as executor:
+                corrigidas = executor.map(
+                    lambda posicao: corrigir_bytes(*originais[posicao], itens[posicao][1], usar_cache),
+                    individuais)
+                for posicao, resultado in zip(individuais, corrigidas):
+                    resultados[posicao] = resultado
+        metricas.sucesso = not rejeitadas
+        return resultados
+
+    except Exception as e:
+        metricas.erro = f"Erro inesperado ao executar a correção: {e}"
+        return [resultado if resultado is not None else metricas.erro for resultado in resultados]
+    finally:
+        metricas.tempos['total'] = time.perf_counter() - inicio
+        emitir(metricas)
+
+# --- Correção em Conjunto (várias amostras) ---
+
+@dataclass
+class ResultadoConjunto:
+    """Correção agregada de várias amostras, com a dispersão das notas por competência."""
+    correcao: Correcao = field(default_factory=Correcao)
+    amostras: list = field(default_factory=list)  # correções válidas de cada amostra
+    amplitudes: list = field(default_factory=list)
+    desvios: list = field(default_factory=list)
+    concordante: bool = False
+    parada_antecipada: bool = False
+    erros: list = field(default_factory=list)
+
+    @property
+    def texto(self) -> str:
+        """Correção agregada no formato do prompt ou, se nenhuma amostra valeu, o último erro."""
+        if self.correcao.valida:
+            return self.correcao.texto
+        return self.erros[-1] if self.erros else "Erro: nenhuma amostra válida foi obtida."
+
+    def to_dict(self) -> dict:
+        return {
+            'correcao': self.correcao.to_dict(),
+            'notas_amostras': [c.notas for c in self.amostras],
+            'amplitudes': self.amplitudes,
+            'desvios': self.desvios,
+            'concordante': self.concordante,
+            'parada_antecipada': self.parada_antecipada,
+            'erros': self.erros,
+        }
+
+def _concordam(correcoes: list, tolerancia: int) -> bool:
+    amplitudes = amplitudes_notas(correcoes)
+    return len(correcoes) >= 2 and None not in amplitudes and max(amplitudes) <= tolerancia
+
+def _amostrar(corpo_prompt: str, media: dict, instrucao_sistema: str):
+    """Uma amostra independente da correção (modo JSON, sem cache)."""
+    metricas = MetricasCorrecao()
+    response, tokens_estimados = _chamar_modelo(corpo_prompt, media, CONFIG_JSON, metricas=metricas,
+                                                instrucao_sistema=instrucao_sistema)
+    return parse_correcao(response.text), response, tokens_estimados, metricas
+
+def corrigir_bytes_conjunto(dados, mime_type: str, tema: str, amostras: int = ENSEMBLE_AMOSTRAS,
+                            tolerancia: int = ENSEMBLE_TOLERANCIA,
+                            primeira_rodada: int = ENSEMBLE_PRIMEIRA_RODADA) -> ResultadoConjunto:
+    """
+    Corrige a redação (conteúdo do arquivo, como em corrigir_bytes) com várias
+    amostras do modelo, chamadas em paralelo, e agrega as notas pela mediana de
+    cada competência.
+    A primeira rodada faz `primeira_rodada` chamadas simultâneas; se as notas
+    concordarem (amplitude de cada competência até `tolerancia`), as demais
+    amostras não são pedidas. Caso contrário, as restantes saem juntas numa
+    segunda rodada, de modo que o tempo total fica perto de duas chamadas.
+    """
+    erro_backend = obter_backend().erro_configuracao()
+    if erro_backend:
+        return ResultadoConjunto(erros=[erro_backend])
+
+    resultado = ResultadoConjunto()
+    metricas = MetricasCorrecao(modelo=obter_backend().nome_modelo, amostras=0)
+    inicio = time.perf_counter()
+    try:
+        with metricas.etapa('preparacao'):
+            corpo_prompt, media, prompt = _preparar_correcao(dados, mime_type, tema, True, metricas)
+
+        rodada = max(1, min(primeira_rodada, amostras))
+        with metricas.etapa('modelo'), ThreadPoolExecutor(max_workers=max(rodada, amostras - rodada)) as executor:
+            while rodada > 0:
+                futuros = [executor.submit(_amostrar, corpo_prompt, media, prompt.instrucao_sistema)
+                           for _ in range(rodada)]
+                metricas.amostras += rodada
+                for futuro in as_completed(futuros):
+                    try:
+                        correcao, response, tokens_estimados, metricas_amostra = futuro.result()
+                    except Exception as e:
+                        resultado.erros.append(f"Erro inesperado ao executar a correção: {e}")
+                        continue
+                    _registrar_uso(response, tokens_estimados, metricas)
+                    metricas.retentativas += metricas_amostra.retentativas
+                    metricas.tempos['espera_cota'] = (metricas.tempos.get('espera_cota', 0.0)
+                                                      + metricas_amostra.tempos.get('espera_cota', 0.0))
+                    if correcao.valida:
+                        resultado.amostras.append(correcao)
+                    else:
+                        resultado.erros.append("Erro: resposta do modelo fora do formato esperado.")
+                restantes = amostras - metricas.amostras
+                if _concordam(resultado.amostras, tolerancia):
+                    resultado.parada_antecipada = restantes > 0
+                    break
+                rodada = restantes
+
+        with metricas.etapa('agregacao'):
+            resultado.correcao = agregar_correcoes(resultado.amostras)
+            resultado.amplitudes = amplitudes_notas(resultado.amostras) if resultado.amostras else []
+            resultado.desvios = desvios_notas(resultado.amostras) if resultado.amostras else []
+            resultado.concordante = _concordam(resultado.amostras, tolerancia)
+        metricas.sucesso = resultado.correcao.valida
+        if not metricas.sucesso:
+            metricas.erro = resultado.texto
+
+    except ErroCorrecao as e:
+        resultado.erros.append(str(e))
+        metricas.erro = str(e)
+    except Exception as e:
+        metricas.erro = f"Erro inesperado ao executar a correção: {e}"
+        resultado.erros.append(metricas.erro)
+    finally:
+        metricas.tempos['total'] = time.perf_counter() - inicio
+        emitir(metricas)
+    return resultado
+
+def executar_correcao_enem_conjunto(file_path: str, tema: str, amostras: int = ENSEMBLE_AMOSTRAS,
+                                    tolerancia: int = ENSEMBLE_TOLERANCIA,
+                                    primeira_rodada: int = ENSEMBLE_PRIMEIRA_RODADA) -> ResultadoConjunto:
+    """Variante de corrigir_bytes_conjunto que lê a redação do caminho informado."""
+    try:
+        dados, mime_type = _ler_arquivo(file_path)
+    except (ErroCorrecao, OSError) as e:
+        return ResultadoConjunto(erros=[_erro_arquivo(e, file_path)])
+    return corrigir_bytes_conjunto(dados, mime_type, tema, amostras, tolerancia, primeira_rodada)
 
 # --- Exemplo de uso (para teste direto do script) ---
 if __name__ == '__main__':
     # Este bloco permite testar o agente diretamente pela linha de comando.
     # Como usar:
     # python agent_corretor.py "caminho/para/sua/redacao.txt" "Tema da Redação"
+    # Para corrigir várias redações de uma vez, use correcao_lote.py.
 
     if len(sys.argv) < 3:
         print("Erro: Argumentos insuficientes.")
@@ -0,0 +1,78 @@
+import heapq
+
+# --- Agregado Incremental ---
+
+class AgregadoCorrecoes:
+    """
+    Estatísticas do histórico mantidas incrementalmente: top-N em um heap
+    limitado, médias por competência e por tema. Cada correção nova custa
+    O(log N) em vez de reordenar todo o histórico.
+    """
+
+    def __init__(self, n: int = 5):
+        self.n = n
+        self.total = 0
+        # versao_top muda apenas quando o conjunto do top-N muda
+        self.versao_top = 0
+        self._heap = []  # heap mínimo de (nota, id, item)
+        self._somas_competencias = [0] * 5
+        self._contagens_competencias = [0] * 5
+        self._temas = {}  # tema -> [soma das notas, quantidade]
+
+    def adicionar(self, item: dict) -> bool:
+        """
+        Incorpora uma correção (no formato do RepositorioHistorico).
+        Retorna True se o top-N mudou.
+        """
+        self.total += 1
+        for i, nota in enumerate(item.get('notas') or []):
+            if nota is not None:
+                self._somas_competencias[i] += nota
+                self._contagens_competencias[i] += 1
+
+        nota = item.get('score')
+        if nota is None:
+            return False
+        tema = self._temas.setdefault(item['tema'], [0, 0])
+        tema[0] += nota
+        tema[1] += 1
+        return self._adicionar_top(nota, item)
+
+    def _adicionar_top(self, nota: int, item: dict) -> bool:
+        entrada = (nota, item.get('id', self.total), item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entrada)
+        elif entrada[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entrada)
+        else:
+            return False
+        self.versao_top += 1
+        return True
+
+    def top(self) -> list:
+        """As N correções com maior nota, da maior para a menor."""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def medias_competencias(self) -> list:
+        """Média de cada uma das 5 competências (None se ainda não houver notas)."""
+        return [soma / quantidade if quantidade else None
+                for soma, quantidade in zip(self._somas_competencias, self._contagens_competencias)]
+
+    def medias_por_tema(self) -> list:
+        """Média e quantidade de correções com nota, por tema."""
+        return [{'tema': tema, 'media': soma / quantidade, 'quantidade': quantidade}
+                for tema, (soma, quantidade) in sorted(self._temas.items())]
+
+    @classmethod
+    def carregar(cls, historico, aluno: str = None, n: int = 5):
+        """Inicializa o agregado a partir de consultas indexadas ao histórico."""
+        agregado = cls(n)
+        agregado.total = historico.contar(aluno)
+        for item in historico.top_n(aluno, n):
+            agregado._adicionar_top(item['score'], item)
+        for tema in historico.medias_por_tema(aluno):
+            agregado._temas[tema['tema']] = [tema['media'] * tema['quantidade'], tema['quantidade']]
+        for i, (soma, quantidade) in enumerate(historico.somas_competencias(aluno)):
+            agregado._somas_competencias[i] = soma or 0
+            agregado._contagens_competencias[i] = quantidade
+        return agregado
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuração do Agrupamento ---
+# Com CORRETOR_AGRUPAMENTO=1, redações curtas em texto puro enviadas quase ao
+# mesmo tempo são corrigidas juntas, numa única chamada ao modelo
+AGRUPAMENTO_ATIVO = os.getenv('CORRETOR_AGRUPAMENTO', '0') == '1'
+JANELA_AGRUPAMENTO = float(os.getenv('CORRETOR_AGRUPAMENTO_JANELA_MS', '200')) / 1000
+MAX_REDACOES_GRUPO = int(os.getenv('CORRETOR_AGRUPAMENTO_MAX', '6'))
+MAX_CARACTERES_GRUPO = int(os.getenv('CORRETOR_AGRUPAMENTO_CARACTERES', '24000'))
+# Redações maiores que isto (bem acima das 30 linhas do ENEM) são corrigidas sozinhas
+MAX_CARACTERES_REDACAO = int(os.getenv('CORRETOR_AGRUPAMENTO_CARACTERES_REDACAO', '6000'))
+GRUPOS_SIMULTANEOS = int(os.getenv('CORRETOR_AGRUPAMENTO_SIMULTANEOS', '4'))
+
+def _corretor_agrupado_padrao(itens: list) -> list:
+    from agent_corretor import corrigir_textos_agrupados
+    return corrigir_textos_agrupados(itens)
+
+def _corretor_individual_padrao(texto: str, tema: str, dados, mime_type: str) -> str:
+    from agent_corretor import corrigir_bytes
+    return corrigir_bytes(dados, mime_type, tema)
+
+class _Pedido:
+    __slots__ = ('texto', 'tema', 'dados', 'mime_type', 'chegada', 'resultado', 'pronto')
+
+    def __init__(self, texto: str, tema: str, dados, mime_type: str):
+        self.texto = texto
+        self.tema = tema
+        self.dados = dados
+        self.mime_type = mime_type
+        self.chegada = time.monotonic()
+        self.resultado = None
+        self.pronto = threading.Event()
+
+# --- Agrupador ---
+
+class AgrupadorCorrecoes:
+    """
+    Micro-agrupador de correções de texto: os pedidos que chegam dentro de
+    `janela` segundos do primeiro da fila (até `max_redacoes` ou
+    `max_caracteres`) saem juntos numa única chamada, e cada chamador recebe a
+    sua correção. Enquanto um grupo está no modelo, o próximo já vai sendo
+    formado (até `simultaneos` grupos em andamento).
+    """
+
+    def __init__(self, janela: float = JANELA_AGRUPAMENTO, max_redacoes: int = MAX_REDACOES_GRUPO,
+                 max_caracteres: int = MAX_CARACTERES_GRUPO, simultaneos: int = GRUPOS_SIMULTANEOS,
+                 corretor_agrupado=None, corretor_individual=None):
+        self.janela = janela
+        self.max_redacoes = max_redacoes
+        self.max_caracteres = max_caracteres
+        self.corretor_agrupado = corretor_agrupado or _corretor_agrupado_padrao
+        self.corretor_individual = corretor_individual or _corretor_individual_padrao
+        self.grupos = 0
+        self._pendentes = []
+        self._condicao = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=simultaneos, thread_name_prefix="agrupador")
+        self._despachante = None
+
+    def corrigir(self, texto: str, tema: str, dados=None, mime_type: str = "text/plain") -> str:
+        """
+        Correção bruta da redação, possivelmente feita junto com outras (bloqueia
+        até ficar pronta). `dados` e `mime_type` são o arquivo de onde o texto
+        foi extraído (padrão: o próprio texto): deles vêm a chave do cache e a
+        correção individual, as mesmas de corrigir_bytes.
+        """
+        if dados is None:
+            dados = texto.encode("utf-8")
+        if len(texto) > MAX_CARACTERES_REDACAO or self.max_redacoes <= 1:
+            return self.corretor_individual(texto, tema, dados, mime_type)
+        pedido = _Pedido(texto, tema, dados, mime_type)
+        with self._condicao:
+            if self._despachante is None:
+                self._despachante = threading.Thread(target=self._despachar, name="agrupador", daemon=True)
+                self._despachante.start()
+            self._pendentes.append(pedido)
+            self._condicao.notify()
+        pedido.pronto.wait()
+        return pedido.resultado
+
+    def _completo(self) -> bool:
+        return (len(self._pendentes) >= self.max_redacoes
+                or sum(len(p.texto) for p in self._pendentes) >= self.max_caracteres)
+
+    def _retirar_grupo(self) -> list:
+        grupo, caracteres = [], 0
+        for pedido in self._pendentes:
+            if grupo and (len(grupo) >= self.max_redacoes or caracteres + len(pedido.texto) > self.max_caracteres):
+                break
+            grupo.append(pedido)
+            caracteres += len(pedido.texto)
+        del self._pendentes[:len(grupo)]
+        return grupo
+
+    def _despachar(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes:
+                    self._condicao.wait()
+                prazo = self._pendentes[0].chegada + self.janela
+                while not self._completo() and (restante := prazo - time.monotonic()) > 0:
+                    self._condicao.wait(restante)
+                grupo = self._retirar_grupo()
+            self.grupos += 1
+            self._executor.submit(self._processar, grupo)
+
+    def _processar(self, grupo: list):
+        try:
+            itens = [(p.texto, p.tema, p.dados, p.mime_type) for p in grupo]
+            if len(grupo) == 1:
+                resultados = [self.corretor_individual(*itens[0])]
+            else:
+                resultados = self.corretor_agrupado(itens)
+        except Exception as e:
+            resultados = [f"Erro inesperado ao executar a correção: {e}"] * len(grupo)
+        for pedido, resultado in zip(grupo, resultados):
+            pedido.resultado = resultado
+            pedido.pronto.set()
+
+_agrupador = None
+_agrupador_lock = threading.Lock()
+
+def obter_agrupador() -> AgrupadorCorrecoes:
+    """Retorna o agrupador compartilhado do processo (todas as sessões do Streamlit)."""
+    global _agrupador
+    with _agrupador_lock:
+        if _agrupador is None:
+            _agrupador = AgrupadorCorrecoes()
+        return _agrupador
@@ -0,0 +1,108 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# --- Configuração da Análise ---
+COMPETENCIAS = ['c1', 'c2', 'c3', 'c4', 'c5']
+NOTAS_POSSIVEIS = list(range(0, 201, 40))  # escala de cada competência no ENEM
+FREQUENCIA_TENDENCIA = 'W'  # semanas
+
+# --- Estatísticas ---
+
+@dataclass
+class EstatisticasTurma:
+    """Estatísticas de uma turma (ou de todas as correções), prontas para o painel."""
+    total: int
+    distribuicao: pd.DataFrame  # competência x estatísticas (média, desvio, quartis)
+    histograma: pd.DataFrame    # nota possível x competência -> quantidade
+    alunos: pd.DataFrame        # aluno -> redações, média, médias por competência, mais fraca
+    tendencia: pd.DataFrame     # período -> média da nota e das competências
+
+def montar_dataframe(colunas: dict) -> pd.DataFrame:
+    """DataFrame tipado a partir de RepositorioHistorico.notas_em_colunas."""
+    # np.array com dtype float converte None em NaN sem passar por colunas de objetos
+    numericas = {coluna: np.array(colunas[coluna], dtype='float64') for coluna in ['nota'] + COMPETENCIAS}
+    return pd.DataFrame({
+        'id': np.array(colunas['id'], dtype='int64'),
+        'aluno': colunas['aluno'],
+        'tema': colunas['tema'],
+        **numericas,
+        'criado_em': pd.to_datetime(np.array(colunas['criado_em'], dtype='float64'), unit='s'),
+    })
+
+def distribuicao_competencias(df: pd.DataFrame) -> pd.DataFrame:
+    """Média, desvio padrão, quartis e quantidade de notas de cada competência."""
+    notas = df[COMPETENCIAS]
+    return pd.DataFrame({
+        'media': notas.mean(),
+        'desvio': notas.std(),
+        'q1': notas.quantile(0.25),
+        'mediana': notas.median(),
+        'q3': notas.quantile(0.75),
+        'quantidade': notas.count(),
+    })
+
+def histograma_competencias(df: pd.DataFrame) -> pd.DataFrame:
+    """Quantas vezes cada nota possível (0, 40, ..., 200) foi dada em cada competência."""
+    valores = df[COMPETENCIAS].to_numpy()
+    # Notas fora da escala vão para a nota possível mais próxima
+    indices = np.clip(np.rint(valores / 40), 0, len(NOTAS_POSSIVEIS) - 1)
+    contagens = {
+        competencia: np.bincount(coluna[~np.isnan(coluna)].astype(int), minlength=len(NOTAS_POSSIVEIS))
+        for competencia, coluna in zip(COMPETENCIAS, indices.T)
+    }
+    return pd.DataFrame(contagens, index=pd.Index(NOTAS_POSSIVEIS, name='nota'))
+
+def resumo_alunos(df: pd.DataFrame) -> pd.DataFrame:
+    """Por aluno: número de redações, média da nota, médias por competência e a competência mais fraca."""
+    grupos = df.groupby('aluno')
+    resumo = grupos[COMPETENCIAS].mean()
+    medias = resumo.to_numpy()
+    # Alunos sem nenhuma nota por competência não têm competência mais fraca
+    sem_notas = np.isnan(medias).all(axis=1)
+    mais_fraca = np.nanargmin(np.where(np.isnan(medias), np.inf, medias), axis=1)
+    resumo['mais_fraca'] = np.where(sem_notas, None, np.array(COMPETENCIAS, dtype=object)[mais_fraca])
+    resumo.insert(0, 'media', grupos['nota'].mean())
+    resumo.insert(0, 'redacoes', grupos.size())
+    return resumo.sort_values('media', ascending=False)
+
+def tendencia(df: pd.DataFrame, frequencia: str = FREQUENCIA_TENDENCIA) -> pd.DataFrame:
+    """Média da nota e de cada competência por período (semana, por padrão)."""
+    serie = df.set_index('criado_em')[['nota'] + COMPETENCIAS].resample(frequencia).mean()
+    return serie.dropna(how='all')
+
+def calcular_estatisticas(df: pd.DataFrame) -> EstatisticasTurma:
+    return EstatisticasTurma(
+        total=len(df),
+        distribuicao=distribuicao_competencias(df),
+        histograma=histograma_competencias(df),
+        alunos=resumo_alunos(df),
+        tendencia=tendencia(df),
+    )
+
+# --- Cache por Turma ---
+
+class AnaliseTurmas:
+    """
+    Calcula as estatísticas de cada turma a partir do histórico e as mantém em
+    cache até que uma correção nova seja registrada na turma (ver
+    RepositorioHistorico.versao).
+    """
+
+    def __init__(self, historico):
+        self.historico = historico
+        self._lock = threading.Lock()
+        self._cache = {}  # turma -> (versão, EstatisticasTurma)
+
+    def estatisticas(self, turma: str = None) -> EstatisticasTurma:
+        versao = self.historico.versao(turma)
+        with self._lock:
+            em_cache = self._cache.get(turma)
+            if em_cache is not None and em_cache[0] == versao:
+                return em_cache[1]
+        estatisticas = calcular_estatisticas(montar_dataframe(self.historico.notas_em_colunas(turma)))
+        with self._lock:
+            self._cache[turma] = (versao, estatisticas)
+        return estatisticas
@@ -1,57 +1,96 @@
 import streamlit as st
-import os
-import re
-from agent_corretor import executar_correcao_enem
-import tempfile
+from agent_corretor import corrigir_bytes_stream, corrigir_completa, tipo_mime
+from agrupamento import AGRUPAMENTO_ATIVO, obter_agrupador
+from correcao import ParserIncremental, parse_correcao
+from extracao_texto import extrair_texto
+from fila_trabalhos import FILA_ATIVA, TEMPO_MAXIMO_ESPERA, obter_fila
+from trabalhos import ESTADOS_FINAIS, FilaCheia
 
 # --- Funções de Apoio ---
 
+def display_total_score(total_score):
+    """Exibe a nota total da redação."""
+    st.metric(label="Nota Total da Redação", value=f"{total_score} / 1000")
+
+def display_competencia(competencia):
+    """Exibe o bloco de uma competência em um container."""
+    score = competencia.nota if competencia.nota is not None else "N/A"
+    analysis = competencia.analise or "Análise não encontrada."
+
+    with st.container(border=True):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.subheader(competencia.titulo)
+        with col2:
+            st.metric(label="Nota", value=f"{score} / 200")
+        
+        st.markdown(analysis)
+
 def parse_and_display_correction(correction_text: str):
     """
     Analisa o texto de correção bruto e o exibe de forma estruturada no Streamlit.
     """
     st.header("Resultado da Correção")
 
-    # 1. Extrair a Nota Total
-    total_score_match = re.search(r"Nota da Redação:.*?(\d+)", correction_text)
-    if total_score_match:
-        total_score = total_score_match.group(1)
-        st.metric(label="Nota Total da Redação", value=f"{total_score} / 1000")
+    correcao = parse_correcao(correction_text)
+    if not correcao.valida:
+        st.error(correction_text)
+        return
+    if correcao.reaproveitada is not None:
+        st.info(correction_text.partition("\n")[0])
+
+    # 1. Exibir a Nota Total
+    if correcao.nota_total is not None:
+        display_total_score(correcao.nota_total)
     else:
         st.warning("Não foi possível extrair a nota total.")
 
     st.markdown("---")
 
-    # 2. Dividir a correção pelas competências
-    # Usamos uma expressão regular para encontrar cada bloco de competência
-    competencias = re.split(r"\n(?=Competência \d)", correction_text)
-    
-    # O primeiro elemento pode ser a nota total ou lixo, então o ignoramos se necessário
-    start_index = 1 if "Competência 1" in competencias[1] else 0
-    
-    for i, comp_block in enumerate(competencias[start_index:], start=1):
-        # Extrair o título da competência
-        title_match = re.search(r"Competência \d.*", comp_block)
-        title = title_match.group(0).strip() if title_match else f"Competência {i}"
-
-        # Extrair a nota da competência
-        score_match = re.search(r"Sua nota nessa competência foi:.*?(\d+)", comp_block)
-        score = score_match.group(1) if score_match else "N/A"
-
-        # Extrair a análise
-        # A análise é o texto após a linha da nota
-        analysis_match = re.search(r"\*\*Sua nota nessa competência foi:.*?\*\*\n(.*)", comp_block, re.DOTALL)
-        analysis = analysis_match.group(1).strip() if analysis_match else "Análise não encontrada."
-
-        # 3. Exibir em um container
-        with st.container(border=True):
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.subheader(title)
-            with col2:
-                st.metric(label="Nota", value=f"{score} / 200")
-            
-            st.markdown(analysis)
+    # 2. Exibir cada competência em um container
+    for competencia in correcao.competencias:
+        display_competencia(competencia)
+
+def stream_and_display_correction(chunks):
+    """
+    Exibe a correção à medida que ela chega: a nota total e cada competência
+    aparecem assim que são interpretadas. Retorna a correção completa.
+    """
+    st.header("Resultado da Correção")
+    total_placeholder = st.empty()
+    st.markdown("---")
+    parser = ParserIncremental()
+
+    def exibir(eventos):
+        for tipo, valor in eventos:
+            if tipo == 'nota_total':
+                with total_placeholder:
+                    display_total_score(valor)
+            else:
+                display_competencia(valor)
+
+    with st.spinner("Aguarde, o agente está corrigindo sua redação..."):
+        for chunk in chunks:
+            exibir(parser.alimentar(chunk))
+    exibir(parser.finalizar())
+
+    correcao = parser.correcao
+    if correcao.reaproveitada is not None:
+        st.info(correcao.texto.partition("\n")[0])
+    if not correcao.valida:
+        total_placeholder.error(correcao.texto)
+    elif correcao.nota_total is None:
+        total_placeholder.warning("Não foi possível extrair a nota total.")
+    return correcao
+
+def corrigir_texto_agrupado(texto: str, tema: str, dados, mime_type: str):
+    """
+    Correção pelo agrupador (CORRETOR_AGRUPAMENTO=1): redações em texto puro
+    enviadas quase ao mesmo tempo saem numa única chamada ao modelo. O upload
+    original acompanha o texto, para que o cache seja o mesmo da correção direta.
+    Produz a correção completa como um único trecho.
+    """
+    yield obter_agrupador().corrigir(texto, tema, dados, mime_type)
 
 
 # --- Interface do Streamlit ---
@@ -78,24 +117,39 @@ uploaded_file = st.file_uploader(
 st.header("3. Iniciar Correção")
 if st.button("Corrigir Minha Redação"):
     if uploaded_file is not None and tema_redacao:
-        # Criar um arquivo temporário para salvar o upload
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            caminho_arquivo_temporario = tmp_file.name
-
         try:
-            with st.spinner("Aguarde, o agente está corrigindo sua redação... Isso pode levar um minuto."):
-                # Chamar o agente para executar a correção
-                resultado_correcao = executar_correcao_enem(caminho_arquivo_temporario, tema_redacao)
-
-            # --- Exibição do Resultado ---
-            parse_and_display_correction(resultado_correcao)
-
+            if FILA_ATIVA:
+                # Modo fila: a correção roda nos processos de trabalhador.py
+                fila = obter_fila()
+                id_trabalho = fila.enfileirar(uploaded_file.getbuffer(), uploaded_file.name, tema_redacao,
+                                              mime_type=tipo_mime(uploaded_file.name, uploaded_file.type))
+                with st.spinner("Aguarde, sua redação está na fila de correção..."):
+                    trabalho = fila.aguardar(id_trabalho, tempo_maximo=TEMPO_MAXIMO_ESPERA)
+                if trabalho is None or trabalho['estado'] not in ESTADOS_FINAIS:
+                    st.error("A correção está demorando mais que o esperado. Tente novamente em instantes.")
+                else:
+                    parse_and_display_correction(trabalho['resultado'])
+            else:
+                # O upload vai do buffer do Streamlit direto para o agente, sem arquivo temporário
+                dados = uploaded_file.getbuffer()
+                mime_type = tipo_mime(uploaded_file.name, uploaded_file.type)
+                texto = None
+                if AGRUPAMENTO_ATIVO and mime_type == 'text/plain':
+                    texto = extrair_texto(dados, mime_type)
+                if texto:
+                    correcao = stream_and_display_correction(
+                        corrigir_texto_agrupado(texto, tema_redacao, dados, mime_type))
+                else:
+                    correcao = stream_and_display_correction(corrigir_bytes_stream(dados, mime_type, tema_redacao))
+                if correcao.reaproveitada is not None:
+                    # O resultado acima é preliminar: a correção desta versão já está em andamento
+                    with st.spinner("Corrigindo a versão enviada..."):
+                        parse_and_display_correction(corrigir_completa(dados, mime_type, tema_redacao))
+
+        except FilaCheia:
+            st.warning("Muitas correções na fila no momento. Tente novamente em instantes.")
         except Exception as e:
             st.error(f"Ocorreu um erro durante a correção: {e}")
-        finally:
-            # Remover o arquivo temporário
-            os.remove(caminho_arquivo_temporario)
 
     elif not tema_redacao:
         st.warning("Por favor, insira o tema da redação.")
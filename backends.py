@@ -0,0 +1,299 @@
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração dos Backends ---
+BACKEND_PADRAO = os.getenv('CORRETOR_BACKEND', 'gemini')
+
+# Cache de contexto da rubrica (CachedContent da API Gemini). Desligado por padrão:
+# a API exige um mínimo de tokens para criar o cache (milhares, conforme o modelo),
+# acima do tamanho atual da rubrica; sem ele, a rubrica segue como instrução de sistema.
+CONTEXTO_CACHE_ATIVO = os.getenv('CORRETOR_CONTEXTO_CACHE', '0') == '1'
+CONTEXTO_CACHE_TTL = int(os.getenv('CORRETOR_CONTEXTO_CACHE_TTL', '3600'))
+
+# Mídias maiores que isto (após extração/compressão) vão pela File API, enviadas
+# a partir do buffer em memória, em vez de inline na requisição (limite de ~20 MB)
+LIMITE_MIDIA_INLINE = int(os.getenv('CORRETOR_LIMITE_INLINE', str(18 * 1024 * 1024)))
+
+STUB_LATENCIA = float(os.getenv('CORRETOR_STUB_LATENCIA', '1.0'))
+STUB_DESVIO = float(os.getenv('CORRETOR_STUB_DESVIO', '0.3'))
+STUB_TAXA_ERRO = float(os.getenv('CORRETOR_STUB_TAXA_ERRO', '0.0'))
+STUB_TAXA_ERRO_FATAL = float(os.getenv('CORRETOR_STUB_TAXA_ERRO_FATAL', '0.0'))
+# Numa chamada agrupada, cada redação além da primeira acrescenta esta fração da
+# latência (a resposta cresce e o tempo de geração acompanha os tokens de saída)
+STUB_LATENCIA_REDACAO_EXTRA = float(os.getenv('CORRETOR_STUB_LATENCIA_REDACAO_EXTRA', '0.3'))
+
+# Blocos de redação de uma chamada agrupada (ver agent_corretor.PROMPT_REDACAO_AGRUPADA)
+RE_REDACAO_AGRUPADA = re.compile(r"^=== REDAÇÃO ([\w-]+) ===$", re.MULTILINE)
+
+TITULOS_COMPETENCIAS = [
+    "Domínio da modalidade escrita formal da língua portuguesa.",
+    "Compreender a proposta de redação e aplicar conceitos das várias áreas de conhecimento para desenvolver o tema.",
+    "Selecionar, relacionar, organizar e interpretar informações, fatos, opiniões e argumentos em defesa de um ponto de vista.",
+    "Demonstrar conhecimento dos mecanismos linguísticos necessários para a construção da argumentação.",
+    "Elaborar proposta de intervenção para o problema abordado, respeitando os direitos humanos.",
+]
+
+# --- Interface ---
+
+class BackendModelo:
+    """
+    Interface dos backends de modelo usados por agent_corretor.
+    `gerar` recebe as partes do conteúdo (prompt e mídia) e a instrução de
+    sistema (rubrica fixa), e retorna uma resposta com `.text` e `.usage_metadata`; com `stream=True`, a resposta é iterável
+    em trechos que também têm `.text`.
+    """
+    nome_modelo = None
+
+    def erro_configuracao(self):
+        """Mensagem de erro se o backend não puder ser usado, ou None."""
+        return None
+
+    def gerar(self, partes: list, config=None, stream: bool = False, instrucao_sistema: str = None):
+        raise NotImplementedError
+
+# --- Gemini ---
+
+_modelos = {}
+_modelos_lock = threading.Lock()
+_sdk_configurado = False
+
+def _importar_sdk(api_key: str):
+    """Importa e configura o SDK do Google uma única vez (chamar com _modelos_lock)."""
+    global _sdk_configurado
+    import google.generativeai as genai
+    if not _sdk_configurado:
+        genai.configure(api_key=api_key)
+        _sdk_configurado = True
+    return genai
+
+def obter_modelo(nome: str, api_key: str, instrucao_sistema: str = None):
+    """
+    Retorna o modelo generativo compartilhado pelo processo, criando-o (e
+    importando o SDK do Google) apenas na primeira chamada. Seguro entre threads.
+    Cada instrução de sistema distinta tem o seu próprio modelo.
+    """
+    with _modelos_lock:
+        chave = (nome, instrucao_sistema)
+        modelo = _modelos.get(chave)
+        if modelo is None:
+            genai = _importar_sdk(api_key)
+            modelo = _modelos[chave] = genai.GenerativeModel(nome, system_instruction=instrucao_sistema)
+        return modelo
+
+def obter_modelo_contexto_cacheado(nome: str, api_key: str, instrucao_sistema: str,
+                                   ttl: int = CONTEXTO_CACHE_TTL):
+    """
+    Retorna um modelo ligado a um conteúdo em cache (CachedContent) com a instrução
+    de sistema, recriado perto de expirar. Retorna None se a API recusar o cache
+    (ex.: instrução abaixo do mínimo de tokens exigido pelo modelo); a recusa é
+    memorizada para não repetir a tentativa a cada chamada.
+    """
+    with _modelos_lock:
+        chave = ('contexto', nome, instrucao_sistema)
+        modelo, expira_em = _modelos.get(chave, (None, 0.0))
+        if chave in _modelos and (modelo is None or time.monotonic() < expira_em):
+            return modelo
+        genai = _importar_sdk(api_key)
+        try:
+            from google.generativeai import caching
+            conteudo = caching.CachedContent.create(
+                model=nome, system_instruction=instrucao_sistema, ttl=datetime.timedelta(seconds=ttl),
+            )
+            modelo = genai.GenerativeModel.from_cached_content(cached_content=conteudo)
+        except Exception as e:
+            logger.warning("Cache de contexto indisponível para %s, usando instrução de sistema: %s", nome, e)
+            modelo = None
+        # Renova com folga antes do fim do TTL, para não usar um cache já expirado
+        _modelos[chave] = (modelo, time.monotonic() + ttl * 0.9)
+        return modelo
+
+class BackendGemini(BackendModelo):
+    """Backend real, via google.generativeai."""
+
+    def __init__(self, api_key: str, nome_modelo: str, contexto_cache: bool = CONTEXTO_CACHE_ATIVO):
+        self.api_key = api_key
+        self.nome_modelo = nome_modelo
+        self.contexto_cache = contexto_cache
+
+    def erro_configuracao(self):
+        if not self.api_key:
+            return "Erro: A chave da API não foi configurada."
+        return None
+
+    def _modelo(self, instrucao_sistema: str = None):
+        if instrucao_sistema and self.contexto_cache:
+            modelo = obter_modelo_contexto_cacheado(self.nome_modelo, self.api_key, instrucao_sistema)
+            if modelo is not None:
+                return modelo
+        return obter_modelo(self.nome_modelo, self.api_key, instrucao_sistema)
+
+    @staticmethod
+    def _parte(parte):
+        """
+        Mídia pequena segue inline (o SDK exige bytes, então buffers são convertidos
+        só aqui); mídia grande é enviada pela File API direto da memória, sem disco.
+        """
+        if not isinstance(parte, dict):
+            return parte
+        dados = parte['data']
+        if len(dados) > LIMITE_MIDIA_INLINE:
+            import google.generativeai as genai
+            return genai.upload_file(io.BytesIO(dados), mime_type=parte['mime_type'])
+        if isinstance(dados, bytes):
+            return parte
+        return {'mime_type': parte['mime_type'], 'data': bytes(dados)}
+
+    def gerar(self, partes: list, config=None, stream: bool = False, instrucao_sistema: str = None):
+        modelo = self._modelo(instrucao_sistema)
+        return modelo.generate_content([self._parte(p) for p in partes], generation_config=config, stream=stream)
+
+# --- Stub Determinístico ---
+
+class ErroStub(Exception):
+    """Erro simulado pelo stub; `code` segue os códigos HTTP da API."""
+
+    def __init__(self, code: int, mensagem: str):
+        super().__init__(mensagem)
+        self.code = code
+
+class RespostaStub:
+    """Resposta do stub, compatível com o que agent_corretor usa da resposta do SDK."""
+
+    def __init__(self, texto: str, tokens_prompt: int, trechos: list = None, atraso_trecho: float = 0.0):
+        self.text = texto
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=tokens_prompt,
+            candidates_token_count=len(texto) // 4,
+            total_token_count=tokens_prompt + len(texto) // 4,
+        )
+        self._trechos = trechos
+        self._atraso_trecho = atraso_trecho
+
+    def __iter__(self):
+        for trecho in self._trechos or [self.text]:
+            time.sleep(self._atraso_trecho)
+            yield SimpleNamespace(text=trecho)
+
+class BackendStub(BackendModelo):
+    """
+    Backend offline e determinístico para testes de carga e benchmarks.
+    As notas dependem apenas do conteúdo enviado (mesma entrada, mesma correção);
+    latência e erros seguem distribuições configuráveis.
+    """
+    nome_modelo = "stub"
+
+    def __init__(self, latencia: float = STUB_LATENCIA, desvio: float = STUB_DESVIO,
+                 taxa_erro: float = STUB_TAXA_ERRO, taxa_erro_fatal: float = STUB_TAXA_ERRO_FATAL,
+                 semente: int = None, trechos: int = 8,
+                 latencia_redacao_extra: float = STUB_LATENCIA_REDACAO_EXTRA):
+        self.latencia = latencia
+        self.latencia_redacao_extra = latencia_redacao_extra
+        self.desvio = desvio
+        self.taxa_erro = taxa_erro
+        self.taxa_erro_fatal = taxa_erro_fatal
+        self.trechos = trechos
+        self.chamadas = 0
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def _sortear(self):
+        with self._lock:
+            self.chamadas += 1
+            sorteio = self._aleatorio.random()
+            latencia = max(0.0, self._aleatorio.gauss(self.latencia, self.desvio))
+        return sorteio, latencia
+
+    @staticmethod
+    def _semente_conteudo(partes: list) -> int:
+        h = hashlib.sha256()
+        for parte in partes:
+            h.update(bytes(parte['data']) if isinstance(parte, dict) else str(parte).encode())
+        return int.from_bytes(h.digest()[:8], "big")
+
+    @staticmethod
+    def gerar_correcao(semente: int, modo_json: bool = False) -> str:
+        """Correção bem formada, no formato do prompt (ou JSON), derivada da semente."""
+        aleatorio = random.Random(semente)
+        notas = [aleatorio.choice((80, 120, 120, 160, 160, 200)) for _ in range(5)]
+        analises = [
+            f"Análise simulada da competência {i}: o texto atende parcialmente aos critérios, "
+            f"com nota {nota} atribuída pelo backend de teste."
+            for i, nota in enumerate(notas, start=1)
+        ]
+        if modo_json:
+            return json.dumps({
+                'nota_total': sum(notas),
+                'competencias': [
+                    {'numero': i, 'titulo': titulo, 'nota': nota, 'analise': analise}
+                    for i, (titulo, nota, analise) in enumerate(zip(TITULOS_COMPETENCIAS, notas, analises), start=1)
+                ],
+            }, ensure_ascii=False)
+        blocos = [
+            f"Competência {i}\n{titulo}\n**Sua nota nessa competência foi: {nota}**\n{analise}"
+            for i, (titulo, nota, analise) in enumerate(zip(TITULOS_COMPETENCIAS, notas, analises), start=1)
+        ]
+        return f"Nota da Redação: {sum(notas)}\n\n" + "\n\n".join(blocos)
+
+    @classmethod
+    def gerar_correcao_agrupada(cls, texto: str):
+        """
+        Resposta de uma chamada agrupada: um bloco de correção por redação
+        delimitada em `texto`. Retorna (resposta, redações), ou (None, 0) sem blocos.
+        """
+        partes = RE_REDACAO_AGRUPADA.split(texto)
+        if len(partes) < 3:
+            return None, 0
+        blocos = []
+        for identificador, corpo in zip(partes[1::2], partes[2::2]):
+            redacao = corpo.strip().split("\n\n", 1)[-1]  # sem a linha do tema
+            semente = int.from_bytes(hashlib.sha256(redacao.encode()).digest()[:8], "big")
+            palavras = redacao.split()
+            blocos.append(f"=== CORREÇÃO {identificador} ===\nInício da redação: {' '.join(palavras[:5])}\n"
+                          f"Final da redação: {' '.join(palavras[-5:])}\n\n" + cls.gerar_correcao(semente))
+        return "\n\n".join(blocos), len(blocos)
+
+    def gerar(self, partes: list, config=None, stream: bool = False, instrucao_sistema: str = None):
+        sorteio, latencia = self._sortear()
+        if sorteio < self.taxa_erro_fatal:
+            time.sleep(latencia * 0.1)
+            raise ErroStub(400, "Erro simulado: requisição inválida.")
+        if sorteio < self.taxa_erro_fatal + self.taxa_erro:
+            time.sleep(latencia * 0.1)
+            raise ErroStub(503, "Erro simulado: serviço temporariamente indisponível.")
+
+        modo_json = bool(config) and config.get('response_mime_type') == 'application/json'
+        texto_enviado = "".join(str(p['data'], 'utf-8', 'ignore') for p in partes
+                                if isinstance(p, dict) and p['mime_type'].startswith('text/'))
+        texto, redacoes = self.gerar_correcao_agrupada(texto_enviado)
+        if texto is None:
+            texto = self.gerar_correcao(self._semente_conteudo(partes), modo_json)
+        latencia *= 1 + self.latencia_redacao_extra * max(0, redacoes - 1)
+        tokens_prompt = (len(instrucao_sistema or "")
+                         + sum(len(p) if isinstance(p, str) else len(p['data']) for p in partes)) // 4
+
+        if not stream:
+            time.sleep(latencia)
+            return RespostaStub(texto, tokens_prompt)
+        # No streaming, a latência é distribuída entre os trechos
+        tamanho = max(1, len(texto) // self.trechos + 1)
+        trechos = [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+        return RespostaStub(texto, tokens_prompt, trechos, latencia / len(trechos))
+
+def criar_backend(nome: str, api_key: str = None, nome_modelo: str = None) -> BackendModelo:
+    """Cria o backend pelo nome ('gemini' ou 'stub')."""
+    if nome == 'stub':
+        return BackendStub()
+    if nome == 'gemini':
+        return BackendGemini(api_key, nome_modelo)
+    raise ValueError(f"Backend desconhecido: {nome}")
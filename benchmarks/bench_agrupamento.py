@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_agrupamento --redacoes 120 --taxa 4 --rpm 60
+# Envia redações em texto a uma taxa fixa (chegadas de Poisson) e compara a
+# correção individual com o agrupamento em várias janelas e tamanhos de grupo:
+# vazão, latência de cada chamador e chamadas ao modelo. O modelo é o backend stub.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault('CORRETOR_BACKEND', 'stub')
+
+import agent_corretor  # noqa: E402
+from agrupamento import AgrupadorCorrecoes  # noqa: E402
+from backends import BackendStub  # noqa: E402
+from benchmarks.comum import TEMA, gerar_redacao, percentil  # noqa: E402
+from correcao import parse_correcao  # noqa: E402
+from limitador import LimitadorTaxa, definir_limitador  # noqa: E402
+
+# (janela em ms, máximo de redações por grupo); (0, 1) é a correção individual
+CONFIGURACOES = [(0, 1), (50, 3), (200, 6), (500, 8)]
+
+def executar(agrupador: AgrupadorCorrecoes, redacoes: list, taxa: float, semente: int) -> dict:
+    """Dispara uma thread por redação em chegadas de Poisson e mede cada correção."""
+    latencias, validas = [], []
+    lock = threading.Lock()
+
+    def chamador(texto):
+        inicio = time.perf_counter()
+        resultado = agrupador.corrigir(texto, TEMA)
+        with lock:
+            latencias.append(time.perf_counter() - inicio)
+            validas.append(parse_correcao(resultado).valida)
+
+    aleatorio = random.Random(semente)
+    threads = []
+    inicio = time.perf_counter()
+    for texto in redacoes:
+        thread = threading.Thread(target=chamador, args=(texto,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(aleatorio.expovariate(taxa))
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    return {
+        'vazao': len(redacoes) / duracao,
+        'p50': percentil(latencias, 50),
+        'p95': percentil(latencias, 95),
+        'media': statistics.mean(latencias),
+        'validas': sum(validas),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do agrupamento de redações em texto.")
+    parser.add_argument('--redacoes', type=int, default=120)
+    parser.add_argument('--taxa', type=float, default=4.0, help="Redações enviadas por segundo (média)")
+    parser.add_argument('--rpm', type=int, default=60, help="Cota de requisições por minuto")
+    parser.add_argument('--latencia', type=float, default=1.0, help="Latência média do stub (s)")
+    args = parser.parse_args()
+
+    redacoes = [gerar_redacao(random.Random(i), palavras=(50, 80)) for i in range(args.redacoes)]
+    print(f"{args.redacoes} redações a {args.taxa:.1f}/s | cota {args.rpm} RPM | latência do stub {args.latencia:.1f} s")
+    print("-" * 30)
+    for janela_ms, max_redacoes in CONFIGURACOES:
+        stub = BackendStub(latencia=args.latencia, desvio=args.latencia * 0.2, semente=0)
+        agent_corretor.definir_backend(stub)
+        definir_limitador(LimitadorTaxa(args.rpm, 10 ** 9))
+        agrupador = AgrupadorCorrecoes(
+            janela=janela_ms / 1000, max_redacoes=max_redacoes, simultaneos=64,
+            corretor_agrupado=lambda itens: agent_corretor.corrigir_textos_agrupados(itens, usar_cache=False),
+            corretor_individual=lambda texto, tema, dados, mime_type: agent_corretor.corrigir_bytes(
+                dados, mime_type, tema, usar_cache=False),
+        )
+        r = executar(agrupador, redacoes, args.taxa, semente=1)
+        nome = "individual" if max_redacoes == 1 else f"janela {janela_ms} ms, até {max_redacoes}"
+        print(f"{nome:<24} vazão {r['vazao']:5.2f} redações/s | latência p50 {r['p50']:6.2f} s "
+              f"| p95 {r['p95']:6.2f} s | chamadas {stub.chamadas:4d} | válidas {r['validas']}/{args.redacoes}")
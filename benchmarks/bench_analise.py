@@ -0,0 +1,66 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_analise --correcoes 50000 --turmas 10
+# Mede o cálculo das estatísticas de turma sobre um histórico sintético.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analise_turma import AnaliseTurmas, calcular_estatisticas, montar_dataframe  # noqa: E402
+from historico import RepositorioHistorico  # noqa: E402
+
+def popular(caminho: str, correcoes: int, turmas: int, alunos_por_turma: int):
+    """Insere correções sintéticas dos últimos 90 dias direto no banco (uma transação)."""
+    RepositorioHistorico(caminho)  # cria o esquema
+    aleatorio = random.Random(0)
+    agora = time.time()
+    linhas = []
+    for i in range(correcoes):
+        turma = i % turmas
+        notas = [aleatorio.choice((40, 80, 120, 160, 200)) for _ in range(5)]
+        linhas.append((f"aluno_{turma}_{aleatorio.randrange(alunos_por_turma)}", f"Tema {i % 25}",
+                       "Nota da Redação", sum(notas), *notas, agora - aleatorio.random() * 90 * 86400, f"Turma {turma}"))
+    with sqlite3.connect(caminho) as conn:
+        conn.executemany(
+            "INSERT INTO correcoes (aluno, tema, resultado, nota, c1, c2, c3, c4, c5, criado_em, turma) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark das estatísticas de turma.")
+    parser.add_argument('--correcoes', type=int, default=50000)
+    parser.add_argument('--turmas', type=int, default=10)
+    parser.add_argument('--alunos-por-turma', type=int, default=35)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "historico.sqlite3")
+        popular(caminho, args.correcoes, args.turmas, args.alunos_por_turma)
+        historico = RepositorioHistorico(caminho)
+        analise = AnaliseTurmas(historico)
+
+        colunas, t_leitura = cronometrar(historico.notas_em_colunas)
+        df, t_dataframe = cronometrar(montar_dataframe, colunas)
+        _, t_calculo = cronometrar(calcular_estatisticas, df)
+        print(f"Histórico: {args.correcoes} correções | {args.turmas} turmas")
+        print("-" * 30)
+        print(f"Todas as turmas: leitura {t_leitura:.1f} ms | DataFrame {t_dataframe:.1f} ms "
+              f"| estatísticas {t_calculo:.1f} ms | total {t_leitura + t_dataframe + t_calculo:.1f} ms")
+
+        _, t_frio = cronometrar(analise.estatisticas, "Turma 0")
+        _, t_cache = cronometrar(analise.estatisticas, "Turma 0")
+        historico.adicionar("aluno_0_0", "Tema 0", "Nota da Redação", turma="Turma 0")
+        _, t_invalidado = cronometrar(analise.estatisticas, "Turma 0")
+        print(f"Uma turma: primeira consulta {t_frio:.1f} ms | em cache {t_cache:.2f} ms "
+              f"| após nova correção {t_invalidado:.1f} ms")
@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_duplicatas --quantidade 100000
+# Mede a busca no índice de quase-duplicatas com redações sintéticas de um mesmo tema.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.comum import PALAVRAS, TEMA, gerar_redacao, percentil  # noqa: E402
+from duplicatas import IndiceDuplicatas, assinatura_minhash  # noqa: E402
+
+def editar_levemente(texto: str, aleatorio: random.Random, trocas: int = 3) -> str:
+    """Simula o reenvio com pequenas edições: troca algumas palavras."""
+    palavras = texto.split(" ")
+    for _ in range(trocas):
+        palavras[aleatorio.randrange(len(palavras))] = aleatorio.choice(PALAVRAS)
+    return " ".join(palavras)
+
+def resumir(nome: str, tempos_ms: list):
+    print(f"{nome:<22} p50 {percentil(tempos_ms, 50):7.3f} ms | p95 {percentil(tempos_ms, 95):7.3f} ms "
+          f"| p99 {percentil(tempos_ms, 99):7.3f} ms | média {statistics.mean(tempos_ms):7.3f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do índice de quase-duplicatas.")
+    parser.add_argument('--quantidade', type=int, default=20000, help="Redações armazenadas no índice")
+    parser.add_argument('--consultas', type=int, default=200, help="Consultas de cada tipo")
+    parser.add_argument('--lote', type=int, default=2000, help="Redações por transação ao popular o índice")
+    args = parser.parse_args()
+
+    aleatorio = random.Random(0)
+    with tempfile.TemporaryDirectory() as pasta:
+        indice = IndiceDuplicatas(os.path.join(pasta, "duplicatas.sqlite3"))
+        originais = []
+        inicio = time.perf_counter()
+        for inicio_lote in range(0, args.quantidade, args.lote):
+            lote = [gerar_redacao(aleatorio) for _ in range(min(args.lote, args.quantidade - inicio_lote))]
+            indice.adicionar_lote([(texto, TEMA, "Nota da Redação: 800") for texto in lote])
+            originais.extend(lote[:max(1, args.consultas // max(1, args.quantidade // args.lote))])
+        duracao = time.perf_counter() - inicio
+        print(f"Índice: {indice.contar()} redações em {duracao:.1f} s "
+              f"({1000 * duracao / args.quantidade:.2f} ms por redação)")
+
+        tempos = {'assinatura': [], 'busca (quase-duplicata)': [], 'busca (redação nova)': []}
+        acertos = 0
+        for texto in originais[:args.consultas]:
+            editado = editar_levemente(texto, aleatorio)
+            t0 = time.perf_counter()
+            assinatura_minhash(editado)
+            tempos['assinatura'].append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            acertos += indice.buscar(editado, TEMA, comparar_paragrafos=False) is not None
+            tempos['busca (quase-duplicata)'].append((time.perf_counter() - t0) * 1000)
+        falsos_positivos = 0
+        for _ in range(args.consultas):
+            t0 = time.perf_counter()
+            falsos_positivos += indice.buscar(gerar_redacao(aleatorio), TEMA, comparar_paragrafos=False) is not None
+            tempos['busca (redação nova)'].append((time.perf_counter() - t0) * 1000)
+
+    print("-" * 30)
+    for nome, valores in tempos.items():
+        resumir(nome, valores)
+    print("-" * 30)
+    print(f"Quase-duplicatas encontradas: {acertos}/{len(tempos['assinatura'])} "
+          f"| falsos positivos: {falsos_positivos}/{args.consultas}")
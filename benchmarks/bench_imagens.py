@@ -0,0 +1,106 @@
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_imagens                      # imagens sintéticas
+# python -m benchmarks.bench_imagens --pasta fotos/       # fotos reais de redações
+# python -m benchmarks.bench_imagens --pasta fotos/ --tema "Tema" --com-modelo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from preprocessamento_imagem import preprocessar_imagem, preprocessar_imagens  # noqa: E402
+
+def gerar_imagem_sintetica(semente: int, largura: int = 4032, altura: int = 3024) -> bytes:
+    """Simula a foto de uma folha manuscrita: fundo irregular, folha clara e linhas de texto."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    aleatorio = random.Random(semente)
+    imagem = Image.new('RGB', (largura, altura), (90, 70, 50))
+    desenho = ImageDraw.Draw(imagem)
+    folha = (int(largura * 0.15), int(altura * 0.05), int(largura * 0.85), int(altura * 0.95))
+    desenho.rectangle(folha, fill=(235, 232, 225))
+    y = folha[1] + 80
+    while y < folha[3] - 80:
+        x = folha[0] + 60
+        while x < folha[2] - 120:
+            palavra = aleatorio.randint(40, 160)
+            desenho.line((x, y, x + palavra, y + aleatorio.randint(-4, 4)), fill=(30, 30, 60), width=6)
+            x += palavra + aleatorio.randint(20, 40)
+        y += 70
+    imagem = imagem.filter(ImageFilter.GaussianBlur(1))
+    saida = io.BytesIO()
+    imagem.save(saida, format='JPEG', quality=95)
+    return saida.getvalue()
+
+def carregar_imagens(pasta: str, quantidade: int) -> list:
+    if pasta:
+        nomes = sorted(n for n in os.listdir(pasta) if n.lower().endswith(('.png', '.jpg', '.jpeg')))
+        return [(nome, open(os.path.join(pasta, nome), 'rb').read()) for nome in nomes]
+    return [(f"sintetica_{i}.jpg", gerar_imagem_sintetica(i)) for i in range(quantidade)]
+
+def comparar_notas(imagens: list, processadas: list, tema: str) -> list:
+    """Corrige a versão original e a pré-processada de cada imagem e compara as notas."""
+    from agent_corretor import _chamar_modelo, compilar_prompt
+    from correcao import parse_correcao
+
+    prompt = compilar_prompt().para_tema(tema)
+    comparacoes = []
+    for (nome, original), processada in zip(imagens, processadas):
+        notas = []
+        for media in ({"mime_type": "image/jpeg", "data": original}, {"mime_type": "image/jpeg", "data": processada}):
+            inicio = time.perf_counter()
+            response, _ = _chamar_modelo(prompt, media)
+            notas.append((parse_correcao(response.text).nota_final, time.perf_counter() - inicio))
+        comparacoes.append((nome, notas[0], notas[1]))
+    return comparacoes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do pré-processamento de imagens.")
+    parser.add_argument('--pasta', help="Pasta com fotos de redações (padrão: imagens sintéticas)")
+    parser.add_argument('--quantidade', type=int, default=8, help="Quantidade de imagens sintéticas")
+    parser.add_argument('--com-modelo', action='store_true', help="Compara também as notas e a latência do modelo")
+    parser.add_argument('--tema', default="Desafios para a valorização da leitura no Brasil")
+    args = parser.parse_args()
+
+    try:
+        imagens = carregar_imagens(args.pasta, args.quantidade)
+    except ImportError:
+        print("Erro: o benchmark requer o Pillow (pip install Pillow).")
+        sys.exit(1)
+
+    # Tamanho e tempo, processando em série
+    tempos, processadas = [], []
+    for _, dados in imagens:
+        inicio = time.perf_counter()
+        processadas.append(preprocessar_imagem(dados))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    # Tempo total processando em paralelo no pool de processos
+    preprocessar_imagens([dados for _, dados in imagens[:1]])  # aquece o pool
+    inicio = time.perf_counter()
+    preprocessar_imagens([dados for _, dados in imagens])
+    tempo_pool = (time.perf_counter() - inicio) * 1000
+
+    total_original = sum(len(dados) for _, dados in imagens)
+    total_processado = sum(len(dados) for dados in processadas)
+    print(f"Imagens: {len(imagens)}")
+    print(f"Tamanho: {total_original / 1e6:.2f} MB -> {total_processado / 1e6:.2f} MB "
+          f"({100 * (1 - total_processado / total_original):.1f}% menor)")
+    print(f"Tempo por imagem (série): mediana {statistics.median(tempos):.1f} ms | máximo {max(tempos):.1f} ms")
+    print(f"Tempo total: série {sum(tempos):.1f} ms | pool de processos {tempo_pool:.1f} ms")
+
+    if args.com_modelo:
+        print("-" * 30)
+        diferencas = []
+        for nome, (nota_original, t_original), (nota_processada, t_processada) in comparar_notas(imagens, processadas, args.tema):
+            print(f"{nome}: nota {nota_original} -> {nota_processada} | latência {t_original:.1f} s -> {t_processada:.1f} s")
+            if nota_original is not None and nota_processada is not None:
+                diferencas.append(abs(nota_original - nota_processada))
+        if diferencas:
+            print(f"Diferença média de nota: {statistics.mean(diferencas):.1f} pontos")
@@ -0,0 +1,64 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_importacao [repeticoes]
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "antes" reproduz o que a importação de agent_corretor carregava antes da
+# importação preguiçosa: streamlit e o SDK do Google junto com o módulo
+CENARIOS = {
+    'agent_corretor (preguiçoso)': "import agent_corretor",
+    'agent_corretor + SDKs (antes)': "import streamlit, google.generativeai; import agent_corretor",
+}
+
+def medir_importacao(codigo: str, repeticoes: int) -> list:
+    """Mede, em ms, o tempo de iniciar um interpretador e executar `codigo`."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processo = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if processo.returncode != 0:
+            return None
+    return tempos
+
+def medir_reuso_modelo(repeticoes: int):
+    """Compara a primeira chamada de obter_modelo com as seguintes (reutilizadas)."""
+    sys.path.insert(0, RAIZ)
+    try:
+        from agent_corretor import API_KEY, MODEL_NAME
+        from backends import obter_modelo
+        inicio = time.perf_counter()
+        obter_modelo(MODEL_NAME, API_KEY)
+        primeira = (time.perf_counter() - inicio) * 1000
+    except ImportError:
+        return None
+    seguintes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        obter_modelo(MODEL_NAME, API_KEY)
+        seguintes.append((time.perf_counter() - inicio) * 1000)
+    return primeira, statistics.median(seguintes)
+
+if __name__ == '__main__':
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"Tempo de inicialização + importação ({repeticoes} repetições)")
+    print("-" * 30)
+    for nome, codigo in CENARIOS.items():
+        tempos = medir_importacao(codigo, repeticoes)
+        if tempos is None:
+            print(f"{nome}: indisponível (dependência não instalada)")
+        else:
+            print(f"{nome}: mediana {statistics.median(tempos):.1f} ms | mínimo {min(tempos):.1f} ms")
+
+    reuso = medir_reuso_modelo(repeticoes)
+    print("-" * 30)
+    if reuso is None:
+        print("obter_modelo: indisponível (dependência não instalada)")
+    else:
+        print(f"obter_modelo: primeira chamada {reuso[0]:.1f} ms | chamadas seguintes {reuso[1]:.4f} ms")
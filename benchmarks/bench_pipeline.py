@@ -0,0 +1,192 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from mimetypes import guess_type
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.bench_pipeline --saida bench_pipeline.json
+# python -m benchmarks.bench_pipeline --comparar bench_pipeline.json   # compara com uma execução anterior
+# O modelo é sempre o backend stub: nenhuma chamada de rede é feita.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault('CORRETOR_BACKEND', 'stub')
+
+import agent_corretor  # noqa: E402
+from backends import BackendStub  # noqa: E402
+from benchmarks.comum import TEMA, gerar_redacao, percentil  # noqa: E402
+from correcao import parse_correcao  # noqa: E402
+from extracao_texto import preparar_media  # noqa: E402
+from limitador import LimitadorTaxa, definir_limitador  # noqa: E402
+
+# --- Corpus ---
+
+def montar_corpus(pasta: str, sinteticas: int) -> list:
+    """Arquivos de exemplo do repositório mais redações sintéticas em .txt."""
+    corpus = [os.path.join(RAIZ, nome) for nome in ('redacao_a.pdf', 'redacao_b.pdf')
+              if os.path.exists(os.path.join(RAIZ, nome))]
+    for i in range(sinteticas):
+        caminho = os.path.join(pasta, f"sintetica_{i}.txt")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(gerar_redacao(random.Random(i)))
+        corpus.append(caminho)
+    return corpus
+
+# --- Estatísticas ---
+
+def resumir(tempos_ms: list) -> dict:
+    return {
+        'n': len(tempos_ms),
+        'p50_ms': round(percentil(tempos_ms, 50), 4),
+        'p95_ms': round(percentil(tempos_ms, 95), 4),
+        'p99_ms': round(percentil(tempos_ms, 99), 4),
+        'media_ms': round(statistics.mean(tempos_ms), 4),
+    }
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+# --- Estágios ---
+
+def medir_estagios(corpus: list, repeticoes: int, backend: BackendStub) -> dict:
+    """Executa cada estágio do pipeline separadamente para cada arquivo do corpus."""
+    try:
+        from new_app import build_top5_chart
+    except ImportError:
+        build_top5_chart = None
+
+    prompt_compilado = agent_corretor.compilar_prompt()
+    tempos = {nome: [] for nome in ('leitura', 'mime', 'extracao', 'prompt', 'modelo', 'parse', 'grafico')}
+    historico = []
+    for _ in range(repeticoes):
+        for caminho in corpus:
+            def ler():
+                with open(caminho, 'rb') as f:
+                    return f.read()
+            dados, t = cronometrar(ler)
+            tempos['leitura'].append(t)
+            (mime_type, _), t = cronometrar(guess_type, caminho)
+            tempos['mime'].append(t)
+            (media, _), t = cronometrar(preparar_media, dados, mime_type)
+            tempos['extracao'].append(t)
+            prompt, t = cronometrar(prompt_compilado.para_tema, TEMA)
+            tempos['prompt'].append(t)
+            resposta, t = cronometrar(lambda: backend.gerar([prompt, media],
+                                                            instrucao_sistema=prompt_compilado.instrucao_sistema))
+            tempos['modelo'].append(t)
+            correcao, t = cronometrar(parse_correcao, resposta.text)
+            tempos['parse'].append(t)
+            historico.append({'id': len(historico), 'tema': TEMA, 'score': correcao.nota_final})
+            if build_top5_chart is not None:
+                top5 = sorted(historico, key=lambda item: item['score'], reverse=True)[:5]
+                def renderizar():
+                    build_top5_chart(top5).save(io.StringIO(), format='html')
+                _, t = cronometrar(renderizar)
+                tempos['grafico'].append(t)
+    return {nome: resumir(valores) for nome, valores in tempos.items() if valores}
+
+def medir_concorrencia(corpus: list, niveis: list, por_nivel: int) -> dict:
+    """Vazão e latência de executar_correcao_enem (sem cache) em cada nível de concorrência."""
+    resultados = {}
+    tarefas = [corpus[i % len(corpus)] for i in range(por_nivel)]
+    for nivel in niveis:
+        def corrigir(caminho):
+            return cronometrar(agent_corretor.executar_correcao_enem, caminho, TEMA, False)[1]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=nivel) as executor:
+            latencias = list(executor.map(corrigir, tarefas))
+        duracao = time.perf_counter() - inicio
+        resultados[str(nivel)] = dict(resumir(latencias), vazao_por_s=round(len(tarefas) / duracao, 3))
+    return resultados
+
+def medir_memoria(corpus: list) -> dict:
+    """Pico de memória alocada (tracemalloc) numa passada completa pelo corpus."""
+    tracemalloc.start()
+    for caminho in corpus:
+        agent_corretor.executar_correcao_enem(caminho, TEMA, usar_cache=False)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'pico_bytes': pico}
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def comparar(atual: dict, anterior: dict):
+    """Imprime a variação do p50 de cada estágio e da vazão em relação a uma execução anterior."""
+    print(f"Comparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    for nome, dados in atual['estagios'].items():
+        antes = anterior.get('estagios', {}).get(nome)
+        if antes and antes['p50_ms']:
+            variacao = 100 * (dados['p50_ms'] / antes['p50_ms'] - 1)
+            print(f"  {nome:<10} p50 {antes['p50_ms']:.3f} -> {dados['p50_ms']:.3f} ms ({variacao:+.1f}%)")
+    for nivel, dados in atual['concorrencia'].items():
+        antes = anterior.get('concorrencia', {}).get(nivel)
+        if antes:
+            print(f"  concorrência {nivel:<3} vazão {antes['vazao_por_s']:.2f} -> {dados['vazao_por_s']:.2f}/s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do pipeline de correção.")
+    parser.add_argument('--sinteticas', type=int, default=20, help="Quantidade de redações sintéticas")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Passadas pelo corpus na medição por estágio")
+    parser.add_argument('--latencia', type=float, default=0.05, help="Latência média do backend stub (s)")
+    parser.add_argument('--concorrencia', default="1,2,4,8,16", help="Níveis de concorrência")
+    parser.add_argument('--por-nivel', type=int, default=64, help="Correções por nível de concorrência")
+    parser.add_argument('--saida', default="bench_pipeline.json", help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    backend = BackendStub(latencia=args.latencia, desvio=args.latencia * 0.2, semente=0)
+    agent_corretor.definir_backend(backend)
+    definir_limitador(LimitadorTaxa(10 ** 6, 10 ** 9))
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        corpus = montar_corpus(pasta, args.sinteticas)
+        resultado = {
+            'data': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'commit': commit_atual(),
+            'python': platform.python_version(),
+            'parametros': vars(args),
+            'corpus': len(corpus),
+            'estagios': medir_estagios(corpus, args.repeticoes, backend),
+            'concorrencia': medir_concorrencia(corpus, [int(n) for n in args.concorrencia.split(",")], args.por_nivel),
+            'memoria': medir_memoria(corpus),
+        }
+
+    print(f"Corpus: {resultado['corpus']} arquivos | stub com latência média de {args.latencia}s")
+    print("-" * 30)
+    for nome, dados in resultado['estagios'].items():
+        print(f"{nome:<10} p50 {dados['p50_ms']:9.3f} ms | p95 {dados['p95_ms']:9.3f} ms | p99 {dados['p99_ms']:9.3f} ms")
+    print("-" * 30)
+    for nivel, dados in resultado['concorrencia'].items():
+        print(f"concorrência {nivel:<3} vazão {dados['vazao_por_s']:7.2f}/s | p50 {dados['p50_ms']:8.1f} ms "
+              f"| p99 {dados['p99_ms']:8.1f} ms")
+    print(f"Pico de memória: {resultado['memoria']['pico_bytes'] / 1e6:.2f} MB")
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {args.saida}")
+
+    if anterior:
+        print("-" * 30)
+        comparar(resultado, anterior)
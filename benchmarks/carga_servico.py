@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+
+# Como usar (a partir da raiz do projeto):
+# python -m benchmarks.carga_servico --clientes 50 --trabalhadores 4 --latencia 0.5
+# O serviço é iniciado no próprio processo com um corretor simulado, sem rede externa.
+# Com --pipeline-completo, a correção passa por agent_corretor usando o backend stub.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.comum import percentil  # noqa: E402
+from servico_correcao import ServicoCorrecao, iniciar_servidor  # noqa: E402
+
+CORRECAO_SIMULADA = "Nota da Redação: 880\n\n" + "\n\n".join(
+    f"Competência {i}\nDescrição.\n**Sua nota nessa competência foi: 160**\nAnálise." for i in range(1, 6)
+)
+
+def criar_corretor_simulado(latencia: float):
+    def corretor(dados: bytes, mime_type: str, tema: str) -> str:
+        time.sleep(latencia)
+        return CORRECAO_SIMULADA
+    return corretor
+
+async def requisitar(porta: int, metodo: str, caminho: str, dados: dict = None):
+    """Cliente HTTP mínimo: retorna (status, corpo JSON)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+    corpo = json.dumps(dados).encode() if dados is not None else b""
+    writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+    await writer.drain()
+    resposta = await reader.read()
+    writer.close()
+    cabecalho, _, conteudo = resposta.partition(b"\r\n\r\n")
+    return int(cabecalho.split()[1]), json.loads(conteudo)
+
+async def cliente(porta: int, conteudo: str, intervalo_consulta: float) -> dict:
+    """Submete uma correção e consulta o estado até que ela termine."""
+    inicio = time.perf_counter()
+    status, trabalho = await requisitar(porta, "POST", "/correcoes", {
+        'tema': "Tema de carga", 'nome_arquivo': "redacao.txt", 'conteudo_base64': conteudo,
+    })
+    if status != 202:
+        return {'recusado': True}
+    while trabalho['estado'] not in ('concluido', 'erro'):
+        await asyncio.sleep(intervalo_consulta)
+        _, trabalho = await requisitar(porta, "GET", f"/correcoes/{trabalho['id']}")
+    return {'recusado': False, 'latencia': time.perf_counter() - inicio, 'estado': trabalho['estado']}
+
+def configurar_pipeline_completo(latencia: float):
+    """Usa o pipeline real de agent_corretor com o backend stub, sem cota nem cache."""
+    os.environ.setdefault('CORRETOR_BACKEND', 'stub')
+    import agent_corretor
+    from backends import BackendStub
+    from limitador import LimitadorTaxa, definir_limitador
+
+    agent_corretor.definir_backend(BackendStub(latencia=latencia, desvio=latencia * 0.2))
+    definir_limitador(LimitadorTaxa(10 ** 6, 10 ** 9))
+    return lambda dados, mime_type, tema: agent_corretor.corrigir_bytes(dados, mime_type, tema, usar_cache=False)
+
+async def executar_carga(args):
+    corretor = configurar_pipeline_completo(args.latencia) if args.pipeline_completo \
+        else criar_corretor_simulado(args.latencia)
+    servico = ServicoCorrecao(corretor, args.trabalhadores, args.fila)
+    servidor = await iniciar_servidor(servico, porta=0)
+    porta = servidor.sockets[0].getsockname()[1]
+    conteudo = base64.b64encode("Texto da redação. ".encode() * 200).decode()
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(cliente(porta, conteudo, args.intervalo) for _ in range(args.clientes)))
+    duracao = time.perf_counter() - inicio
+
+    servidor.close()
+    await servico.parar()
+
+    latencias = [r['latencia'] for r in resultados if not r['recusado']]
+    print(f"Clientes: {args.clientes} | Trabalhadores: {args.trabalhadores} | Fila: {args.fila} "
+          f"| Latência simulada: {args.latencia}s")
+    print(f"Concluídas: {len(latencias)} | Recusadas (fila cheia): {len(resultados) - len(latencias)}")
+    print(f"Vazão: {len(latencias) / duracao:.2f} correções/s em {duracao:.2f} s")
+    if latencias:
+        print(f"Latência: p50 {percentil(latencias, 50):.2f} s | p95 {percentil(latencias, 95):.2f} s "
+              f"| p99 {percentil(latencias, 99):.2f} s | média {statistics.mean(latencias):.2f} s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gerador de carga local para o serviço de correção.")
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--trabalhadores', type=int, default=4)
+    parser.add_argument('--fila', type=int, default=100)
+    parser.add_argument('--latencia', type=float, default=0.5, help="Latência simulada do modelo (s)")
+    parser.add_argument('--pipeline-completo', action='store_true',
+                        help="Corrige via agent_corretor com o backend stub em vez de um corretor simulado")
+    parser.add_argument('--intervalo', type=float, default=0.05, help="Intervalo entre consultas de estado (s)")
+    asyncio.run(executar_carga(parser.parse_args()))
@@ -0,0 +1,23 @@
+import random
+
+# Funções e dados compartilhados pelos benchmarks: corpus sintético e percentis.
+
+TEMA = "Desafios para a valorização da leitura no Brasil"
+PALAVRAS = (
+    "sociedade educação leitura brasileira desafio acesso políticas públicas cidadania cultura "
+    "desigualdade escola biblioteca formação crítica governo investimento jovens tecnologia "
+    "informação direitos humanos proposta intervenção ministério comunidade mídia família "
+    "professores livros hábito país cenário histórico constituição problema solução"
+).split()
+
+def gerar_redacao(aleatorio: random.Random, paragrafos: int = 5, palavras: tuple = (60, 110)) -> str:
+    """Redação sintética: `paragrafos` parágrafos de palavras do tema sorteadas por `aleatorio`."""
+    return "\n\n".join(
+        " ".join(aleatorio.choice(PALAVRAS) for _ in range(aleatorio.randint(*palavras))).capitalize() + "."
+        for _ in range(paragrafos)
+    )
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil `p` (0 a 100) pelo valor observado mais próximo."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# --- Configuração do Cache ---
+CACHE_PATH = os.getenv('CORRETOR_CACHE_PATH', '.cache_correcao.sqlite3')
+CACHE_TTL = int(os.getenv('CORRETOR_CACHE_TTL', str(30 * 24 * 3600)))  # 30 dias
+CACHE_MAX_ENTRADAS = int(os.getenv('CORRETOR_CACHE_MAX', '5000'))
+CACHE_ATIVO = os.getenv('CORRETOR_CACHE', '1') != '0'
+
+# --- Funções de Chave ---
+
+def normalizar_tema(tema: str) -> str:
+    """
+    Normaliza o tema para que variações de espaços e maiúsculas/minúsculas
+    não gerem chaves diferentes.
+    """
+    return " ".join(unicodedata.normalize("NFC", tema).split()).casefold()
+
+def chave_correcao(dados: bytes, mime_type: str, tema: str, modelo: str, template: str) -> str:
+    """
+    Calcula a chave de conteúdo (SHA-256) de uma correção a partir dos bytes
+    originais do arquivo (antes da extração de texto ou do preparo de imagens),
+    do tipo MIME, do tema normalizado, do modelo e do template do prompt.
+    """
+    h = hashlib.sha256()
+    # memoryview em bytes ('B'): hasheia o buffer do upload sem copiá-lo
+    conteudo = memoryview(dados).cast('B')
+    for parte in (conteudo, mime_type.encode(), normalizar_tema(tema).encode(), modelo.encode(), template.encode()):
+        # Prefixo de tamanho evita colisões por concatenação
+        h.update(len(parte).to_bytes(8, "big"))
+        h.update(parte)
+    return h.hexdigest()
+
+# --- Cache Persistente ---
+
+class CacheCorrecao:
+    """
+    Cache persistente de correções em SQLite, com expiração por TTL e
+    limite de entradas (remove as menos acessadas recentemente).
+    """
+
+    def __init__(self, caminho: str = CACHE_PATH, ttl: int = CACHE_TTL,
+                 max_entradas: int = CACHE_MAX_ENTRADAS, relogio=time.time):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS correcoes (
+                chave TEXT PRIMARY KEY,
+                resultado TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_correcoes_acessado ON correcoes (acessado_em);
+            CREATE TABLE IF NOT EXISTS estatisticas (
+                nome TEXT PRIMARY KEY,
+                valor INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _incrementar(self, nome: str):
+        self._conn.execute(
+            "INSERT INTO estatisticas (nome, valor) VALUES (?, 1) "
+            "ON CONFLICT(nome) DO UPDATE SET valor = valor + 1",
+            (nome,),
+        )
+
+    def obter(self, chave: str):
+        """Retorna a correção armazenada para a chave, ou None se ausente/expirada."""
+        agora = self._relogio()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT resultado, criado_em FROM correcoes WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha and agora - linha[1] <= self.ttl:
+                self._conn.execute("UPDATE correcoes SET acessado_em = ? WHERE chave = ?", (agora, chave))
+                self._incrementar("hits")
+                self._conn.commit()
+                return linha[0]
+            if linha:
+                self._conn.execute("DELETE FROM correcoes WHERE chave = ?", (chave,))
+            self._incrementar("misses")
+            self._conn.commit()
+            return None
+
+    def salvar(self, chave: str, resultado: str):
+        """Armazena uma correção e aplica as políticas de expiração e tamanho."""
+        agora = self._relogio()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO correcoes (chave, resultado, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                (chave, resultado, agora, agora),
+            )
+            self._conn.execute("DELETE FROM correcoes WHERE criado_em < ?", (agora - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM correcoes WHERE chave IN ("
+                "SELECT chave FROM correcoes ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_entradas,),
+            )
+            self._conn.commit()
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores de acertos/erros e o tamanho atual do cache."""
+        with self._lock:
+            valores = dict(self._conn.execute("SELECT nome, valor FROM estatisticas").fetchall())
+            entradas = self._conn.execute("SELECT COUNT(*) FROM correcoes").fetchone()[0]
+        hits, misses = valores.get("hits", 0), valores.get("misses", 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': hits / total if total else 0.0,
+            'entradas': entradas,
+        }
+
+    def limpar(self):
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._conn.execute("DELETE FROM correcoes")
+            self._conn.execute("DELETE FROM estatisticas")
+            self._conn.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def obter_cache() -> CacheCorrecao:
+    """Retorna a instância compartilhada do cache do processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheCorrecao()
+        return _cache
@@ -0,0 +1,305 @@
+import json
+import math
+import re
+import statistics
+from dataclasses import asdict, dataclass, field
+
+# --- Padrões do Formato de Saída (compilados uma única vez) ---
+RE_NOTA_TOTAL = re.compile(r"Nota da Reda[çc][ãa]o\**\s*:\s*\**\s*(\d+)", re.IGNORECASE)
+RE_CABECALHO_COMPETENCIA = re.compile(r"^[ \t#*]*Compet[êe]ncia\s+([1-5])\b.*$", re.IGNORECASE | re.MULTILINE)
+RE_NOTA_COMPETENCIA = re.compile(
+    r"Sua nota nessa compet[êe]ncia foi\s*:\s*\**\s*(\d+)[^\n]*\n?", re.IGNORECASE
+)
+# Correções agrupadas: um bloco por redação, aberto por "=== CORREÇÃO <id> ===" e
+# seguido do início e do final da redação repetidos pelo modelo (ver separar_correcoes_agrupadas)
+RE_CABECALHO_AGRUPADO = re.compile(r"^[ \t#*]*=+\s*CORRE[ÇC][ÃA]O\s+([\w-]+)\s*=+[ \t*]*$",
+                                   re.IGNORECASE | re.MULTILINE)
+RE_INICIO_REDACAO = re.compile(r"^[ \t*]*In[íi]cio da reda[çc][ãa]o\**\s*:\**[ \t]*(.*)\n?",
+                               re.IGNORECASE | re.MULTILINE)
+RE_FINAL_REDACAO = re.compile(r"^[ \t*]*Final da reda[çc][ãa]o\**\s*:\**[ \t]*(.*)\n?",
+                              re.IGNORECASE | re.MULTILINE)
+
+# Aviso no início de uma correção reaproveitada de uma quase-duplicata (ver
+# marcar_reaproveitada): é um resultado preliminar, não uma correção nova
+AVISO_REAPROVEITADA = ("Correção preliminar: reaproveitada de uma versão {similaridade:.0%} semelhante "
+                       "desta redação (mesmo tema). As alterações feitas desde então ainda não foram "
+                       "avaliadas: a correção desta versão está em andamento.")
+RE_AVISO_REAPROVEITADA = re.compile(r"\A\s*Corre[çc][ãa]o preliminar: reaproveitada de uma vers[ãa]o (\d+)%")
+
+# As notas de cada competência do ENEM variam de 40 em 40 pontos (0 a 200)
+PASSO_NOTA_COMPETENCIA = 40
+
+# Esquema de resposta estruturada (modo JSON) enviado ao modelo
+SCHEMA_CORRECAO = {
+    "type": "OBJECT",
+    "properties": {
+        "nota_total": {"type": "INTEGER"},
+        "competencias": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "numero": {"type": "INTEGER"},
+                    "titulo": {"type": "STRING"},
+                    "nota": {"type": "INTEGER"},
+                    "analise": {"type": "STRING"},
+                },
+                "required": ["numero", "nota", "analise"],
+            },
+        },
+    },
+    "required": ["nota_total", "competencias"],
+}
+
+# --- Resultado Tipado ---
+
+@dataclass
+class Competencia:
+    """Nota e análise de uma das 5 competências do ENEM."""
+    numero: int
+    titulo: str
+    nota: int = None
+    analise: str = ""
+
+@dataclass
+class Correcao:
+    """Resultado estruturado de uma correção."""
+    nota_total: int = None
+    competencias: list = field(default_factory=list)
+    texto: str = ""
+    reaproveitada: float = None  # similaridade, se a correção veio de uma quase-duplicata
+
+    @property
+    def valida(self) -> bool:
+        """Indica se a resposta do modelo pôde ser interpretada."""
+        return self.nota_total is not None or bool(self.competencias)
+
+    @property
+    def notas(self) -> list:
+        """Notas das competências 1 a 5 (None para as ausentes)."""
+        por_numero = {c.numero: c.nota for c in self.competencias}
+        return [por_numero.get(i) for i in range(1, 6)]
+
+    @property
+    def nota_final(self):
+        """Nota total informada ou, na falta dela, a soma das 5 competências."""
+        if self.nota_total is not None:
+            return self.nota_total
+        notas = self.notas
+        return sum(notas) if None not in notas else None
+
+    def to_dict(self) -> dict:
+        dados = asdict(self)
+        dados.pop('texto')
+        return dados
+
+# --- Parser ---
+
+def _parse_json(texto: str) -> Correcao:
+    dados = json.loads(texto)
+    competencias = [
+        Competencia(
+            numero=int(c.get('numero', i)),
+            titulo=c.get('titulo') or f"Competência {c.get('numero', i)}",
+            nota=int(c['nota']) if c.get('nota') is not None else None,
+            analise=(c.get('analise') or "").strip(),
+        )
+        for i, c in enumerate(dados.get('competencias', []), start=1)
+    ]
+    nota_total = dados.get('nota_total')
+    return Correcao(int(nota_total) if nota_total is not None else None, competencias, texto)
+
+def parse_correcao(texto: str) -> Correcao:
+    """
+    Interpreta a correção bruta do modelo (texto no formato do prompt ou JSON)
+    e retorna um objeto `Correcao`.
+    """
+    texto = texto or ""
+    aviso = RE_AVISO_REAPROVEITADA.match(texto)
+    reaproveitada = int(aviso.group(1)) / 100 if aviso else None
+    # O aviso ocupa a primeira linha; o JSON (se houver) vem depois dele
+    conteudo = (texto.partition("\n")[2] if aviso else texto).strip()
+    if conteudo.startswith("{"):
+        try:
+            correcao = _parse_json(conteudo)
+            correcao.texto, correcao.reaproveitada = texto, reaproveitada
+            return correcao
+        except (ValueError, TypeError, KeyError):
+            pass
+
+    total_match = RE_NOTA_TOTAL.search(texto)
+    nota_total = int(total_match.group(1)) if total_match else None
+
+    # Cada cabeçalho "Competência N" delimita um bloco até o próximo cabeçalho
+    cabecalhos = list(RE_CABECALHO_COMPETENCIA.finditer(texto))
+    competencias = []
+    for i, cabecalho in enumerate(cabecalhos):
+        fim = cabecalhos[i + 1].start() if i + 1 < len(cabecalhos) else len(texto)
+        bloco = texto[cabecalho.end():fim]
+        nota_match = RE_NOTA_COMPETENCIA.search(bloco)
+        competencias.append(Competencia(
+            numero=int(cabecalho.group(1)),
+            titulo=cabecalho.group(0).strip(" \t#*"),
+            nota=int(nota_match.group(1)) if nota_match else None,
+            analise=bloco[nota_match.end():].strip() if nota_match else "",
+        ))
+    return Correcao(nota_total, competencias, texto, reaproveitada)
+
+def marcar_reaproveitada(resultado: str, similaridade: float) -> str:
+    """Acrescenta à correção de uma quase-duplicata o aviso de que ela é preliminar."""
+    return AVISO_REAPROVEITADA.format(similaridade=similaridade) + "\n\n" + resultado
+
+def formatar_correcao(correcao: Correcao) -> str:
+    """Escreve a correção no formato de saída do prompt (o inverso de parse_correcao)."""
+    blocos = []
+    for c in correcao.competencias:
+        cabecalho = f"Competência {c.numero}"
+        if c.titulo and not c.titulo.lower().startswith("compet"):
+            cabecalho += f"\n{c.titulo}"
+        blocos.append(f"{cabecalho}\n**Sua nota nessa competência foi: {c.nota}**\n{c.analise}")
+    return f"Nota da Redação: {correcao.nota_final}\n\n" + "\n\n".join(blocos)
+
+# --- Conferência e Correções Agrupadas ---
+
+def problemas_correcao(correcao: Correcao) -> list:
+    """
+    Inconsistências de uma correção interpretada: competências ausentes ou
+    repetidas, notas fora da escala do ENEM e nota total diferente da soma.
+    Lista vazia quando a correção está completa e coerente.
+    """
+    problemas = []
+    numeros = [c.numero for c in correcao.competencias]
+    if sorted(numeros) != [1, 2, 3, 4, 5]:
+        problemas.append(f"competências encontradas: {numeros or 'nenhuma'}")
+    for c in correcao.competencias:
+        if c.nota is None or not 0 <= c.nota <= 200 or c.nota % PASSO_NOTA_COMPETENCIA:
+            problemas.append(f"nota fora da escala na competência {c.numero}: {c.nota}")
+    notas = correcao.notas
+    if correcao.nota_total is None:
+        problemas.append("nota total ausente")
+    elif None not in notas and correcao.nota_total != sum(notas):
+        problemas.append(f"nota total {correcao.nota_total} difere da soma das competências ({sum(notas)})")
+    return problemas
+
+def _retirar_eco(bloco: str, regex: re.Pattern) -> tuple:
+    """(trecho repetido ou None, bloco sem a linha do trecho)."""
+    encontrado = regex.search(bloco)
+    if not encontrado:
+        return None, bloco
+    return encontrado.group(1).strip(' "*'), bloco[:encontrado.start()] + bloco[encontrado.end():]
+
+def separar_correcoes_agrupadas(texto: str) -> dict:
+    """
+    Separa a resposta de uma chamada agrupada em {identificador: (início
+    repetido, final repetido, correção bruta)}. Identificadores repetidos na
+    resposta são ambíguos e ficam de fora.
+    """
+    cabecalhos = list(RE_CABECALHO_AGRUPADO.finditer(texto or ""))
+    blocos, repetidos = {}, set()
+    for i, cabecalho in enumerate(cabecalhos):
+        fim = cabecalhos[i + 1].start() if i + 1 < len(cabecalhos) else len(texto)
+        bloco = texto[cabecalho.end():fim]
+        inicio, bloco = _retirar_eco(bloco, RE_INICIO_REDACAO)
+        final, bloco = _retirar_eco(bloco, RE_FINAL_REDACAO)
+        identificador = cabecalho.group(1)
+        if identificador in blocos:
+            repetidos.add(identificador)
+        blocos[identificador] = (inicio, final, bloco.strip())
+    for identificador in repetidos:
+        del blocos[identificador]
+    return blocos
+
+# --- Agregação de Várias Correções (ensemble) ---
+
+def _mediana_nota(notas: list) -> int:
+    """
+    Mediana na escala de notas do ENEM; com número par de notas, fica a menor
+    central. Notas fora da escala vão para o múltiplo de 40 mais próximo (o
+    maior, no empate; round() arredondaria 100 para 80 e 140 para 160).
+    """
+    return math.floor(statistics.median_low(notas) / PASSO_NOTA_COMPETENCIA + 0.5) * PASSO_NOTA_COMPETENCIA
+
+def amplitudes_notas(correcoes: list) -> list:
+    """Diferença entre a maior e a menor nota de cada competência (None se faltar nota)."""
+    amplitudes = []
+    for notas in zip(*(c.notas for c in correcoes)):
+        validas = [n for n in notas if n is not None]
+        amplitudes.append(max(validas) - min(validas) if validas else None)
+    return amplitudes
+
+def desvios_notas(correcoes: list) -> list:
+    """Desvio padrão populacional das notas de cada competência."""
+    return [
+        round(statistics.pstdev(validas), 1) if validas else None
+        for validas in ([n for n in notas if n is not None] for notas in zip(*(c.notas for c in correcoes)))
+    ]
+
+def agregar_correcoes(correcoes: list) -> Correcao:
+    """
+    Combina várias correções da mesma redação: cada competência recebe a
+    mediana das notas, e a análise vem da correção mais próxima das medianas.
+    """
+    correcoes = [c for c in correcoes if c.valida]
+    if not correcoes:
+        return Correcao()
+    medianas = []
+    for notas in zip(*(c.notas for c in correcoes)):
+        validas = [n for n in notas if n is not None]
+        medianas.append(_mediana_nota(validas) if validas else None)
+
+    def distancia(correcao):
+        return sum(abs(n - m) for n, m in zip(correcao.notas, medianas) if n is not None and m is not None)
+    representante = min(correcoes, key=distancia)
+
+    por_numero = {c.numero: c for c in representante.competencias}
+    competencias = [
+        Competencia(
+            numero=i,
+            titulo=por_numero[i].titulo if i in por_numero else f"Competência {i}",
+            nota=nota,
+            analise=por_numero[i].analise if i in por_numero else "",
+        )
+        for i, nota in enumerate(medianas, start=1) if nota is not None
+    ]
+    agregada = Correcao(sum(c.nota for c in competencias) if len(competencias) == 5 else None, competencias)
+    agregada.texto = formatar_correcao(agregada)
+    return agregada
+
+class ParserIncremental:
+    """
+    Interpreta a correção enquanto ela chega em trechos (modo streaming).
+    `alimentar` retorna os eventos novos: ('nota_total', int) assim que a nota
+    total é lida e ('competencia', Competencia) quando um bloco se completa.
+    """
+
+    def __init__(self):
+        self.texto = ""
+        self._nota_emitida = False
+        self._competencias_emitidas = 0
+
+    def _eventos(self, final: bool) -> list:
+        correcao = parse_correcao(self.texto)
+        eventos = []
+        if not self._nota_emitida and correcao.nota_total is not None:
+            # Só emite quando a nota não pode mais crescer com o próximo trecho
+            total_match = RE_NOTA_TOTAL.search(self.texto)
+            if final or total_match.end() < len(self.texto):
+                eventos.append(('nota_total', correcao.nota_total))
+                self._nota_emitida = True
+        # O último bloco só está completo quando o próximo começa (ou no fim)
+        completas = correcao.competencias if final else correcao.competencias[:-1]
+        for competencia in completas[self._competencias_emitidas:]:
+            eventos.append(('competencia', competencia))
+        self._competencias_emitidas = max(self._competencias_emitidas, len(completas))
+        return eventos
+
+    def alimentar(self, trecho: str) -> list:
+        self.texto += trecho
+        return self._eventos(final=False)
+
+    def finalizar(self) -> list:
+        return self._eventos(final=True)
+
+    @property
+    def correcao(self) -> Correcao:
+        return parse_correcao(self.texto)
@@ -0,0 +1,180 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agent_corretor import executar_correcao_enem, executar_correcao_enem_conjunto
+from cache_correcao import CACHE_ATIVO, obter_cache
+from correcao import parse_correcao
+
+# Extensões aceitas ao varrer um diretório de redações
+EXTENSOES_ACEITAS = ('.txt', '.pdf', '.png', '.jpg', '.jpeg', '.docx')
+
+# --- Funções de Apoio ---
+
+def carregar_tarefas(origem: str, tema: str = None) -> list:
+    """
+    Monta a lista de tarefas (arquivo, tema) a partir de um diretório ou de um
+    manifesto CSV com as colunas 'arquivo' e 'tema'.
+    """
+    if os.path.isdir(origem):
+        if not tema:
+            raise ValueError("O tema é obrigatório ao corrigir um diretório (--tema).")
+        arquivos = sorted(
+            os.path.join(origem, nome) for nome in os.listdir(origem)
+            if nome.lower().endswith(EXTENSOES_ACEITAS)
+        )
+        return [(os.path.abspath(arquivo), tema) for arquivo in arquivos]
+
+    base = os.path.dirname(os.path.abspath(origem))
+    tarefas = []
+    with open(origem, newline='', encoding='utf-8') as f:
+        for linha in csv.DictReader(f):
+            arquivo = os.path.join(base, linha['arquivo'].strip())
+            tema_linha = (linha.get('tema') or tema or '').strip()
+            if not tema_linha:
+                raise ValueError(f"Tema ausente para o arquivo: {linha['arquivo']}")
+            tarefas.append((os.path.abspath(arquivo), tema_linha))
+    return tarefas
+
+def carregar_concluidas(caminho_saida: str) -> set:
+    """
+    Lê um JSONL de uma execução anterior e retorna as tarefas já corrigidas com
+    sucesso, para que possam ser puladas ao retomar o lote.
+    """
+    concluidas = set()
+    if not os.path.exists(caminho_saida):
+        return concluidas
+    with open(caminho_saida, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                # Última linha pode ter ficado incompleta se o processo foi interrompido
+                continue
+            if registro.get('status') == 'ok':
+                concluidas.add((registro['arquivo'], registro['tema']))
+    return concluidas
+
+def corrigir_tarefa(arquivo: str, tema: str, conjunto: bool = False) -> dict:
+    """
+    Executa a correção de uma única tarefa e devolve o registro para o JSONL.
+    Com `conjunto`, a nota é a mediana de várias amostras do modelo, e o
+    registro traz também a dispersão entre elas.
+    """
+    inicio = time.perf_counter()
+    extras = {}
+    if conjunto:
+        resultado_conjunto = executar_correcao_enem_conjunto(arquivo, tema)
+        resultado = resultado_conjunto.texto
+        extras = {
+            'amostras': len(resultado_conjunto.amostras),
+            'concordante': resultado_conjunto.concordante,
+            'desvios': resultado_conjunto.desvios,
+        }
+    else:
+        resultado = executar_correcao_enem(arquivo, tema)
+    correcao = parse_correcao(resultado)
+    return {
+        'arquivo': arquivo,
+        'tema': tema,
+        'status': 'ok' if correcao.valida else 'erro',
+        'nota': correcao.nota_final,
+        'notas': correcao.notas,
+        'resultado': resultado,
+        **extras,
+        'duracao_s': round(time.perf_counter() - inicio, 3),
+    }
+
+def descartar_linha_incompleta(caminho_saida: str):
+    """
+    Remove do fim do JSONL a linha sem quebra final deixada por uma interrupção,
+    para que o próximo registro não seja colado a ela (e perdido) ao retomar.
+    """
+    if not os.path.exists(caminho_saida):
+        return
+    with open(caminho_saida, 'rb+') as f:
+        fim = f.seek(0, os.SEEK_END)
+        posicao = fim
+        while posicao > 0:
+            inicio = max(0, posicao - 4096)
+            f.seek(inicio)
+            bloco = f.read(posicao - inicio)
+            quebra = bloco.rfind(b"\n")
+            if quebra != -1:
+                posicao = inicio + quebra + 1
+                break
+            posicao = inicio
+        if posicao < fim:
+            f.truncate(posicao)
+
+def executar_lote(tarefas: list, caminho_saida: str, concorrencia: int = 4, retomar: bool = True,
+                  conjunto: bool = False) -> dict:
+    """
+    Corrige as tarefas em paralelo (no máximo `concorrencia` chamadas simultâneas),
+    gravando cada resultado no JSONL assim que fica pronto. Com `conjunto`, cada
+    redação é corrigida em conjunto (ver corrigir_tarefa).
+    """
+    concluidas = set()
+    if retomar:
+        concluidas = carregar_concluidas(caminho_saida)
+        descartar_linha_incompleta(caminho_saida)
+    pendentes = [t for t in tarefas if t not in concluidas]
+    resumo = {'total': len(tarefas), 'puladas': len(tarefas) - len(pendentes), 'ok': 0, 'erro': 0}
+
+    modo = 'a' if retomar else 'w'
+    with open(caminho_saida, modo, encoding='utf-8') as saida, \
+            ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        futuros = {executor.submit(corrigir_tarefa, arquivo, tema, conjunto): (arquivo, tema)
+                   for arquivo, tema in pendentes}
+        for futuro in as_completed(futuros):
+            arquivo, tema = futuros[futuro]
+            try:
+                registro = futuro.result()
+            except Exception as e:
+                registro = {'arquivo': arquivo, 'tema': tema, 'status': 'erro',
+                            'resultado': f"Erro inesperado ao executar a correção: {e}", 'duracao_s': None}
+            saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            saida.flush()
+            resumo[registro['status']] += 1
+            print(f"[{registro['status']}] {os.path.basename(arquivo)}")
+    return resumo
+
+# --- Linha de Comando ---
+if __name__ == '__main__':
+    # Como usar:
+    # python correcao_lote.py pasta_redacoes/ --tema "Tema da Redação" --saida resultados.jsonl
+    # python correcao_lote.py manifesto.csv --concorrencia 8
+    # python correcao_lote.py pasta_redacoes/ --tema "..." --conjunto   (mediana de várias amostras)
+    parser = argparse.ArgumentParser(description="Correção em lote de redações do ENEM.")
+    parser.add_argument('origem', help="Diretório com redações ou manifesto CSV (colunas: arquivo, tema)")
+    parser.add_argument('--tema', help="Tema aplicado a todas as redações (obrigatório para diretórios)")
+    parser.add_argument('--saida', default='resultados.jsonl', help="Arquivo JSONL de resultados")
+    parser.add_argument('--concorrencia', type=int, default=4, help="Número máximo de correções simultâneas")
+    parser.add_argument('--recomecar', action='store_true', help="Ignora resultados anteriores em vez de retomar")
+    parser.add_argument('--conjunto', action='store_true',
+                        help="Nota pela mediana de várias amostras do modelo (CORRETOR_ENSEMBLE_AMOSTRAS)")
+    args = parser.parse_args()
+
+    try:
+        tarefas = carregar_tarefas(args.origem, args.tema)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    print(f"Iniciando lote com {len(tarefas)} redações (concorrência: {args.concorrencia})...")
+    cache_antes = obter_cache().estatisticas() if CACHE_ATIVO else None
+    resumo = executar_lote(tarefas, args.saida, args.concorrencia, retomar=not args.recomecar,
+                           conjunto=args.conjunto)
+    print("-" * 30)
+    print(f"Total: {resumo['total']} | Puladas: {resumo['puladas']} | OK: {resumo['ok']} | Erros: {resumo['erro']}")
+    if cache_antes is not None:
+        # Os contadores do cache são acumulados no arquivo: o lote é a diferença
+        cache_depois = obter_cache().estatisticas()
+        acertos = cache_depois['hits'] - cache_antes['hits']
+        consultas = acertos + cache_depois['misses'] - cache_antes['misses']
+        print(f"Cache: {acertos} de {consultas} consultas atendidas sem chamar o modelo "
+              f"({acertos / consultas if consultas else 0:.0%}) | {cache_depois['entradas']} correções guardadas")
@@ -0,0 +1,213 @@
+import difflib
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from dataclasses import dataclass, field
+
+from cache_correcao import normalizar_tema
+
+# --- Configuração do Índice de Quase-Duplicatas ---
+DUPLICATAS_PATH = os.getenv('CORRETOR_DUPLICATAS_PATH', '.duplicatas.sqlite3')
+DUPLICATAS_ATIVO = os.getenv('CORRETOR_DUPLICATAS', '0') == '1'
+LIMIAR_SIMILARIDADE = float(os.getenv('CORRETOR_DUPLICATAS_LIMIAR', '0.9'))
+
+# MinHash de 128 posições, agrupadas em 16 bandas de 8 linhas (LSH): pares com
+# similaridade de Jaccard acima de ~0,7 caem na mesma banda com alta
+# probabilidade; abaixo disso, raramente viram candidatos
+NUM_PERMUTACOES = 128
+BANDAS = 16
+LINHAS_POR_BANDA = NUM_PERMUTACOES // BANDAS
+TAMANHO_SHINGLE = 3  # palavras
+
+_BITS_POSICAO = NUM_PERMUTACOES.bit_length() - 1
+_MASCARA_VALOR = (1 << (64 - _BITS_POSICAO)) - 1
+_VAZIO = _MASCARA_VALOR + 1
+RE_PALAVRA = re.compile(r"\w+")
+
+# --- MinHash ---
+
+def normalizar_texto(texto: str) -> list:
+    """Palavras do texto em minúsculas e sem acentos (pontuação e espaços são ignorados)."""
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return RE_PALAVRA.findall(sem_acentos.casefold())
+
+def shingles(texto: str, tamanho: int = TAMANHO_SHINGLE) -> set:
+    """Conjunto de hashes (64 bits) das sequências de `tamanho` palavras."""
+    palavras = normalizar_texto(texto)
+    sequencias = {" ".join(palavras[i:i + tamanho]) for i in range(max(1, len(palavras) - tamanho + 1))}
+    return {
+        int.from_bytes(hashlib.blake2b(sequencia.encode(), digest_size=8).digest(), "big")
+        for sequencia in sequencias if sequencia
+    }
+
+def assinatura_minhash(texto: str) -> array:
+    """
+    Assinatura MinHash do texto por permutação única (one permutation hashing):
+    cada shingle é hasheado uma vez, os bits altos escolhem a posição e o
+    restante disputa o mínimo dela. Posições vazias copiam a próxima preenchida
+    (densificação), para que as bandas do LSH continuem comparáveis.
+    Custa O(shingles), e não O(shingles x permutações).
+    """
+    minimos = [_VAZIO] * NUM_PERMUTACOES
+    for h in shingles(texto):
+        posicao, valor = h >> (64 - _BITS_POSICAO), h & _MASCARA_VALOR
+        if valor < minimos[posicao]:
+            minimos[posicao] = valor
+    if all(valor == _VAZIO for valor in minimos):
+        return array('Q', minimos)
+    densificados = list(minimos)
+    for i, valor in enumerate(minimos):
+        if valor == _VAZIO:
+            # Próxima posição preenchida (circular), deslocada pela distância
+            distancia = next(d for d in range(1, NUM_PERMUTACOES) if minimos[(i + d) % NUM_PERMUTACOES] != _VAZIO)
+            densificados[i] = distancia * _VAZIO + minimos[(i + distancia) % NUM_PERMUTACOES]
+    return array('Q', densificados)
+
+def similaridade(assinatura_a: array, assinatura_b: array) -> float:
+    """Estimativa da similaridade de Jaccard: fração de posições com o mesmo mínimo."""
+    return sum(x == y for x, y in zip(assinatura_a, assinatura_b)) / NUM_PERMUTACOES
+
+def _chaves_bandas(assinatura: array, escopo: str) -> list:
+    """Uma chave inteira (64 bits, com sinal, como o SQLite armazena) por banda."""
+    chaves = []
+    for banda in range(BANDAS):
+        h = hashlib.blake2b(digest_size=8)
+        h.update(escopo.encode())
+        h.update(banda.to_bytes(1, "big"))
+        h.update(assinatura[banda * LINHAS_POR_BANDA:(banda + 1) * LINHAS_POR_BANDA].tobytes())
+        chaves.append(int.from_bytes(h.digest(), "big", signed=True))
+    return chaves
+
+def paragrafos_alterados(texto_anterior: str, texto_novo: str) -> list:
+    """Parágrafos do texto novo que não existem (iguais) no texto anterior."""
+    def paragrafos(texto):
+        return [" ".join(p.split()) for p in re.split(r"\n\s*\n|\r?\n", texto) if p.strip()]
+    anteriores, novos = paragrafos(texto_anterior), paragrafos(texto_novo)
+    comparador = difflib.SequenceMatcher(a=anteriores, b=novos, autojunk=False)
+    return [
+        paragrafo
+        for operacao, _, _, inicio, fim in comparador.get_opcodes() if operacao in ('replace', 'insert')
+        for paragrafo in novos[inicio:fim]
+    ]
+
+# --- Índice Persistente ---
+
+@dataclass
+class CorrecaoSemelhante:
+    """Correção anterior de uma redação quase idêntica."""
+    id: int
+    similaridade: float
+    resultado: str
+    paragrafos_alterados: list = field(default_factory=list)
+
+class IndiceDuplicatas:
+    """
+    Índice de redações já corrigidas em SQLite, para encontrar versões quase
+    idênticas (MinHash + LSH) do mesmo tema. A busca consulta apenas as chaves
+    de banda indexadas e compara as assinaturas dos poucos candidatos, então o
+    custo não cresce com o número de redações armazenadas.
+    """
+
+    def __init__(self, caminho: str = DUPLICATAS_PATH):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS redacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                escopo TEXT NOT NULL,
+                assinatura BLOB NOT NULL,
+                texto BLOB NOT NULL,
+                resultado TEXT NOT NULL,
+                criado_em REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bandas (
+                chave INTEGER NOT NULL,
+                redacao_id INTEGER NOT NULL,
+                PRIMARY KEY (chave, redacao_id)
+            ) WITHOUT ROWID;
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def escopo(tema: str, modelo: str = "") -> str:
+        """Redações só são comparadas dentro do mesmo tema (e modelo corretor)."""
+        return f"{modelo}\x00{normalizar_tema(tema)}"
+
+    def adicionar(self, texto: str, tema: str, resultado: str, modelo: str = "") -> int:
+        """Indexa o texto de uma redação corrigida e a sua correção."""
+        return self.adicionar_lote([(texto, tema, resultado)], modelo)[0]
+
+    def adicionar_lote(self, itens, modelo: str = "") -> list:
+        """Indexa vários (texto, tema, resultado) numa única transação (ex.: importar o histórico)."""
+        preparados = []
+        for texto, tema, resultado in itens:
+            escopo = self.escopo(tema, modelo)
+            preparados.append((escopo, assinatura_minhash(texto), zlib.compress(texto.encode()), resultado))
+        ids = []
+        with self._lock:
+            for escopo, assinatura, texto_compactado, resultado in preparados:
+                cursor = self._conn.execute(
+                    "INSERT INTO redacoes (escopo, assinatura, texto, resultado, criado_em) VALUES (?, ?, ?, ?, ?)",
+                    (escopo, assinatura.tobytes(), texto_compactado, resultado, time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO bandas (chave, redacao_id) VALUES (?, ?)",
+                    [(chave, cursor.lastrowid) for chave in _chaves_bandas(assinatura, escopo)],
+                )
+                ids.append(cursor.lastrowid)
+            self._conn.commit()
+        return ids
+
+    def buscar(self, texto: str, tema: str, modelo: str = "", limiar: float = LIMIAR_SIMILARIDADE,
+               comparar_paragrafos: bool = True):
+        """
+        Retorna a correção anterior mais semelhante com similaridade >= `limiar`,
+        ou None. Com `comparar_paragrafos`, informa os parágrafos que mudaram.
+        """
+        escopo = self.escopo(tema, modelo)
+        assinatura = assinatura_minhash(texto)
+        chaves = _chaves_bandas(assinatura, escopo)
+        with self._lock:
+            candidatos = self._conn.execute(
+                f"SELECT r.id, r.assinatura FROM redacoes r WHERE r.id IN ("
+                f"SELECT redacao_id FROM bandas WHERE chave IN ({','.join('?' * len(chaves))})) "
+                f"AND r.escopo = ?",
+                (*chaves, escopo),
+            ).fetchall()
+        melhor_id, melhor = None, 0.0
+        for id_redacao, blob in candidatos:
+            valor = similaridade(assinatura, array('Q', blob))
+            if valor > melhor:
+                melhor_id, melhor = id_redacao, valor
+        if melhor_id is None or melhor < limiar:
+            return None
+
+        with self._lock:
+            texto_anterior, resultado = self._conn.execute(
+                "SELECT texto, resultado FROM redacoes WHERE id = ?", (melhor_id,)
+            ).fetchone()
+        alterados = paragrafos_alterados(zlib.decompress(texto_anterior).decode(), texto) \
+            if comparar_paragrafos else []
+        return CorrecaoSemelhante(melhor_id, melhor, resultado, alterados)
+
+    def contar(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM redacoes").fetchone()[0]
+
+_indice = None
+_indice_lock = threading.Lock()
+
+def obter_indice() -> IndiceDuplicatas:
+    """Retorna o índice de quase-duplicatas compartilhado do processo."""
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceDuplicatas()
+        return _indice
@@ -0,0 +1,103 @@
+import io
+import logging
+import os
+import re
+import unicodedata
+import zipfile
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração da Extração ---
+EXTRACAO_TEXTO_ATIVA = os.getenv('CORRETOR_EXTRAIR_TEXTO', '1') != '0'
+
+# Abaixo disso o arquivo é tratado como digitalizado (imagem) e a mídia original é enviada
+MIN_CARACTERES_TEXTO = int(os.getenv('CORRETOR_MIN_CARACTERES_TEXTO', '200'))
+
+MIME_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+_NS_WORD = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_RE_ESPACOS = re.compile(r"[ \t]+")
+_RE_LINHAS_VAZIAS = re.compile(r"\n{3,}")
+
+# Ligaduras que algumas fontes (ex.: Calibri) exportam para glifos de outras
+# letras. As ligaduras Unicode (ﬁ, ﬂ) já são desfeitas pela normalização NFKC.
+_GLIFOS_SUBSTITUTOS = str.maketrans({'Ɵ': 'ti', 'ơ': 'tt'})
+# Latim estendido B, uso privado e o caractere de substituição: sobras de glifos
+# sem mapeamento, que corromperiam a ortografia avaliada na Competência 1
+_RE_GLIFOS_SUSPEITOS = re.compile("[\u0180-\u024f\ue000-\uf8ff\ufffd]")
+
+# --- Extratores ---
+
+def _extrair_txt(dados: bytes) -> str:
+    # str() decodifica direto do buffer (bytes ou memoryview), sem copiá-lo antes
+    try:
+        return str(dados, 'utf-8-sig')
+    except UnicodeDecodeError:
+        return str(dados, 'latin-1')
+
+def _extrair_pdf(dados: bytes):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.debug("pypdf não instalado; o PDF será enviado como mídia.")
+        return None
+    leitor = PdfReader(io.BytesIO(dados))
+    return "\n\n".join(pagina.extract_text() or "" for pagina in leitor.pages)
+
+def _extrair_docx(dados: bytes) -> str:
+    # O .docx é um zip; o texto fica nos parágrafos (w:p) de word/document.xml
+    with zipfile.ZipFile(io.BytesIO(dados)) as pacote:
+        raiz = ElementTree.fromstring(pacote.read('word/document.xml'))
+    paragrafos = (
+        "".join(no.text or "" for no in paragrafo.iter(f'{_NS_WORD}t'))
+        for paragrafo in raiz.iter(f'{_NS_WORD}p')
+    )
+    return "\n".join(paragrafos)
+
+EXTRATORES = {
+    'text/plain': _extrair_txt,
+    'application/pdf': _extrair_pdf,
+    MIME_DOCX: _extrair_docx,
+}
+
+def extrair_texto(dados: bytes, mime_type: str):
+    """
+    Extrai localmente o texto de arquivos txt, pdf e docx, normalizado (NFKC)
+    e com os glifos substitutos de ligaduras conhecidos trocados pelas letras.
+    Retorna None quando o formato não é suportado, a extração falha ou restam
+    glifos sem mapeamento.
+    """
+    extrator = EXTRATORES.get(mime_type)
+    if extrator is None:
+        return None
+    try:
+        texto = extrator(dados)
+    except Exception as e:
+        logger.warning("Falha ao extrair texto (%s): %s", mime_type, e)
+        return None
+    if texto is None:
+        return None
+    texto = unicodedata.normalize("NFKC", texto).translate(_GLIFOS_SUBSTITUTOS)
+    suspeitos = _RE_GLIFOS_SUSPEITOS.findall(texto)
+    if suspeitos:
+        logger.warning("Texto extraído com glifos sem mapeamento (%s): %s; o arquivo original será enviado.",
+                       mime_type, "".join(sorted(set(suspeitos))))
+        return None
+    texto = _RE_ESPACOS.sub(" ", texto)
+    return _RE_LINHAS_VAZIAS.sub("\n\n", texto).strip()
+
+def preparar_media(dados: bytes, mime_type: str, extrair: bool = EXTRACAO_TEXTO_ATIVA):
+    """
+    Prepara a mídia a ser enviada ao modelo. Quando há texto suficiente, envia
+    apenas o texto extraído; caso contrário (ex.: imagens e PDFs digitalizados),
+    envia o arquivo original. Retorna (media, bytes_economizados).
+    """
+    if extrair:
+        texto = extrair_texto(dados, mime_type)
+        if texto and len(texto) >= MIN_CARACTERES_TEXTO:
+            compacto = texto.encode('utf-8')
+            economia = len(dados) - len(compacto)
+            logger.info("Texto extraído localmente (%s): %d -> %d bytes (%d economizados)",
+                        mime_type, len(dados), len(compacto), economia)
+            return {"mime_type": "text/plain", "data": compacto}, economia
+    return {"mime_type": mime_type, "data": dados}, 0
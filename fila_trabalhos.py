@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from mimetypes import guess_type
+
+from correcao import parse_correcao
+from trabalhos import ESTADOS_FINAIS, FilaCheia
+
+# --- Configuração da Fila ---
+FILA_PATH = os.getenv('CORRETOR_FILA_PATH', 'fila_correcoes.sqlite3')
+# Com CORRETOR_FILA=1, as interfaces só enfileiram; a correção fica com trabalhador.py
+FILA_ATIVA = os.getenv('CORRETOR_FILA', '0') == '1'
+MAX_PENDENTES = int(os.getenv('CORRETOR_FILA_MAX', '1000'))
+# Trabalho em processamento há mais que isso é considerado abandonado (processo morto)
+TEMPO_MAXIMO_PROCESSAMENTO = int(os.getenv('CORRETOR_FILA_TIMEOUT', '600'))
+MAX_TENTATIVAS_TRABALHO = 3
+# Quanto as interfaces esperam por um trabalho antes de desistir (o trabalho continua na fila)
+TEMPO_MAXIMO_ESPERA = float(os.getenv('CORRETOR_FILA_ESPERA', '300'))
+# Trabalhos finalizados (com a correção) são apagados da fila depois disso; padrão: 7 dias
+RETENCAO_FINALIZADOS = float(os.getenv('CORRETOR_FILA_RETENCAO', str(7 * 24 * 3600)))
+
+_COLUNAS = ("id, estado, tema, nome_arquivo, aluno, turma, resultado, tentativas, trabalhador, "
+            "id_historico, criado_em, iniciado_em, concluido_em")
+
+def _para_dict(linha) -> dict:
+    trabalho = dict(zip([nome.strip() for nome in _COLUNAS.split(",")], linha))
+    if trabalho['estado'] in ESTADOS_FINAIS:
+        correcao = parse_correcao(trabalho['resultado'])
+        trabalho.update(nota=correcao.nota_final, notas=correcao.notas, reaproveitada=correcao.reaproveitada)
+    return trabalho
+
+# --- Fila Persistente ---
+
+class FilaTrabalhos:
+    """
+    Fila de correções em SQLite compartilhada entre processos: as interfaces
+    enfileiram e consultam, os processos de trabalhador.py reservam e concluem.
+    A reserva usa uma transação IMMEDIATE, então dois processos nunca pegam o
+    mesmo trabalho; o modo WAL deixa as leituras correrem junto com as escritas.
+    """
+
+    def __init__(self, caminho: str = FILA_PATH, max_pendentes: int = MAX_PENDENTES):
+        self.caminho = caminho
+        self.max_pendentes = max_pendentes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS trabalhos (
+                id TEXT PRIMARY KEY,
+                estado TEXT NOT NULL,
+                tema TEXT NOT NULL,
+                nome_arquivo TEXT NOT NULL,
+                mime_type TEXT,
+                dados BLOB,
+                aluno TEXT,
+                turma TEXT,
+                resultado TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                trabalhador TEXT,
+                id_historico INTEGER,
+                criado_em REAL NOT NULL,
+                iniciado_em REAL,
+                concluido_em REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_trabalhos_estado ON trabalhos (estado, criado_em);
+        """)
+        self._migrar()
+
+    def _migrar(self):
+        """Atualiza filas criadas por versões anteriores (coluna `mime_type`)."""
+        colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(trabalhos)")}
+        if 'mime_type' not in colunas:
+            self._conn.execute("ALTER TABLE trabalhos ADD COLUMN mime_type TEXT")
+
+    def enfileirar(self, dados, nome_arquivo: str, tema: str, aluno: str = None, turma: str = None,
+                   mime_type: str = None) -> str:
+        """
+        Adiciona uma correção à fila e retorna o id. Levanta FilaCheia acima de
+        `max_pendentes`. Sem `mime_type`, o tipo vem da extensão do arquivo.
+        """
+        id_trabalho = uuid.uuid4().hex
+        with self._lock:
+            pendentes = self._conn.execute(
+                "SELECT COUNT(*) FROM trabalhos WHERE estado = 'na_fila'").fetchone()[0]
+            if pendentes >= self.max_pendentes:
+                raise FilaCheia()
+            self._conn.execute(
+                "INSERT INTO trabalhos (id, estado, tema, nome_arquivo, mime_type, dados, aluno, turma, criado_em) "
+                "VALUES (?, 'na_fila', ?, ?, ?, ?, ?, ?, ?)",
+                (id_trabalho, tema, nome_arquivo, mime_type or guess_type(nome_arquivo)[0], bytes(dados),
+                 aluno, turma, time.time()),
+            )
+        return id_trabalho
+
+    def obter(self, id_trabalho: str):
+        """Estado atual do trabalho (e resultado, quando finalizado), ou None."""
+        with self._lock:
+            linha = self._conn.execute(
+                f"SELECT {_COLUNAS} FROM trabalhos WHERE id = ?", (id_trabalho,)).fetchone()
+        return _para_dict(linha) if linha else None
+
+    def aguardar(self, id_trabalho: str, intervalo: float = 0.5, tempo_maximo: float = None):
+        """Consulta o trabalho até que ele seja finalizado (ou o tempo acabe) e o retorna."""
+        limite = time.monotonic() + tempo_maximo if tempo_maximo else None
+        while True:
+            trabalho = self.obter(id_trabalho)
+            if trabalho is None or trabalho['estado'] in ESTADOS_FINAIS:
+                return trabalho
+            if limite and time.monotonic() >= limite:
+                return trabalho
+            time.sleep(intervalo)
+
+    def reservar(self, trabalhador: str):
+        """Marca o trabalho mais antigo da fila como em processamento e o retorna (com os dados)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._conn.execute(
+                    "SELECT id, tema, nome_arquivo, mime_type, dados, aluno, turma FROM trabalhos "
+                    "WHERE estado = 'na_fila' ORDER BY criado_em LIMIT 1").fetchone()
+                if linha is not None:
+                    self._conn.execute(
+                        "UPDATE trabalhos SET estado = 'processando', trabalhador = ?, iniciado_em = ?, "
+                        "tentativas = tentativas + 1 WHERE id = ?",
+                        (trabalhador, time.time(), linha[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if linha is None:
+            return None
+        return dict(zip(('id', 'tema', 'nome_arquivo', 'mime_type', 'dados', 'aluno', 'turma'), linha))
+
+    def concluir(self, id_trabalho: str, resultado: str, estado: str = 'concluido', id_historico: int = None):
+        """Registra o resultado e descarta o arquivo, que não é mais necessário."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE trabalhos SET estado = ?, resultado = ?, id_historico = ?, concluido_em = ?, dados = NULL "
+                "WHERE id = ?",
+                (estado, resultado, id_historico, time.time(), id_trabalho),
+            )
+
+    def recuperar_abandonados(self, tempo_maximo: float = TEMPO_MAXIMO_PROCESSAMENTO,
+                              max_tentativas: int = MAX_TENTATIVAS_TRABALHO) -> int:
+        """
+        Devolve à fila os trabalhos presos em processamento (ex.: trabalhador
+        encerrado no meio da correção); após `max_tentativas`, marca como erro.
+        """
+        limite = time.time() - tempo_maximo
+        with self._lock:
+            self._conn.execute(
+                "UPDATE trabalhos SET estado = 'erro', resultado = ?, concluido_em = ?, dados = NULL "
+                "WHERE estado = 'processando' AND iniciado_em < ? AND tentativas >= ?",
+                ("Erro: a correção foi interrompida repetidas vezes.", time.time(), limite, max_tentativas),
+            )
+            cursor = self._conn.execute(
+                "UPDATE trabalhos SET estado = 'na_fila', trabalhador = NULL "
+                "WHERE estado = 'processando' AND iniciado_em < ?",
+                (limite,),
+            )
+        return cursor.rowcount
+
+    def estatisticas(self) -> dict:
+        """Quantidade de trabalhos em cada estado."""
+        with self._lock:
+            linhas = self._conn.execute("SELECT estado, COUNT(*) FROM trabalhos GROUP BY estado").fetchall()
+        return {estado: 0 for estado in ('na_fila', 'processando') + ESTADOS_FINAIS} | dict(linhas)
+
+    def remover_finalizados(self, idade: float) -> int:
+        """Apaga os trabalhos finalizados há mais de `idade` segundos."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM trabalhos WHERE estado IN (?, ?) AND concluido_em < ?",
+                (*ESTADOS_FINAIS, time.time() - idade),
+            )
+        return cursor.rowcount
+
+_fila = None
+_fila_lock = threading.Lock()
+
+def obter_fila() -> FilaTrabalhos:
+    """Retorna a fila compartilhada do processo."""
+    global _fila
+    with _fila_lock:
+        if _fila is None:
+            _fila = FilaTrabalhos()
+        return _fila
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+
+# --- Configuração do Histórico ---
+HISTORICO_PATH = os.getenv('CORRETOR_HISTORICO_PATH', 'historico_correcoes.sqlite3')
+
+_COLUNAS = "id, aluno, tema, resultado, nota, c1, c2, c3, c4, c5, criado_em"
+
+def _para_dict(linha) -> dict:
+    return {
+        'id': linha[0],
+        'aluno': linha[1],
+        'tema': linha[2],
+        'resultado': linha[3],
+        'score': linha[4],
+        'notas': list(linha[5:10]),
+        'criado_em': linha[10],
+    }
+
+# --- Repositório ---
+
+class RepositorioHistorico:
+    """
+    Histórico persistente de correções em SQLite. As consultas de top-N,
+    médias por tema e paginação usam índices em vez de ordenar listas em Python.
+    """
+
+    def __init__(self, caminho: str = HISTORICO_PATH):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS correcoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                aluno TEXT NOT NULL,
+                tema TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                nota INTEGER,
+                c1 INTEGER, c2 INTEGER, c3 INTEGER, c4 INTEGER, c5 INTEGER,
+                criado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_correcoes_aluno_nota ON correcoes (aluno, nota DESC);
+            CREATE INDEX IF NOT EXISTS idx_correcoes_aluno_tema ON correcoes (aluno, tema, nota);
+            CREATE INDEX IF NOT EXISTS idx_correcoes_aluno_id ON correcoes (aluno, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_correcoes_tema_nota ON correcoes (tema, nota);
+            CREATE INDEX IF NOT EXISTS idx_correcoes_nota ON correcoes (nota DESC);
+        """)
+        self._migrar()
+        self._conn.commit()
+
+    def _migrar(self):
+        """Atualiza bancos criados por versões anteriores (coluna `turma`)."""
+        colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(correcoes)")}
+        if 'turma' not in colunas:
+            self._conn.execute("ALTER TABLE correcoes ADD COLUMN turma TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_correcoes_turma_id ON correcoes (turma, id)")
+
+    def _consultar(self, sql: str, parametros=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, parametros).fetchall()
+
+    def adicionar(self, aluno: str, tema: str, resultado: str, correcao=None, turma: str = None) -> int:
+        """Registra uma correção (com as notas extraídas de `correcao`, se houver)."""
+        nota = correcao.nota_final if correcao is not None else None
+        notas = correcao.notas if correcao is not None else [None] * 5
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO correcoes (aluno, tema, resultado, nota, c1, c2, c3, c4, c5, criado_em, turma) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (aluno, tema, resultado, nota, *notas, time.time(), turma),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def top_n(self, aluno: str = None, n: int = 5) -> list:
+        """As `n` correções com maior nota (do aluno, ou de todos)."""
+        if aluno is None:
+            linhas = self._consultar(
+                f"SELECT {_COLUNAS} FROM correcoes WHERE nota IS NOT NULL ORDER BY nota DESC LIMIT ?", (n,))
+        else:
+            linhas = self._consultar(
+                f"SELECT {_COLUNAS} FROM correcoes WHERE aluno = ? AND nota IS NOT NULL "
+                "ORDER BY nota DESC LIMIT ?", (aluno, n))
+        return [_para_dict(linha) for linha in linhas]
+
+    def medias_por_tema(self, aluno: str = None) -> list:
+        """Média e quantidade de correções com nota, agrupadas por tema."""
+        filtro, parametros = ("WHERE aluno = ? AND nota IS NOT NULL", (aluno,)) if aluno is not None \
+            else ("WHERE nota IS NOT NULL", ())
+        linhas = self._consultar(
+            f"SELECT tema, AVG(nota), COUNT(*) FROM correcoes {filtro} GROUP BY tema ORDER BY tema", parametros)
+        return [{'tema': tema, 'media': media, 'quantidade': quantidade} for tema, media, quantidade in linhas]
+
+    def somas_competencias(self, aluno: str = None) -> list:
+        """Soma e quantidade de notas de cada uma das 5 competências."""
+        colunas = ", ".join(f"SUM(c{i}), COUNT(c{i})" for i in range(1, 6))
+        if aluno is None:
+            linha = self._consultar(f"SELECT {colunas} FROM correcoes")[0]
+        else:
+            linha = self._consultar(f"SELECT {colunas} FROM correcoes WHERE aluno = ?", (aluno,))[0]
+        return [(linha[i], linha[i + 1]) for i in range(0, 10, 2)]
+
+    def pagina(self, aluno: str = None, pagina: int = 0, tamanho: int = 20) -> list:
+        """Correções mais recentes primeiro, uma página por vez."""
+        if aluno is None:
+            linhas = self._consultar(
+                f"SELECT {_COLUNAS} FROM correcoes ORDER BY id DESC LIMIT ? OFFSET ?",
+                (tamanho, pagina * tamanho))
+        else:
+            linhas = self._consultar(
+                f"SELECT {_COLUNAS} FROM correcoes WHERE aluno = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (aluno, tamanho, pagina * tamanho))
+        return [_para_dict(linha) for linha in linhas]
+
+    def contar(self, aluno: str = None) -> int:
+        """Quantidade de correções registradas (do aluno, ou de todos)."""
+        if aluno is None:
+            return self._consultar("SELECT COUNT(*) FROM correcoes")[0][0]
+        return self._consultar("SELECT COUNT(*) FROM correcoes WHERE aluno = ?", (aluno,))[0][0]
+
+    def turmas(self) -> list:
+        """Turmas com ao menos uma correção registrada."""
+        return [linha[0] for linha in self._consultar(
+            "SELECT DISTINCT turma FROM correcoes WHERE turma IS NOT NULL ORDER BY turma")]
+
+    def versao(self, turma: str = None) -> tuple:
+        """
+        Identifica o estado das correções (da turma, ou de todas): muda a cada
+        correção nova, servindo para invalidar estatísticas em cache.
+        """
+        if turma is None:
+            return tuple(self._consultar("SELECT COUNT(*), MAX(id) FROM correcoes")[0])
+        return tuple(self._consultar("SELECT COUNT(*), MAX(id) FROM correcoes WHERE turma = ?", (turma,))[0])
+
+    def notas_em_colunas(self, turma: str = None) -> dict:
+        """
+        Notas das correções (da turma, ou de todas) em colunas, sem o texto da
+        correção, prontas para montar um DataFrame.
+        """
+        nomes = ['id', 'aluno', 'tema', 'nota', 'c1', 'c2', 'c3', 'c4', 'c5', 'criado_em']
+        sql = f"SELECT {', '.join(nomes)} FROM correcoes"
+        linhas = self._consultar(sql + " WHERE turma = ? ORDER BY id", (turma,)) if turma is not None \
+            else self._consultar(sql + " ORDER BY id")
+        return dict(zip(nomes, map(list, zip(*linhas)))) if linhas else {nome: [] for nome in nomes}
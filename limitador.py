@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+
+# --- Configuração do Limitador ---
+# Padrões compatíveis com a cota gratuita do gemini-1.5-flash
+REQUISICOES_POR_MINUTO = int(os.getenv('CORRETOR_RPM', '15'))
+TOKENS_POR_MINUTO = int(os.getenv('CORRETOR_TPM', '1000000'))
+MAX_TENTATIVAS = int(os.getenv('CORRETOR_MAX_TENTATIVAS', '5'))
+
+# Estimativa de tokens para mídias não textuais (PDF, imagem) antes da resposta
+TOKENS_MIDIA_ESTIMADOS = 1500
+
+# Erros transitórios do SDK (google.api_core.exceptions) e códigos HTTP retentáveis
+ERROS_RETENTAVEIS = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'InternalServerError',
+    'DeadlineExceeded', 'GatewayTimeout', 'BadGateway', 'Aborted',
+}
+CODIGOS_RETENTAVEIS = {408, 429, 500, 502, 503, 504}
+
+# --- Relógios ---
+
+class RelogioSistema:
+    """Relógio real, baseado em time.monotonic."""
+
+    def agora(self) -> float:
+        return time.monotonic()
+
+    def dormir(self, segundos: float):
+        time.sleep(segundos)
+
+class RelogioFalso:
+    """
+    Relógio controlado manualmente, para verificar o limitador e as
+    retentativas sem esperar de verdade e sem acesso à rede.
+    """
+
+    def __init__(self, inicio: float = 0.0):
+        self.tempo = inicio
+        self.esperas = []
+
+    def agora(self) -> float:
+        return self.tempo
+
+    def dormir(self, segundos: float):
+        self.esperas.append(segundos)
+        self.tempo += segundos
+
+    def avancar(self, segundos: float):
+        self.tempo += segundos
+
+# --- Limitador de Taxa ---
+
+class BaldeTokens:
+    """Balde de tokens com capacidade fixa e reabastecimento contínuo."""
+
+    def __init__(self, capacidade: float, taxa_por_segundo: float, relogio):
+        self.capacidade = capacidade
+        self.taxa = taxa_por_segundo
+        self.disponivel = capacidade
+        self._relogio = relogio
+        self._ultimo = relogio.agora()
+
+    def _reabastecer(self):
+        agora = self._relogio.agora()
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def espera(self, quantidade: float) -> float:
+        """Segundos até que `quantidade` esteja disponível (0 se já estiver)."""
+        self._reabastecer()
+        falta = min(quantidade, self.capacidade) - self.disponivel
+        return max(0.0, falta / self.taxa)
+
+    def consumir(self, quantidade: float):
+        self._reabastecer()
+        self.disponivel -= min(quantidade, self.capacidade)
+
+    def devolver(self, quantidade: float):
+        self.disponivel = min(self.capacidade, self.disponivel + quantidade)
+
+class LimitadorTaxa:
+    """
+    Limitador compartilhado por requisições/minuto e tokens/minuto.
+    Seguro para uso entre threads (Streamlit, lote, serviço).
+    """
+
+    def __init__(self, requisicoes_por_minuto: int = REQUISICOES_POR_MINUTO,
+                 tokens_por_minuto: int = TOKENS_POR_MINUTO, relogio=None):
+        self._relogio = relogio or RelogioSistema()
+        self._lock = threading.Lock()
+        self._requisicoes = BaldeTokens(requisicoes_por_minuto, requisicoes_por_minuto / 60, self._relogio)
+        self._tokens = BaldeTokens(tokens_por_minuto, tokens_por_minuto / 60, self._relogio)
+
+    def adquirir(self, tokens: int = 1) -> float:
+        """
+        Bloqueia até haver cota para uma requisição com `tokens` estimados.
+        Retorna o tempo total esperado, em segundos.
+        """
+        esperado = 0.0
+        while True:
+            with self._lock:
+                espera = max(self._requisicoes.espera(1), self._tokens.espera(tokens))
+                if espera <= 0:
+                    self._requisicoes.consumir(1)
+                    self._tokens.consumir(tokens)
+                    return esperado
+            self._relogio.dormir(espera)
+            esperado += espera
+
+    def ajustar_tokens(self, estimados: int, reais: int):
+        """Corrige o balde de tokens com o consumo real informado pela resposta."""
+        with self._lock:
+            if reais > estimados:
+                self._tokens.consumir(reais - estimados)
+            else:
+                self._tokens.devolver(estimados - reais)
+
+def estimar_tokens(partes: list) -> int:
+    """Estimativa grosseira (~4 caracteres por token) dos tokens de entrada."""
+    total = 0
+    for parte in partes:
+        if isinstance(parte, str):
+            total += len(parte) // 4
+        elif isinstance(parte, dict) and parte.get('mime_type', '').startswith('text/'):
+            total += len(parte['data']) // 4
+        else:
+            total += TOKENS_MIDIA_ESTIMADOS
+    return max(total, 1)
+
+# --- Retentativas ---
+
+def eh_erro_retentavel(erro: Exception) -> bool:
+    """Distingue erros transitórios (cota, 5xx, timeout) de erros fatais."""
+    if isinstance(erro, (ConnectionError, TimeoutError)):
+        return True
+    if type(erro).__name__ in ERROS_RETENTAVEIS:
+        return True
+    codigo = getattr(erro, 'code', None)
+    return isinstance(codigo, int) and codigo in CODIGOS_RETENTAVEIS
+
+def executar_com_retentativas(funcao, max_tentativas: int = MAX_TENTATIVAS, base: float = 1.0,
+                              maximo: float = 60.0, relogio=None, aleatorio=random.random,
+                              ao_retentar=None):
+    """
+    Executa `funcao()` com retentativas em backoff exponencial com jitter total.
+    Erros fatais são propagados imediatamente; os retentáveis, após esgotar as tentativas.
+    `ao_retentar(tentativa, erro, espera)` é chamado antes de cada nova tentativa.
+    """
+    relogio = relogio or RelogioSistema()
+    for tentativa in range(max_tentativas):
+        try:
+            return funcao()
+        except Exception as erro:
+            if not eh_erro_retentavel(erro) or tentativa == max_tentativas - 1:
+                raise
+            espera = aleatorio() * min(maximo, base * 2 ** tentativa)
+            if ao_retentar:
+                ao_retentar(tentativa + 1, erro, espera)
+            relogio.dormir(espera)
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+def obter_limitador() -> LimitadorTaxa:
+    """Retorna o limitador compartilhado do processo."""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            _limitador = LimitadorTaxa()
+        return _limitador
+
+def definir_limitador(limitador: LimitadorTaxa):
+    """Substitui o limitador do processo (ex.: cotas maiores em benchmarks)."""
+    global _limitador
+    with _limitador_lock:
+        _limitador = limitador
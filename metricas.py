@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração das Métricas ---
+# Lista separada por vírgulas: "log", "memoria" e/ou "prometheus:<caminho>"
+METRICAS_SINKS = os.getenv('CORRETOR_METRICAS', '')
+
+# --- Métricas de uma Correção ---
+
+@dataclass
+class MetricasCorrecao:
+    """Métricas estruturadas de uma chamada de correção."""
+    modelo: str = None
+    mime_type: str = None
+    bytes_arquivo: int = 0
+    bytes_enviados: int = 0
+    tokens_prompt: int = None
+    tokens_resposta: int = None
+    tokens_total: int = None
+    tokens_cache: int = None  # tokens do prompt servidos pelo cache de contexto
+    cache_hit: bool = False
+    similaridade_duplicata: float = None  # resultado reaproveitado de uma quase-duplicata
+    retentativas: int = 0
+    amostras: int = 1  # chamadas ao modelo (correção em conjunto)
+    agrupadas: int = 1  # redações corrigidas na mesma chamada (agrupamento de textos)
+    sucesso: bool = False
+    erro: str = None
+    tempos: dict = field(default_factory=dict)  # etapa -> segundos
+    criado_em: float = field(default_factory=time.time)
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """Cronometra uma etapa (acumulando, se ela se repetir)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + time.perf_counter() - inicio
+
+    def registrar_uso(self, response):
+        """Soma a contagem de tokens de `usage_metadata` da resposta do modelo."""
+        uso = getattr(response, 'usage_metadata', None)
+        if uso is None:
+            return
+        for campo, atributo in (('tokens_prompt', 'prompt_token_count'),
+                                ('tokens_resposta', 'candidates_token_count'),
+                                ('tokens_total', 'total_token_count'),
+                                ('tokens_cache', 'cached_content_token_count')):
+            valor = getattr(uso, atributo, None)
+            if valor is not None:
+                setattr(self, campo, (getattr(self, campo) or 0) + valor)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+# --- Sinks ---
+
+class SinkLog:
+    """Escreve cada correção como uma linha JSON no log."""
+
+    def __init__(self, nome_logger: str = 'corretor.metricas'):
+        self._logger = logging.getLogger(nome_logger)
+
+    def registrar(self, metricas: MetricasCorrecao):
+        self._logger.info(json.dumps(metricas.to_dict(), ensure_ascii=False))
+
+class SinkMemoria:
+    """Guarda as últimas correções em memória (testes e painel de depuração)."""
+
+    def __init__(self, maximo: int = 1000):
+        self.registros = deque(maxlen=maximo)
+
+    def registrar(self, metricas: MetricasCorrecao):
+        self.registros.append(metricas)
+
+    def ultimas(self, n: int = 10) -> list:
+        return list(self.registros)[-n:]
+
+class SinkPrometheus:
+    """
+    Acumula contadores e reescreve um arquivo no formato de exposição de texto
+    do Prometheus (para o textfile collector do node_exporter).
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._correcoes = defaultdict(int)  # (cache, status) -> total
+        self._contadores = defaultdict(float)
+        self._etapas = defaultdict(lambda: [0.0, 0])  # etapa -> [soma, quantidade]
+
+    def registrar(self, metricas: MetricasCorrecao):
+        with self._lock:
+            cache = 'hit' if metricas.cache_hit else 'duplicata' if metricas.similaridade_duplicata else 'miss'
+            self._correcoes[(cache, 'ok' if metricas.sucesso else 'erro')] += 1
+            self._contadores['bytes_enviados'] += metricas.bytes_enviados
+            self._contadores['bytes_arquivo'] += metricas.bytes_arquivo
+            self._contadores['tokens_prompt'] += metricas.tokens_prompt or 0
+            self._contadores['tokens_resposta'] += metricas.tokens_resposta or 0
+            self._contadores['tokens_cache'] += metricas.tokens_cache or 0
+            self._contadores['retentativas'] += metricas.retentativas
+            for etapa, segundos in metricas.tempos.items():
+                self._etapas[etapa][0] += segundos
+                self._etapas[etapa][1] += 1
+            self._escrever()
+
+    def _escrever(self):
+        linhas = ["# TYPE corretor_correcoes_total counter"]
+        linhas += [f'corretor_correcoes_total{{cache="{cache}",status="{status}"}} {total}'
+                   for (cache, status), total in sorted(self._correcoes.items())]
+        linhas += ["# TYPE corretor_bytes_total counter",
+                   f'corretor_bytes_total{{tipo="arquivo"}} {self._contadores["bytes_arquivo"]:.0f}',
+                   f'corretor_bytes_total{{tipo="enviado"}} {self._contadores["bytes_enviados"]:.0f}',
+                   "# TYPE corretor_tokens_total counter",
+                   f'corretor_tokens_total{{tipo="prompt"}} {self._contadores["tokens_prompt"]:.0f}',
+                   f'corretor_tokens_total{{tipo="resposta"}} {self._contadores["tokens_resposta"]:.0f}',
+                   f'corretor_tokens_total{{tipo="cache"}} {self._contadores["tokens_cache"]:.0f}',
+                   "# TYPE corretor_retentativas_total counter",
+                   f'corretor_retentativas_total {self._contadores["retentativas"]:.0f}',
+                   "# TYPE corretor_etapa_segundos summary"]
+        for etapa, (soma, quantidade) in sorted(self._etapas.items()):
+            linhas.append(f'corretor_etapa_segundos_sum{{etapa="{etapa}"}} {soma:.6f}')
+            linhas.append(f'corretor_etapa_segundos_count{{etapa="{etapa}"}} {quantidade}')
+        # Escrita atômica: o coletor nunca lê um arquivo pela metade
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write("\n".join(linhas) + "\n")
+        os.replace(temporario, self.caminho)
+
+# --- Registro de Sinks ---
+
+_sinks = []
+_sinks_lock = threading.Lock()
+
+def registrar_sink(sink):
+    """Adiciona um sink que receberá as métricas de todas as correções."""
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+def remover_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+def emitir(metricas: MetricasCorrecao):
+    """Envia as métricas para todos os sinks; falhas em um sink não afetam a correção."""
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink.registrar(metricas)
+        except Exception as e:
+            logger.warning("Falha ao registrar métricas em %s: %s", type(sink).__name__, e)
+
+def _configurar_sinks(especificacao: str):
+    for item in filter(None, (parte.strip() for parte in especificacao.split(","))):
+        if item == 'log':
+            registrar_sink(SinkLog())
+        elif item == 'memoria':
+            registrar_sink(SinkMemoria())
+        elif item.startswith('prometheus:'):
+            registrar_sink(SinkPrometheus(item.split(":", 1)[1]))
+        else:
+            logger.warning("Sink de métricas desconhecido: %s", item)
+
+_configurar_sinks(METRICAS_SINKS)
@@ -1,122 +1,21 @@
-
 import streamlit as st
-import os
-import google.generativeai as genai
-from mimetypes import guess_type
-from dotenv import load_dotenv
 import pandas as pd
-import re
 import altair as alt
-import tempfile
-
-# Carrega variáveis de ambiente do arquivo .env
-load_dotenv()
+from agent_corretor import corrigir_bytes_stream, corrigir_completa, obter_backend, tipo_mime
+from correcao import parse_correcao
+from historico import RepositorioHistorico
+from agregados import AgregadoCorrecoes
+from analise_turma import COMPETENCIAS, AnaliseTurmas
+from fila_trabalhos import FILA_ATIVA, TEMPO_MAXIMO_ESPERA, obter_fila
+from trabalhos import FilaCheia
+from metricas import SinkMemoria, registrar_sink
+from cache_correcao import CACHE_ATIVO, obter_cache
 
 # --- Configuração do Agente ---
-API_KEY = os.getenv('GEMINI_API_KEY')
-MODEL_NAME = "gemini-1.5-flash"
-
-# Configura a API do Google
-if API_KEY:
-    genai.configure(api_key=API_KEY)
-else:
+# A correção (e o cache de correções) fica a cargo de agent_corretor
+if obter_backend().erro_configuracao():
     st.error("Erro: Chave de API da Gemini não encontrada.")
 
-# --- Funções do Agente Corretor ---
-
-def get_info_enem():
-    """
-    Retorna um dicionário com os critérios, pontuação e instruções para o ENEM.
-    """
-    return {
-        'criterios': """
-- **Competência 1**: Domínio da modalidade escrita formal da língua portuguesa.
-- **Competência 2**: Compreensão da proposta de redação e aplicação de conceitos para desenvolver o tema.
-- **Competência 3**: Seleção, organização e interpretação de informações, fatos e argumentos.
-- **Competência 4**: Conhecimento dos mecanismos linguísticos para a argumentação.
-- **Competência 5**: Elaboração de proposta de intervenção para o problema, respeitando os direitos humanos.
-""",
-        'pontuacao': "A pontuação total da redação do ENEM é de 0 a 1000 pontos.",
-        'instrucao_pontuacao': "Forneça uma pontuação para cada competência (0 a 200) e uma pontuação total."
-    }
-
-def executar_correcao_enem(file_path: str, tema: str) -> str:
-    """
-    Função principal do Agente Corretor.
-    Recebe o caminho do arquivo da redação e o tema, e retorna a correção bruta.
-    """
-    if not API_KEY:
-        return "Erro: A chave da API não foi configurada."
-
-    try:
-        info_enem = get_info_enem()
-        corpo_prompt = """
-Você é um Agente de IA especialista em correção de redações do ENEM. Sua única função é avaliar uma redação com base nas 5 competências oficiais. Seja rigoroso, técnico e siga o formato de saída à risca.
-
-**Tema da redação:** "{tema}"
-
-**Critérios de Avaliação (ENEM):**
-{criterios}
-
-**Pontuação:**
-{pontuacao}
-{instrucao_pontuacao}
-
-**Formato de Saída Obrigatório:**
-Siga estritamente este formato. Não inclua saudações, despedidas, dicas, sugestões ou qualquer texto fora da estrutura definida abaixo.
-
-Nota da Redação: [Pontuação total de 0 a 1000]
-
-Competência 1
-Domínio da modalidade escrita formal da língua portuguesa.
-**Sua nota nessa competência foi: [nota de 0 a 200]**
-[Análise técnica detalhada e objetiva da competência 1, justificando a nota com exemplos do texto, se necessário.]
-
-Competência 2
-Compreender a proposta de redação e aplicar conceitos das várias áreas de conhecimento para desenvolver o tema.
-**Sua nota nessa competência foi: [nota de 0 a 200]**
-[Análise técnica detalhada e objetiva da competência 2, justificando a nota.]
-
-Competência 3
-Selecionar, relacionar, organizar e interpretar informações, fatos, opiniões e argumentos em defesa de um ponto de vista.
-**Sua nota nessa competência foi: [nota de 0 a 200]**
-[Análise técnica detalhada e objetiva da competência 3, justificando a nota.]
-
-Competência 4
-Demonstrar conhecimento dos mecanismos linguísticos necessários para a construção da argumentação.
-**Sua nota nessa competência foi: [nota de 0 a 200]**
-[Análise técnica detalhada e objetiva da competência 4, justificando a nota.]
-
-Competência 5
-Elaborar proposta de intervenção para o problema abordado, respeitando os direitos humanos.
-**Sua nota nessa competência foi: [nota de 0 a 200]**
-[Análise técnica detalhada e objetiva da competência 5, justificando a nota.]
-""".format(tema=tema, **info_enem)
-
-        mime_type, _ = guess_type(file_path)
-        if not mime_type:
-            return f"Erro: Não foi possível determinar o tipo do arquivo: {file_path}"
-
-        with open(file_path, "rb") as f:
-            media = {"mime_type": mime_type, "data": f.read()}
-
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content([corpo_prompt, media])
-        
-        return response.text.strip()
-
-    except FileNotFoundError:
-        return f"Erro: O arquivo não foi encontrado no caminho: {file_path}"
-    except Exception as e:
-        return f"Erro inesperado ao executar a correção: {e}"
-
-def extract_score(text):
-    """Extrai a pontuação da correção."""
-    match = re.search(r"Nota da Redação: (\d+)", text)
-    if match:
-        return int(match.group(1))
-    return None
-
 # --- Funções de Interface ---
 
 def setup_theme():
@@ -179,31 +78,52 @@ def setup_theme():
         unsafe_allow_html=True
     )
 
-def display_history(history):
-    """Exibe o histórico de correções."""
-    if not history:
+def display_history(historico, aluno, tamanho_pagina=20):
+    """Exibe o histórico de correções do aluno, paginado."""
+    total = historico.contar(aluno)
+    if not total:
         st.info("Nenhuma correção foi realizada ainda.")
         return
 
     st.subheader("Histórico de Correções")
-    for i, item in enumerate(history):
+    paginas = (total + tamanho_pagina - 1) // tamanho_pagina
+    pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1) - 1 if paginas > 1 else 0
+    for i, item in enumerate(historico.pagina(aluno, pagina, tamanho_pagina)):
+        numero = total - pagina * tamanho_pagina - i
         score_text = f" - Pontuação: {item['score']}" if item['score'] is not None else ""
-        with st.expander(f"Correção {i+1} - Tema: {item['tema']}{score_text}"):
+        with st.expander(f"Correção {numero} - Tema: {item['tema']}{score_text}"):
             st.write(item['resultado'])
 
-def display_top5_chart(history):
-    """Exibe o gráfico de Top 5 redações e o salva como HTML."""
-    if not history:
-        st.info("Realize pelo menos uma correção para visualizar o gráfico de Top 5.")
-        return
-
-    # Filtra e ordena as redações com pontuação
-    scored_history = sorted([item for item in history if item['score'] is not None], key=lambda x: x['score'], reverse=True)[:5]
-
-    if not scored_history:
-        st.info("Nenhuma pontuação encontrada no histórico para gerar o gráfico.")
-        return
-        
+def display_theme_averages(agregado):
+    """Exibe a média das notas por tema e por competência."""
+    medias = agregado.medias_por_tema()
+    if medias:
+        st.subheader("Média por Tema")
+        st.dataframe(pd.DataFrame({
+            'Tema': [item['tema'] for item in medias],
+            'Média': [round(item['media']) for item in medias],
+            'Correções': [item['quantidade'] for item in medias],
+        }), hide_index=True)
+
+    medias_competencias = agregado.medias_competencias()
+    if any(media is not None for media in medias_competencias):
+        st.subheader("Média por Competência")
+        for i, (coluna, media) in enumerate(zip(st.columns(5), medias_competencias), start=1):
+            coluna.metric(label=f"Competência {i}", value=f"{media:.0f}" if media is not None else "N/A")
+
+def obter_agregado(historico, aluno):
+    """
+    Retorna o agregado incremental do aluno guardado na sessão, recarregando-o
+    do histórico apenas se outra sessão tiver registrado correções.
+    """
+    agregados = st.session_state.setdefault('agregados', {})
+    agregado = agregados.get(aluno)
+    if agregado is None or agregado.total != historico.contar(aluno):
+        agregado = agregados[aluno] = AgregadoCorrecoes.carregar(historico, aluno)
+    return agregado
+
+def build_top5_chart(scored_history):
+    """Monta o gráfico de barras das redações com maior pontuação."""
     df = pd.DataFrame({
         'Redação': [f"Top {i+1}" for i in range(len(scored_history))],
         'Pontuação': [item['score'] for item in scored_history],
@@ -236,22 +156,148 @@ def display_top5_chart(history):
     ).configure_axis(
         grid=False
     )
+    return final_chart
+
+def display_top5_chart(agregado):
+    """
+    Exibe o gráfico de Top 5 redações e o salva como HTML.
+    O gráfico só é reconstruído e salvo quando o Top 5 muda.
+    """
+    if not agregado.total:
+        st.info("Realize pelo menos uma correção para visualizar o gráfico de Top 5.")
+        return
+
+    scored_history = agregado.top()
+
+    if not scored_history:
+        st.info("Nenhuma pontuação encontrada no histórico para gerar o gráfico.")
+        return
+
+    assinatura = tuple((item.get('id'), item['score']) for item in scored_history)
+    if st.session_state.get('top5_assinatura') == assinatura:
+        st.altair_chart(st.session_state.top5_chart, use_container_width=True)
+        return scored_history
+
+    final_chart = build_top5_chart(scored_history)
     
     chart_path = "top5_chart.html"
     final_chart.save(chart_path)
+    st.session_state.top5_assinatura = assinatura
+    st.session_state.top5_chart = final_chart
     
     st.altair_chart(final_chart, use_container_width=True)
     return scored_history
 
+@st.cache_resource
+def obter_historico():
+    """Repositório de histórico compartilhado entre as sessões do Streamlit."""
+    return RepositorioHistorico()
+
+@st.cache_resource
+def obter_analise():
+    """Estatísticas por turma, em cache até a próxima correção registrada na turma."""
+    return AnaliseTurmas(obter_historico())
+
+def display_class_analytics(analise, historico):
+    """Painel da turma: distribuição das competências, alunos e evolução no tempo."""
+    opcoes = ["Todas"] + historico.turmas()
+    escolha = st.selectbox("Turma:", opcoes)
+    estatisticas = analise.estatisticas(None if escolha == "Todas" else escolha)
+    if estatisticas.total == 0:
+        st.info("Nenhuma correção registrada para esta turma.")
+        return
+    st.metric("Redações corrigidas", estatisticas.total)
+
+    st.subheader("Distribuição por Competência")
+    st.dataframe(estatisticas.distribuicao.round(1), use_container_width=True)
+    histograma = estatisticas.histograma.reset_index().melt('nota', var_name='competencia', value_name='quantidade')
+    grafico = alt.Chart(histograma).mark_bar().encode(
+        x=alt.X('nota:O', title='Nota'),
+        y=alt.Y('quantidade:Q', title='Redações'),
+        color=alt.Color('competencia:N', title='Competência'),
+        xOffset='competencia:N',
+    )
+    st.altair_chart(grafico, use_container_width=True)
+
+    st.subheader("Alunos e Competência Mais Fraca")
+    st.dataframe(estatisticas.alunos.round(1), use_container_width=True)
+    fracas = estatisticas.alunos['mais_fraca'].value_counts().reindex(COMPETENCIAS, fill_value=0)
+    st.bar_chart(fracas)
+
+    st.subheader("Evolução Semanal")
+    st.line_chart(estatisticas.tendencia)
+
+@st.cache_resource
+def obter_sink_metricas():
+    """Guarda em memória as métricas das correções para o painel de depuração."""
+    return registrar_sink(SinkMemoria(maximo=200))
+
+def display_cache_stats():
+    """Acertos do cache de correções: cada acerto é uma chamada ao modelo evitada."""
+    if not CACHE_ATIVO:
+        st.sidebar.caption("Cache de correções desativado (CORRETOR_CACHE=0).")
+        return
+    estatisticas = obter_cache().estatisticas()
+    st.sidebar.subheader("Cache de correções")
+    st.sidebar.metric("Taxa de acerto", f"{estatisticas['taxa_acerto']:.0%}")
+    st.sidebar.caption(f"{estatisticas['hits']} chamadas ao modelo evitadas, {estatisticas['misses']} faltas, "
+                       f"{estatisticas['entradas']} correções guardadas.")
+
+def display_debug_panel(sink):
+    """Painel com as métricas das últimas correções (bytes, tokens, tempos por etapa) e do cache."""
+    display_cache_stats()
+    registros = sink.ultimas(20)
+    if not registros:
+        st.sidebar.info("Nenhuma correção registrada ainda.")
+        return
+    ultima = registros[-1]
+    st.sidebar.subheader("Última correção")
+    st.sidebar.json(ultima.to_dict())
+    tabela = pd.DataFrame([
+        dict({'modelo': m.modelo, 'cache_hit': m.cache_hit, 'sucesso': m.sucesso,
+              'retentativas': m.retentativas, 'bytes_enviados': m.bytes_enviados,
+              'tokens_total': m.tokens_total},
+             **{f"{etapa}_s": round(segundos, 3) for etapa, segundos in m.tempos.items()})
+        for m in reversed(registros)
+    ])
+    st.sidebar.dataframe(tabela, use_container_width=True)
+
+def corrigir_pela_fila(uploaded_file, tema, aluno, turma):
+    """
+    Modo fila (CORRETOR_FILA=1): enfileira a redação para os processos de
+    trabalhador.py e aguarda o resultado; o trabalhador já registra a correção
+    no histórico, que o agregado recarrega ao notar a contagem nova.
+    """
+    try:
+        id_trabalho = obter_fila().enfileirar(uploaded_file.getbuffer(), uploaded_file.name, tema, aluno, turma,
+                                              tipo_mime(uploaded_file.name, uploaded_file.type))
+    except FilaCheia:
+        st.warning("Muitas correções na fila no momento. Tente novamente em instantes.")
+        return
+    with st.spinner("Redação na fila de correção..."):
+        trabalho = obter_fila().aguardar(id_trabalho, tempo_maximo=TEMPO_MAXIMO_ESPERA)
+    if trabalho is None:
+        st.error("A correção não foi encontrada na fila. Envie a redação novamente.")
+    elif trabalho['estado'] == 'concluido':
+        st.markdown(trabalho['resultado'])
+        st.success("Correção finalizada!")
+    elif trabalho['estado'] == 'erro':
+        st.error(trabalho['resultado'])
+    else:
+        # Esgotou a espera: o trabalhador ainda registra a correção no histórico ao terminar
+        st.error("A correção está demorando mais que o esperado. Ela aparecerá em \"Histórico e Progresso\" quando terminar.")
+
 def main():
     """Função principal da aplicação."""
     setup_theme()
     st.title("Corretor de Redações ENEM")
 
-    if 'history' not in st.session_state:
-        st.session_state.history = []
+    historico = obter_historico()
+    aluno = st.sidebar.text_input("Nome do aluno:", value="Aluno")
+    turma = st.sidebar.text_input("Turma:", value="") or None
+    sink_metricas = obter_sink_metricas()
 
-    tab1, tab2 = st.tabs(["Nova Correção", "Histórico e Progresso"])
+    tab1, tab2, tab3 = st.tabs(["Nova Correção", "Histórico e Progresso", "Análise da Turma"])
 
     with tab1:
         st.header("Enviar Redação para Correção")
@@ -259,27 +305,44 @@ def main():
         uploaded_file = st.file_uploader("Selecione o arquivo da redação (PDF, TXT, etc.)", type=['pdf', 'txt', 'docx'])
 
         if st.button("Corrigir Redação"):
-            if uploaded_file is not None and tema:
+            if uploaded_file is not None and tema and FILA_ATIVA:
+                corrigir_pela_fila(uploaded_file, tema, aluno, turma)
+            elif uploaded_file is not None and tema:
                 with st.spinner("Corrigindo..."):
-                    # Cria um arquivo temporário para salvar o upload
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
-                        temp_file.write(uploaded_file.getbuffer())
-                        temp_file_path = temp_file.name
-                    
-                    resultado = executar_correcao_enem(temp_file_path, tema)
-                    
-                    # Remove o arquivo temporário após o uso
-                    os.unlink(temp_file_path)
-                    score = extract_score(resultado)
-                    st.session_state.history.append({'tema': tema, 'resultado': resultado, 'score': score})
-                    st.success("Correção finalizada!")
-                    st.markdown(resultado)
+                    # Exibe a correção à medida que o modelo a gera; o upload vai do
+                    # buffer do Streamlit direto para o agente, sem arquivo temporário
+                    mime_type = tipo_mime(uploaded_file.name, uploaded_file.type)
+                    resultado = st.write_stream(corrigir_bytes_stream(uploaded_file.getbuffer(), mime_type, tema))
+
+                    correcao = parse_correcao(resultado)
+                    if correcao.reaproveitada is not None:
+                        # O resultado acima é preliminar: a correção desta versão já está em andamento
+                        st.info("Correção preliminar, de uma versão anterior desta redação. "
+                                "A correção da versão enviada aparece a seguir.")
+                        resultado = corrigir_completa(uploaded_file.getbuffer(), mime_type, tema)
+                        st.markdown(resultado)
+                        correcao = parse_correcao(resultado)
+                    if not correcao.valida:
+                        # Erros e respostas fora do formato não entram no histórico (como na fila)
+                        st.error(resultado)
+                    else:
+                        agregado = obter_agregado(historico, aluno)
+                        id_correcao = historico.adicionar(aluno, tema, resultado, correcao, turma)
+                        agregado.adicionar({
+                            'id': id_correcao,
+                            'tema': tema,
+                            'resultado': resultado,
+                            'score': correcao.nota_final,
+                            'notas': correcao.notas,
+                        })
+                        st.success("Correção finalizada!")
             else:
                 st.warning("Por favor, forneça o tema e o arquivo da redação.")
 
     with tab2:
         st.header("Seu Desempenho")
-        top_5_redacoes = display_top5_chart(st.session_state.history)
+        agregado = obter_agregado(historico, aluno)
+        top_5_redacoes = display_top5_chart(agregado)
         
         if top_5_redacoes:
             st.subheader("Detalhes das Top 5 Redações")
@@ -287,7 +350,15 @@ def main():
                 with st.expander(f"Top {i+1} - Tema: {item['tema']} - Pontuação: {item['score']}"):
                     st.write(item['resultado'])
         
-        display_history(st.session_state.history)
+        display_theme_averages(agregado)
+        display_history(historico, aluno)
+
+    with tab3:
+        st.header("Desempenho da Turma")
+        display_class_analytics(obter_analise(), historico)
+
+    if st.sidebar.checkbox("Modo depuração"):
+        display_debug_panel(sink_metricas)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,127 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração do Pré-processamento ---
+PREPROCESSAMENTO_ATIVO = os.getenv('CORRETOR_PREPROCESSAR_IMAGEM', '1') != '0'
+MAX_LADO_IMAGEM = int(os.getenv('CORRETOR_MAX_LADO_IMAGEM', '1600'))
+QUALIDADE_JPEG = int(os.getenv('CORRETOR_QUALIDADE_JPEG', '80'))
+PROCESSOS_IMAGEM = int(os.getenv('CORRETOR_PROCESSOS_IMAGEM', str(min(4, os.cpu_count() or 1))))
+
+# Pixels mais escuros que isso (após normalizar o contraste) são considerados tinta
+LIMIAR_TINTA = 110
+# Pixels mais claros que isso são papel; a folha é a faixa de linhas e colunas
+# em que pelo menos FRACAO_PAPEL dos pixels são papel
+LIMIAR_PAPEL = 160
+FRACAO_PAPEL = 0.5
+# Lado da cópia reduzida usada para localizar a folha
+LADO_DETECCAO_PAPEL = 512
+# Margem mantida ao redor do texto no recorte automático (fração do lado)
+MARGEM_RECORTE = 0.03
+
+# --- Pré-processamento ---
+
+def _faixa_papel(medias: bytes, fracao: float = FRACAO_PAPEL):
+    """Primeiro e último índice (exclusivo) cuja média de pixels claros (0 a 255) atinge `fracao`."""
+    indices = [i for i, media in enumerate(medias) if media >= fracao * 255]
+    return (indices[0], indices[-1] + 1) if indices else None
+
+def caixa_papel(imagem):
+    """
+    Caixa da folha na foto (imagem em tons de cinza): as linhas e colunas em que
+    a maior parte dos pixels é clara. Assim, uma mesa ou um fundo mais escuro que
+    o papel fica de fora. Retorna None se nenhuma região clara for encontrada.
+    """
+    from PIL import Image, ImageOps
+
+    reduzida = imagem.copy()
+    reduzida.thumbnail((LADO_DETECCAO_PAPEL, LADO_DETECCAO_PAPEL))
+    clara = ImageOps.autocontrast(reduzida, cutoff=1).point(lambda p: 255 if p >= LIMIAR_PAPEL else 0)
+    largura, altura = clara.size
+    # Reduzir a máscara a uma linha (ou coluna) com BOX dá a média de cada coluna (ou linha)
+    colunas = _faixa_papel(clara.resize((largura, 1), Image.BOX).tobytes())
+    linhas = _faixa_papel(clara.resize((1, altura), Image.BOX).tobytes())
+    if colunas is None or linhas is None:
+        return None
+    escala_x, escala_y = imagem.width / largura, imagem.height / altura
+    return (int(colunas[0] * escala_x), int(linhas[0] * escala_y),
+            min(imagem.width, round(colunas[1] * escala_x)), min(imagem.height, round(linhas[1] * escala_y)))
+
+def preprocessar_imagem(dados: bytes, max_lado: int = MAX_LADO_IMAGEM, qualidade: int = QUALIDADE_JPEG) -> bytes:
+    """
+    Prepara a foto de uma redação manuscrita: corrige a rotação EXIF, converte
+    para tons de cinza, recorta a folha e, dentro dela, a área escrita, reduz para no máximo `max_lado`
+    pixels e recodifica como JPEG.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(dados)) as original:
+        imagem = ImageOps.exif_transpose(original).convert('L')
+
+    # Recorte automático: primeiro a folha, depois a caixa que contém a tinta
+    # dentro dela, com uma pequena margem
+    papel = caixa_papel(imagem)
+    if papel:
+        imagem = imagem.crop(papel)
+    contraste = ImageOps.autocontrast(imagem, cutoff=1)
+    caixa = contraste.point(lambda p: 255 if p < LIMIAR_TINTA else 0).getbbox()
+    if caixa:
+        largura, altura = imagem.size
+        margem = int(max(largura, altura) * MARGEM_RECORTE)
+        imagem = imagem.crop((
+            max(0, caixa[0] - margem), max(0, caixa[1] - margem),
+            min(largura, caixa[2] + margem), min(altura, caixa[3] + margem),
+        ))
+
+    imagem.thumbnail((max_lado, max_lado), Image.LANCZOS)
+
+    saida = io.BytesIO()
+    imagem.save(saida, format='JPEG', quality=qualidade, optimize=True)
+    return saida.getvalue()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def obter_pool() -> ProcessPoolExecutor:
+    """
+    Retorna o pool de processos compartilhado para o pré-processamento. Os
+    processos são iniciados com 'spawn': o pool nasce dentro de processos com
+    várias threads (Streamlit, lote, serviço), e um fork copiaria locks presos.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESSOS_IMAGEM,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def preprocessar_imagens(lista_dados: list, max_lado: int = MAX_LADO_IMAGEM, qualidade: int = QUALIDADE_JPEG) -> list:
+    """Pré-processa várias imagens em paralelo no pool de processos."""
+    n = len(lista_dados)
+    return list(obter_pool().map(preprocessar_imagem, lista_dados, [max_lado] * n, [qualidade] * n))
+
+def preparar_imagem(dados: bytes, mime_type: str, ativo: bool = PREPROCESSAMENTO_ATIVO):
+    """
+    Pré-processa a imagem no pool de processos antes do envio ao modelo.
+    Mantém o original se o Pillow não estiver instalado, se o processamento
+    falhar ou se o resultado não for menor. Retorna (media, bytes_economizados).
+    """
+    if ativo and mime_type.startswith('image/'):
+        try:
+            processada = obter_pool().submit(preprocessar_imagem, bytes(dados)).result()
+        except ImportError:
+            logger.debug("Pillow não instalado; a imagem será enviada sem pré-processamento.")
+        except Exception as e:
+            logger.warning("Falha ao pré-processar imagem: %s", e)
+        else:
+            economia = len(dados) - len(processada)
+            if economia > 0:
+                logger.info("Imagem pré-processada: %d -> %d bytes (%d economizados)",
+                            len(dados), len(processada), economia)
+                return {"mime_type": "image/jpeg", "data": processada}, economia
+    return {"mime_type": mime_type, "data": dados}, 0
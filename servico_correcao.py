@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from mimetypes import guess_type
+
+from correcao import parse_correcao
+from trabalhos import ESTADOS_FINAIS, FilaCheia
+
+# --- Configuração do Serviço ---
+TRABALHADORES = int(os.getenv('CORRETOR_TRABALHADORES', '4'))
+TAMANHO_FILA = int(os.getenv('CORRETOR_TAMANHO_FILA', '100'))
+MAX_TRABALHOS_RETIDOS = int(os.getenv('CORRETOR_MAX_TRABALHOS', '10000'))
+MAX_CORPO_BYTES = 25 * 1024 * 1024
+
+STATUS_HTTP = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable",
+}
+
+# --- Trabalhos e Fila ---
+
+class Trabalho:
+    """Uma correção submetida ao serviço e seu estado atual."""
+
+    def __init__(self, dados: bytes, nome_arquivo: str, tema: str):
+        self.id = uuid.uuid4().hex
+        self.dados = dados
+        self.nome_arquivo = nome_arquivo
+        self.tema = tema
+        self.estado = 'na_fila'
+        self.resultado = None
+        self.criado_em = time.time()
+        self.concluido_em = None
+        self._assinantes = []
+
+    def to_dict(self) -> dict:
+        dados = {'id': self.id, 'estado': self.estado, 'tema': self.tema, 'criado_em': self.criado_em}
+        if self.estado in ESTADOS_FINAIS:
+            correcao = parse_correcao(self.resultado)
+            dados.update(resultado=self.resultado, nota=correcao.nota_final, notas=correcao.notas,
+                         reaproveitada=correcao.reaproveitada, concluido_em=self.concluido_em)
+        return dados
+
+    def assinar(self) -> asyncio.Queue:
+        """Fila que recebe cada mudança de estado (usada pelos eventos SSE)."""
+        fila = asyncio.Queue()
+        self._assinantes.append(fila)
+        return fila
+
+    def cancelar_assinatura(self, fila: asyncio.Queue):
+        self._assinantes.remove(fila)
+
+    def mudar_estado(self, estado: str, resultado: str = None):
+        self.estado = estado
+        if estado in ESTADOS_FINAIS:
+            self.resultado = resultado
+            self.concluido_em = time.time()
+            self.dados = None  # libera o arquivo da memória
+        for fila in self._assinantes:
+            fila.put_nowait(self.to_dict())
+
+def _corretor_padrao(dados: bytes, mime_type: str, tema: str) -> str:
+    from agent_corretor import corrigir_bytes
+    return corrigir_bytes(dados, mime_type, tema)
+
+class ServicoCorrecao:
+    """
+    Fila de correções em processo com um número limitado de trabalhadores.
+    Quando a fila está cheia, novas submissões são recusadas (FilaCheia).
+    `corretor(dados, mime_type, tema)` executa a correção em uma thread,
+    direto sobre os bytes recebidos (sem arquivo temporário).
+    """
+
+    def __init__(self, corretor=None, trabalhadores: int = TRABALHADORES, tamanho_fila: int = TAMANHO_FILA,
+                 max_trabalhos: int = MAX_TRABALHOS_RETIDOS):
+        self.corretor = corretor or _corretor_padrao
+        self.trabalhadores = trabalhadores
+        self.max_trabalhos = max_trabalhos
+        self.trabalhos = OrderedDict()
+        self.concluidos = 0
+        self.recusados = 0
+        self._fila = asyncio.Queue(maxsize=tamanho_fila)
+        self._tarefas = []
+
+    def iniciar(self):
+        self._tarefas = [asyncio.create_task(self._trabalhador()) for _ in range(self.trabalhadores)]
+
+    async def parar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+
+    def submeter(self, dados: bytes, nome_arquivo: str, tema: str) -> Trabalho:
+        trabalho = Trabalho(dados, nome_arquivo, tema)
+        try:
+            self._fila.put_nowait(trabalho)
+        except asyncio.QueueFull:
+            self.recusados += 1
+            raise FilaCheia()
+        self.trabalhos[trabalho.id] = trabalho
+        self._descartar_antigos()
+        return trabalho
+
+    def _descartar_antigos(self):
+        # Mantém a memória limitada descartando os trabalhos finalizados mais antigos
+        while len(self.trabalhos) > self.max_trabalhos:
+            id_antigo, antigo = next(iter(self.trabalhos.items()))
+            if antigo.estado not in ESTADOS_FINAIS:
+                break
+            del self.trabalhos[id_antigo]
+
+    def estatisticas(self) -> dict:
+        return {
+            'fila': self._fila.qsize(),
+            'capacidade_fila': self._fila.maxsize,
+            'trabalhadores': self.trabalhadores,
+            'concluidos': self.concluidos,
+            'recusados': self.recusados,
+        }
+
+    def _corrigir(self, trabalho: Trabalho) -> str:
+        return self.corretor(trabalho.dados, guess_type(trabalho.nome_arquivo)[0], trabalho.tema)
+
+    async def _trabalhador(self):
+        while True:
+            trabalho = await self._fila.get()
+            trabalho.mudar_estado('processando')
+            try:
+                resultado = await asyncio.to_thread(self._corrigir, trabalho)
+                estado = 'concluido' if parse_correcao(resultado).valida else 'erro'
+            except Exception as e:
+                resultado, estado = f"Erro inesperado ao executar a correção: {e}", 'erro'
+            trabalho.mudar_estado(estado, resultado)
+            self.concluidos += 1
+            self._fila.task_done()
+
+# --- Servidor HTTP ---
+
+async def _ler_requisicao(reader):
+    linha = (await reader.readline()).decode('latin-1').strip()
+    if not linha:
+        return None
+    metodo, caminho, _ = linha.split(" ", 2)
+    cabecalhos = {}
+    while True:
+        cabecalho = (await reader.readline()).decode('latin-1').strip()
+        if not cabecalho:
+            break
+        nome, _, valor = cabecalho.partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    tamanho = int(cabecalhos.get('content-length', 0))
+    if tamanho > MAX_CORPO_BYTES:
+        return metodo, caminho, None
+    corpo = await reader.readexactly(tamanho) if tamanho else b""
+    return metodo, caminho, corpo
+
+async def _responder(writer, status: int, dados: dict, cabecalhos: dict = None):
+    corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+    extras = "".join(f"{nome}: {valor}\r\n" for nome, valor in (cabecalhos or {}).items())
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_HTTP[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(corpo)}\r\n{extras}Connection: close\r\n\r\n".encode('latin-1') + corpo
+    )
+    await writer.drain()
+
+async def _eventos(writer, trabalho: Trabalho):
+    """Envia as mudanças de estado do trabalho como server-sent events."""
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                 b"Connection: close\r\n\r\n")
+    fila = trabalho.assinar()
+    try:
+        estado = trabalho.to_dict()
+        while True:
+            writer.write(f"event: {estado['estado']}\ndata: {json.dumps(estado, ensure_ascii=False)}\n\n".encode())
+            await writer.drain()
+            if estado['estado'] in ESTADOS_FINAIS:
+                break
+            estado = await fila.get()
+    finally:
+        trabalho.cancelar_assinatura(fila)
+
+async def _submeter(servico: ServicoCorrecao, writer, corpo: bytes):
+    try:
+        pedido = json.loads(corpo)
+        tema = pedido['tema'].strip()
+        dados = base64.b64decode(pedido['conteudo_base64'], validate=True)
+        nome_arquivo = pedido['nome_arquivo']
+        if not tema:
+            raise ValueError("tema vazio")
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as e:
+        await _responder(writer, 400, {'erro': f"Pedido inválido: {e}"})
+        return
+    try:
+        trabalho = servico.submeter(dados, nome_arquivo, tema)
+    except FilaCheia:
+        await _responder(writer, 503, {'erro': "Fila de correções cheia, tente novamente."}, {'Retry-After': '5'})
+        return
+    await _responder(writer, 202, trabalho.to_dict(), {'Location': f"/correcoes/{trabalho.id}"})
+
+def criar_manipulador(servico: ServicoCorrecao):
+    """
+    Rotas:
+      POST /correcoes                {"tema", "nome_arquivo", "conteudo_base64"} -> 202 {"id", ...}
+      GET  /correcoes/<id>           estado atual (e resultado, quando concluído)
+      GET  /correcoes/<id>/eventos   mudanças de estado via server-sent events
+      GET  /saude                    tamanho da fila e contadores
+    """
+    async def manipular(reader, writer):
+        try:
+            requisicao = await _ler_requisicao(reader)
+            if requisicao is None:
+                return
+            metodo, caminho, corpo = requisicao
+            partes = caminho.split("?", 1)[0].strip("/").split("/")
+
+            if corpo is None:
+                await _responder(writer, 413, {'erro': "Arquivo muito grande."})
+            elif partes == ['saude'] and metodo == 'GET':
+                await _responder(writer, 200, servico.estatisticas())
+            elif partes == ['correcoes']:
+                if metodo != 'POST':
+                    await _responder(writer, 405, {'erro': "Use POST para submeter uma correção."})
+                else:
+                    await _submeter(servico, writer, corpo)
+            elif partes[0] == 'correcoes' and len(partes) in (2, 3) and metodo == 'GET':
+                trabalho = servico.trabalhos.get(partes[1])
+                if trabalho is None:
+                    await _responder(writer, 404, {'erro': "Correção não encontrada."})
+                elif len(partes) == 3 and partes[2] == 'eventos':
+                    await _eventos(writer, trabalho)
+                else:
+                    await _responder(writer, 200, trabalho.to_dict())
+            else:
+                await _responder(writer, 404, {'erro': "Rota não encontrada."})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return manipular
+
+async def iniciar_servidor(servico: ServicoCorrecao, host: str = "127.0.0.1", porta: int = 8000):
+    """Inicia os trabalhadores e o servidor HTTP; retorna o asyncio.Server."""
+    servico.iniciar()
+    return await asyncio.start_server(criar_manipulador(servico), host, porta)
+
+async def _executar(host: str, porta: int, trabalhadores: int, tamanho_fila: int):
+    servico = ServicoCorrecao(trabalhadores=trabalhadores, tamanho_fila=tamanho_fila)
+    servidor = await iniciar_servidor(servico, host, porta)
+    print(f"Serviço de correção em http://{host}:{porta} "
+          f"({trabalhadores} trabalhadores, fila de {tamanho_fila})")
+    async with servidor:
+        await servidor.serve_forever()
+
+# --- Linha de Comando ---
+if __name__ == '__main__':
+    # Como usar:
+    # python servico_correcao.py --porta 8000 --trabalhadores 4 --fila 100
+    parser = argparse.ArgumentParser(description="Serviço HTTP assíncrono de correção de redações.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--trabalhadores', type=int, default=TRABALHADORES)
+    parser.add_argument('--fila', type=int, default=TAMANHO_FILA)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_executar(args.host, args.porta, args.trabalhadores, args.fila))
+    except KeyboardInterrupt:
+        pass
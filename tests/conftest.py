@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+@pytest.fixture
+def usar_stub():
+    """Troca o backend do agente pelo stub recebido (e a cota por uma sem espera) durante o teste."""
+    import agent_corretor
+    from limitador import LimitadorTaxa, definir_limitador
+
+    definir_limitador(LimitadorTaxa(10 ** 6, 10 ** 9))
+
+    def definir(stub):
+        agent_corretor.definir_backend(stub)
+        return stub
+
+    yield definir
+    agent_corretor.definir_backend(None)
+    definir_limitador(None)
+
+@pytest.fixture
+def armazenamento(tmp_path, monkeypatch):
+    """Cache de correções e índice de quase-duplicatas ativos, em arquivos temporários."""
+    import agent_corretor
+    from cache_correcao import CacheCorrecao
+    from duplicatas import IndiceDuplicatas
+
+    cache = CacheCorrecao(str(tmp_path / "cache.sqlite3"))
+    indice = IndiceDuplicatas(str(tmp_path / "duplicatas.sqlite3"))
+    monkeypatch.setattr(agent_corretor, 'CACHE_ATIVO', True)
+    monkeypatch.setattr(agent_corretor, 'DUPLICATAS_ATIVO', True)
+    monkeypatch.setattr(agent_corretor, 'obter_cache', lambda: cache)
+    monkeypatch.setattr(agent_corretor, 'obter_indice', lambda: indice)
+    return cache, indice
@@ -0,0 +1,56 @@
+import pytest
+
+from cache_correcao import CacheCorrecao, chave_correcao
+
+class Relogio:
+    def __init__(self, agora: float = 1000.0):
+        self.agora = agora
+
+    def __call__(self) -> float:
+        return self.agora
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+def criar_cache(tmp_path, relogio, **opcoes) -> CacheCorrecao:
+    return CacheCorrecao(str(tmp_path / "cache.sqlite3"), relogio=relogio, **opcoes)
+
+def test_chave_depende_do_conteudo_e_ignora_espacos_do_tema():
+    chave = chave_correcao(b"texto", "text/plain", "Tema  da Redação", "modelo", "prompt")
+    assert chave == chave_correcao(memoryview(b"texto"), "text/plain", " tema da redação", "modelo", "prompt")
+    assert chave != chave_correcao(b"texto!", "text/plain", "Tema da Redação", "modelo", "prompt")
+    assert chave != chave_correcao(b"texto", "text/plain", "Tema da Redação", "modelo", "prompt 2")
+
+def test_entrada_expira_apos_o_ttl(tmp_path, relogio):
+    cache = criar_cache(tmp_path, relogio, ttl=60)
+    cache.salvar("a", "correção a")
+    relogio.agora += 60
+    assert cache.obter("a") == "correção a"
+    relogio.agora += 1
+    assert cache.obter("a") is None
+    assert cache.estatisticas()['entradas'] == 0
+
+def test_limite_remove_a_menos_acessada_recentemente(tmp_path, relogio):
+    cache = criar_cache(tmp_path, relogio, max_entradas=2)
+    for chave in ("a", "b"):
+        relogio.agora += 1
+        cache.salvar(chave, f"correção {chave}")
+    relogio.agora += 1
+    cache.obter("a")  # "b" passa a ser a menos acessada
+    relogio.agora += 1
+    cache.salvar("c", "correção c")
+    assert cache.obter("b") is None
+    assert (cache.obter("a"), cache.obter("c")) == ("correção a", "correção c")
+
+def test_contadores_de_acertos_e_faltas(tmp_path, relogio):
+    cache = criar_cache(tmp_path, relogio)
+    assert cache.estatisticas() == {'hits': 0, 'misses': 0, 'taxa_acerto': 0.0, 'entradas': 0}
+    cache.obter("a")
+    cache.salvar("a", "correção a")
+    cache.obter("a")
+    cache.obter("a")
+    cache.obter("b")
+    assert cache.estatisticas() == {'hits': 2, 'misses': 2, 'taxa_acerto': 0.5, 'entradas': 1}
+    cache.limpar()
+    assert cache.estatisticas()['hits'] == 0
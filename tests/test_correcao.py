@@ -0,0 +1,81 @@
+import json
+
+from backends import BackendStub
+from correcao import formatar_correcao, marcar_reaproveitada, parse_correcao, separar_correcoes_agrupadas
+
+TEXTO = """Nota da Redação: 720
+
+Competência 1
+Domínio da modalidade escrita formal da língua portuguesa.
+**Sua nota nessa competência foi: 160**
+Poucos desvios gramaticais.
+
+Competência 2
+**Sua nota nessa competência foi: 120**
+Tangencia o tema no segundo parágrafo.
+
+Competência 3
+**Sua nota nessa competência foi: 160**
+Argumentos organizados.
+
+Competência 4
+**Sua nota nessa competência foi: 120**
+Conectivos repetidos.
+
+Competência 5
+**Sua nota nessa competência foi: 160**
+Proposta completa.
+"""
+
+# --- parse_correcao ---
+
+def test_formato_de_texto():
+    correcao = parse_correcao(TEXTO)
+    assert correcao.valida
+    assert correcao.nota_total == 720
+    assert correcao.notas == [160, 120, 160, 120, 160]
+    assert correcao.competencias[1].analise == "Tangencia o tema no segundo parágrafo."
+
+def test_formato_json():
+    texto = json.dumps({
+        'nota_total': 600,
+        'competencias': [{'numero': i, 'nota': 120, 'analise': f"Análise {i}"} for i in range(1, 6)],
+    })
+    correcao = parse_correcao(texto)
+    assert correcao.nota_total == 600
+    assert correcao.notas == [120] * 5
+    assert correcao.competencias[4].analise == "Análise 5"
+
+def test_nota_final_soma_competencias_sem_total():
+    correcao = parse_correcao(TEXTO.replace("Nota da Redação: 720\n", ""))
+    assert correcao.nota_total is None
+    assert correcao.nota_final == 720
+
+def test_resposta_fora_do_formato_e_invalida():
+    for texto in ("Desculpe, não posso ajudar com isso.", "", None, "{json quebrado"):
+        assert not parse_correcao(texto).valida
+
+def test_formatar_e_o_inverso_do_parse():
+    correcao = parse_correcao(BackendStub.gerar_correcao(42))
+    assert parse_correcao(formatar_correcao(correcao)).notas == correcao.notas
+
+def test_correcao_reaproveitada_e_marcada():
+    for texto in (TEXTO, BackendStub.gerar_correcao(7, modo_json=True)):
+        correcao = parse_correcao(marcar_reaproveitada(texto, 0.976))
+        assert correcao.reaproveitada == 0.98
+        assert correcao.notas == parse_correcao(texto).notas
+    assert parse_correcao(TEXTO).reaproveitada is None
+
+# --- separar_correcoes_agrupadas ---
+
+def test_separa_blocos_e_ecos_da_resposta_agrupada():
+    resposta = ("=== CORREÇÃO R1 ===\nInício da redação: \"A educação digital no Brasil\"\n"
+                "Final da redação: metas claras até 2030.\n\n" + TEXTO
+                + "\n**=== CORREÇÃO R2 ===**\nInício da redação: Outra redação\n\n" + TEXTO
+                + "\n=== CORREÇÃO R3 ===\n" + TEXTO + "\n=== CORREÇÃO R3 ===\n" + TEXTO)
+    blocos = separar_correcoes_agrupadas(resposta)
+    assert set(blocos) == {"R1", "R2"}  # R3 repetido é ambíguo
+    inicio, final, correcao = blocos["R1"]
+    assert (inicio, final) == ("A educação digital no Brasil", "metas claras até 2030.")
+    assert parse_correcao(correcao).notas == parse_correcao(TEXTO).notas
+    assert blocos["R2"][:2] == ("Outra redação", None)
@@ -0,0 +1,72 @@
+import agent_corretor
+from backends import BackendStub
+
+TEMA = "Desafios da educação digital no Brasil"
+TITULO = "A educação digital no Brasil: "
+
+def redacao(meio: str, final: str) -> str:
+    # Mesmo título (as primeiras palavras coincidem); o meio e o final distinguem as redações
+    return (f"{TITULO}um desafio coletivo. O acesso à internet ainda é desigual e {meio}. "
+            f"Portanto, cabe ao Estado agir, {final}.")
+
+class StubTroca(BackendStub):
+    """Stub que devolve as correções do lote com os blocos R1 e R2 trocados."""
+
+    @classmethod
+    def gerar_correcao_agrupada(cls, texto: str):
+        resposta, redacoes = super().gerar_correcao_agrupada(texto)
+        if resposta is not None:
+            resposta = (resposta.replace("CORREÇÃO R1 ", "CORREÇÃO TMP ")
+                        .replace("CORREÇÃO R2 ", "CORREÇÃO R1 ").replace("CORREÇÃO TMP ", "CORREÇÃO R2 "))
+        return resposta, redacoes
+
+def corrigir_sozinha(texto: str) -> str:
+    return agent_corretor.corrigir_bytes(texto.encode("utf-8"), "text/plain", TEMA, usar_cache=False)
+
+def test_lote_separa_correcoes_por_redacao(usar_stub):
+    stub = usar_stub(BackendStub(latencia=0, desvio=0, taxa_erro=0, taxa_erro_fatal=0))
+    itens = [(redacao("faltam professores", f"com metas claras até {ano}"), TEMA) for ano in (2030, 2040)]
+    resultados = agent_corretor.corrigir_textos_agrupados(itens, usar_cache=False)
+    assert stub.chamadas == 1
+    assert resultados[0] != resultados[1]
+
+def test_blocos_trocados_com_mesmo_titulo_sao_rejeitados(usar_stub):
+    stub = usar_stub(StubTroca(latencia=0, desvio=0, taxa_erro=0, taxa_erro_fatal=0))
+    itens = [(redacao("faltam professores", "com metas claras até 2030"), TEMA),
+             (redacao("faltam computadores", "em parceria com as escolas"), TEMA)]
+    resultados = agent_corretor.corrigir_textos_agrupados(itens, usar_cache=False)
+    # O início repetido confere nas duas, mas o final não: ambas são refeitas sozinhas
+    assert stub.chamadas == 3
+    assert resultados == [corrigir_sozinha(texto) for texto, _ in itens]
+
+def test_redacoes_com_mesmo_eco_nao_sao_agrupadas(usar_stub):
+    stub = usar_stub(BackendStub(latencia=0, desvio=0, taxa_erro=0, taxa_erro_fatal=0))
+    itens = [(redacao(meio, "com metas claras até 2030"), TEMA)
+             for meio in ("faltam professores", "faltam computadores", "faltam políticas")]
+    resultados = agent_corretor.corrigir_textos_agrupados(itens, usar_cache=False)
+    # Só a primeira vai no lote; as outras, indistinguíveis pelo eco, vão sozinhas
+    assert stub.chamadas == 3
+    assert resultados[1:] == [corrigir_sozinha(texto) for texto, _ in itens[1:]]
+    assert resultados[0] != resultados[1]
+
+def test_lote_e_correcao_individual_compartilham_o_cache(usar_stub, armazenamento):
+    from extracao_texto import extrair_texto
+
+    stub = usar_stub(BackendStub(latencia=0, desvio=0, taxa_erro=0, taxa_erro_fatal=0))
+    # Arquivos .txt reais: BOM, quebras de linha CRLF e newline no final
+    uploads = [("\ufeff" + redacao(meio, final).replace(". ", ".\r\n\r\n") + "\r\n").encode("utf-8")
+               for meio, final in (("faltam professores", "com metas claras até 2030"),
+                                   ("faltam computadores", "em parceria com as escolas"),
+                                   ("faltam políticas", "com apoio das famílias"))]
+    itens = [(extrair_texto(dados, "text/plain"), TEMA, dados, "text/plain") for dados in uploads]
+
+    # Correção direta do upload, depois o mesmo upload pelo agrupamento
+    direta = agent_corretor.corrigir_bytes(uploads[0], "text/plain", TEMA)
+    assert stub.chamadas == 1
+    agrupadas = agent_corretor.corrigir_textos_agrupados(itens)
+    assert agrupadas[0] == direta
+    assert stub.chamadas == 2
+
+    # ... e as corrigidas em grupo também atendem a correção direta
+    assert [agent_corretor.corrigir_bytes(dados, "text/plain", TEMA) for dados in uploads[1:]] == agrupadas[1:]
+    assert stub.chamadas == 2
@@ -0,0 +1,73 @@
+import json
+import threading
+
+import agent_corretor
+from backends import BackendModelo, RespostaStub
+from correcao import parse_correcao
+
+REDACAO = "A educação digital no Brasil ainda enfrenta desafios de acesso e formação.".encode("utf-8")
+TEMA = "Desafios da educação digital no Brasil"
+
+class BackendAmostras(BackendModelo):
+    """Devolve, na ordem das chamadas, uma correção JSON com as notas de cada amostra (None: recusa)."""
+    nome_modelo = "amostras"
+
+    def __init__(self, amostras: list):
+        self.amostras = amostras
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def gerar(self, partes: list, config=None, stream: bool = False, instrucao_sistema: str = None):
+        with self._lock:
+            notas = self.amostras[self.chamadas]
+            self.chamadas += 1
+        if notas is None:
+            return RespostaStub("Desculpe, não posso ajudar com isso.", 10)
+        return RespostaStub(json.dumps({
+            'nota_total': sum(notas),
+            'competencias': [{'numero': i, 'titulo': f"Competência {i}", 'nota': nota, 'analise': f"Análise {i}"}
+                             for i, nota in enumerate(notas, start=1)],
+        }), 10)
+
+def corrigir(**opcoes):
+    return agent_corretor.corrigir_bytes_conjunto(REDACAO, "text/plain", TEMA, **opcoes)
+
+def test_primeira_rodada_concordante_dispensa_as_demais(usar_stub):
+    backend = usar_stub(BackendAmostras([[160, 160, 120, 120, 80], [120, 160, 120, 160, 80]] + [None] * 3))
+    resultado = corrigir(amostras=5, primeira_rodada=2, tolerancia=40)
+    assert backend.chamadas == 2
+    assert resultado.parada_antecipada and resultado.concordante
+    assert resultado.correcao.notas == [120, 160, 120, 120, 80]  # mediana baixa com duas amostras
+    assert parse_correcao(resultado.texto).nota_final == 600
+
+def test_discordancia_pede_as_amostras_restantes(usar_stub):
+    backend = usar_stub(BackendAmostras([[80] * 5, [200] * 5, [160] * 5, [120] * 5, [160] * 5]))
+    resultado = corrigir(amostras=5, primeira_rodada=2, tolerancia=40)
+    assert backend.chamadas == 5
+    assert not resultado.parada_antecipada and not resultado.concordante
+    assert resultado.correcao.notas == [160] * 5
+    assert resultado.amplitudes == [120] * 5
+
+def test_mediana_volta_para_a_escala_de_40_pontos(usar_stub):
+    usar_stub(BackendAmostras([[90, 60, 140, 0, 200], [130, 100, 140, 10, 200], [170, 140, 180, 20, 200]]))
+    resultado = corrigir(amostras=3, primeira_rodada=3, tolerancia=0)
+    # 130 -> 120; 100 e 140 ficam a meio caminho e sobem (120 e 160); 10 -> 0
+    assert resultado.correcao.notas == [120, 120, 160, 0, 200]
+    assert resultado.correcao.nota_total == 600
+
+def test_mediana_de_numero_par_fica_com_a_menor_central(usar_stub):
+    usar_stub(BackendAmostras([[110, 80, 200, 0, 40], [150, 160, 200, 0, 40]]))
+    resultado = corrigir(amostras=2, primeira_rodada=2, tolerancia=0)
+    assert resultado.correcao.notas == [120, 80, 200, 0, 40]
+
+def test_sem_amostra_valida_o_texto_e_o_ultimo_erro(usar_stub):
+    usar_stub(BackendAmostras([None] * 3))
+    resultado = corrigir(amostras=3, primeira_rodada=2)
+    assert not resultado.correcao.valida
+    assert resultado.texto == "Erro: resposta do modelo fora do formato esperado."
+    assert len(resultado.erros) == 3
+    assert agent_corretor.ResultadoConjunto().texto == "Erro: nenhuma amostra válida foi obtida."
+
+def test_arquivo_inexistente_vira_erro_do_conjunto(tmp_path):
+    resultado = agent_corretor.executar_correcao_enem_conjunto(str(tmp_path / "falta.txt"), TEMA)
+    assert resultado.texto.startswith("Erro: O arquivo não foi encontrado")
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import correcao_lote
+
+TEMA = "Desafios da educação digital no Brasil"
+
+@pytest.fixture
+def corrigidas(monkeypatch):
+    """Substitui a correção por um stub que anota as tarefas efetivamente corrigidas."""
+    chamadas = []
+
+    def corrigir_tarefa(arquivo, tema, conjunto=False):
+        chamadas.append(arquivo)
+        return {'arquivo': arquivo, 'tema': tema, 'status': 'ok', 'nota': 600, 'resultado': "ok"}
+
+    monkeypatch.setattr(correcao_lote, "corrigir_tarefa", corrigir_tarefa)
+    return chamadas
+
+def registro(arquivo: str, status: str) -> str:
+    return json.dumps({'arquivo': arquivo, 'tema': TEMA, 'status': status}) + "\n"
+
+def test_retomar_pula_ok_refaz_erro_e_descarta_linha_incompleta(tmp_path, corrigidas):
+    saida = tmp_path / "resultados.jsonl"
+    saida.write_text(registro("a.txt", 'ok') + registro("b.txt", 'erro') + registro("c.txt", 'ok')[:20],
+                     encoding='utf-8')
+    tarefas = [(arquivo, TEMA) for arquivo in ("a.txt", "b.txt", "c.txt", "d.txt")]
+
+    resumo = correcao_lote.executar_lote(tarefas, str(saida), concorrencia=1)
+
+    assert sorted(corrigidas) == ["b.txt", "c.txt", "d.txt"]
+    assert resumo == {'total': 4, 'puladas': 1, 'ok': 3, 'erro': 0}
+    conteudo = saida.read_text(encoding='utf-8')
+    assert conteudo.endswith("\n")
+    registros = [json.loads(linha) for linha in conteudo.splitlines()]
+    assert [r['arquivo'] for r in registros[:2]] == ["a.txt", "b.txt"]
+    assert correcao_lote.carregar_concluidas(str(saida)) == {(a, TEMA) for a in ("a.txt", "b.txt", "c.txt", "d.txt")}
+
+def test_recomecar_corrige_tudo_e_sobrescreve(tmp_path, corrigidas):
+    saida = tmp_path / "resultados.jsonl"
+    saida.write_text(registro("a.txt", 'ok'), encoding='utf-8')
+    correcao_lote.executar_lote([("a.txt", TEMA)], str(saida), concorrencia=1, retomar=False)
+    assert corrigidas == ["a.txt"]
+    assert len(saida.read_text(encoding='utf-8').splitlines()) == 1
+
+def test_descartar_linha_incompleta(tmp_path):
+    saida = tmp_path / "resultados.jsonl"
+    correcao_lote.descartar_linha_incompleta(str(saida))  # arquivo ausente: nada a fazer
+    completa = registro("a.txt", 'ok')
+    saida.write_text(completa + "x" * 10000, encoding='utf-8')  # maior que um bloco de leitura
+    correcao_lote.descartar_linha_incompleta(str(saida))
+    assert saida.read_text(encoding='utf-8') == completa
+    correcao_lote.descartar_linha_incompleta(str(saida))
+    assert saida.read_text(encoding='utf-8') == completa
+    saida.write_text('{"arquivo": "a.txt"', encoding='utf-8')
+    correcao_lote.descartar_linha_incompleta(str(saida))
+    assert saida.read_text(encoding='utf-8') == ""
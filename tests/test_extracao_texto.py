@@ -0,0 +1,14 @@
+from extracao_texto import extrair_texto, preparar_media
+
+def test_ligaduras_e_glifos_substitutos_viram_letras():
+    texto = extrair_texto("Os desaﬁos de garanƟr a reﬂexão, segundo Maơos".encode(), "text/plain")
+    assert texto == "Os desafios de garantir a reflexão, segundo Mattos"
+
+def test_glifos_sem_mapeamento_enviam_o_original():
+    dados = ("Texto com glifo de uso privado  " * 20).encode()
+    assert extrair_texto(dados, "text/plain") is None
+    media, economia = preparar_media(dados, "text/plain")
+    assert media == {"mime_type": "text/plain", "data": dados} and economia == 0
+
+def test_acentos_do_portugues_sao_preservados():
+    assert extrair_texto("Ação, opinião e ênfase à crítica".encode(), "text/plain") == "Ação, opinião e ênfase à crítica"
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+
+import pytest
+
+from fila_trabalhos import FilaTrabalhos
+from trabalhador import processar
+from trabalhos import FilaCheia
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "fila.sqlite3")
+
+# --- Reserva ---
+
+def test_reserva_o_mais_antigo_primeiro(caminho):
+    fila = FilaTrabalhos(caminho)
+    ids = [fila.enfileirar(b"texto %d" % i, f"r{i}.txt", "Tema", aluno="ana") for i in range(3)]
+    reservados = [fila.reservar("t1") for _ in range(3)]
+    assert [t['id'] for t in reservados] == ids
+    assert reservados[0]['dados'] == b"texto 0"
+    assert reservados[0]['aluno'] == "ana"
+    assert fila.reservar("t1") is None
+    assert fila.obter(ids[0])['estado'] == 'processando'
+    assert fila.obter(ids[0])['trabalhador'] == "t1"
+
+def test_reserva_concorrente_nunca_repete_trabalho(caminho):
+    FilaTrabalhos(caminho)  # cria a tabela antes das threads
+    filas = [FilaTrabalhos(caminho) for _ in range(4)]
+    ids = {filas[0].enfileirar(b"x", f"r{i}.txt", "Tema") for i in range(60)}
+    reservados, lock = [], threading.Lock()
+
+    def trabalhador(fila, nome):
+        while (trabalho := fila.reservar(nome)) is not None:
+            with lock:
+                reservados.append(trabalho['id'])
+
+    threads = [threading.Thread(target=trabalhador, args=(fila, f"t{i}")) for i, fila in enumerate(filas)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(reservados) == len(ids)
+    assert set(reservados) == ids
+
+# --- Conclusão e Recuperação ---
+
+def test_concluir_registra_resultado_e_descarta_arquivo(caminho):
+    fila = FilaTrabalhos(caminho)
+    id_trabalho = fila.enfileirar(b"x", "r.txt", "Tema")
+    fila.reservar("t1")
+    fila.concluir(id_trabalho, "Erro: falhou", estado='erro')
+    trabalho = fila.obter(id_trabalho)
+    assert trabalho['estado'] == 'erro'
+    assert trabalho['resultado'] == "Erro: falhou"
+    assert fila.aguardar(id_trabalho, intervalo=0)['estado'] == 'erro'
+    assert fila._conn.execute("SELECT dados FROM trabalhos").fetchone()[0] is None
+
+def test_abandonados_voltam_a_fila_ate_o_limite_de_tentativas(caminho):
+    fila = FilaTrabalhos(caminho)
+    id_trabalho = fila.enfileirar(b"x", "r.txt", "Tema")
+    for tentativa in range(1, 3):
+        assert fila.reservar(f"t{tentativa}")['id'] == id_trabalho
+        assert fila.recuperar_abandonados(tempo_maximo=-1, max_tentativas=3) == 1
+        assert fila.obter(id_trabalho)['estado'] == 'na_fila'
+    fila.reservar("t3")
+    fila.recuperar_abandonados(tempo_maximo=-1, max_tentativas=3)
+    assert fila.obter(id_trabalho)['estado'] == 'erro'
+
+def test_aguardar_desiste_apos_tempo_maximo(caminho):
+    fila = FilaTrabalhos(caminho)
+    id_trabalho = fila.enfileirar(b"x", "r.txt", "Tema")
+    assert fila.aguardar(id_trabalho, intervalo=0.01, tempo_maximo=0.05)['estado'] == 'na_fila'
+
+def test_fila_cheia_recusa_novos_trabalhos(caminho):
+    fila = FilaTrabalhos(caminho, max_pendentes=2)
+    fila.enfileirar(b"x", "r1.txt", "Tema")
+    fila.enfileirar(b"x", "r2.txt", "Tema")
+    with pytest.raises(FilaCheia):
+        fila.enfileirar(b"x", "r3.txt", "Tema")
+    fila.reservar("t1")
+    fila.enfileirar(b"x", "r3.txt", "Tema")
+
+# --- Tipo do Arquivo e Retenção ---
+
+def test_tipo_informado_no_envio_chega_ao_trabalhador(caminho):
+    fila = FilaTrabalhos(caminho)
+    fila.enfileirar(b"x", "redacao", "Tema", mime_type="text/plain")
+    fila.enfileirar(b"x", "redacao.pdf", "Tema")
+    recebidos = []
+
+    def corretor(dados, mime_type, tema):
+        recebidos.append(mime_type)
+        return "Erro: teste"
+
+    for _ in range(2):
+        assert processar(fila.reservar("t1"), corretor, historico=None)[0] == 'erro'
+    assert recebidos == ["text/plain", "application/pdf"]
+
+def test_fila_antiga_ganha_a_coluna_do_tipo(caminho):
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE trabalhos (id TEXT PRIMARY KEY, estado TEXT NOT NULL, tema TEXT NOT NULL, "
+                 "nome_arquivo TEXT NOT NULL, dados BLOB, aluno TEXT, turma TEXT, resultado TEXT, "
+                 "tentativas INTEGER NOT NULL DEFAULT 0, trabalhador TEXT, id_historico INTEGER, "
+                 "criado_em REAL NOT NULL, iniciado_em REAL, concluido_em REAL)")
+    conn.execute("INSERT INTO trabalhos (id, estado, tema, nome_arquivo, dados, criado_em) "
+                 "VALUES ('antigo', 'na_fila', 'Tema', 'r.txt', x'78', 0)")
+    conn.commit()
+    conn.close()
+    trabalho = FilaTrabalhos(caminho).reservar("t1")
+    assert (trabalho['id'], trabalho['mime_type']) == ('antigo', None)
+
+def test_remove_so_finalizados_mais_antigos_que_a_retencao(caminho):
+    fila = FilaTrabalhos(caminho)
+    antigo, recente, pendente = (fila.enfileirar(b"x", f"r{i}.txt", "Tema") for i in range(3))
+    for id_trabalho in (antigo, recente):
+        fila.reservar("t1")
+        fila.concluir(id_trabalho, "Erro: teste", estado='erro')
+    fila._conn.execute("UPDATE trabalhos SET concluido_em = concluido_em - 100 WHERE id = ?", (antigo,))
+    assert fila.remover_finalizados(idade=50) == 1
+    assert fila.obter(antigo) is None
+    assert fila.obter(recente)['estado'] == 'erro'
+    assert fila.obter(pendente)['estado'] == 'na_fila'
@@ -0,0 +1,101 @@
+import pytest
+
+from limitador import LimitadorTaxa, RelogioFalso, executar_com_retentativas
+
+class ErroApi(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+def sem_jitter():
+    return 1.0
+
+# --- Limitador de Taxa ---
+
+def test_rajada_ate_o_limite_sem_espera():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(requisicoes_por_minuto=6, tokens_por_minuto=10 ** 6, relogio=relogio)
+    assert [limitador.adquirir() for _ in range(6)] == [0.0] * 6
+    assert relogio.esperas == []
+
+def test_ritmo_por_requisicoes_por_minuto():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(requisicoes_por_minuto=6, tokens_por_minuto=10 ** 6, relogio=relogio)
+    for _ in range(6):
+        limitador.adquirir()
+    # Com o balde vazio, cada nova requisição espera 60 / 6 = 10 s
+    assert limitador.adquirir() == pytest.approx(10.0)
+    assert limitador.adquirir() == pytest.approx(10.0)
+    assert relogio.agora() == pytest.approx(20.0)
+
+def test_cota_reabastece_com_o_tempo():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(requisicoes_por_minuto=6, tokens_por_minuto=10 ** 6, relogio=relogio)
+    for _ in range(6):
+        limitador.adquirir()
+    relogio.avancar(60)
+    assert [limitador.adquirir() for _ in range(6)] == [0.0] * 6
+
+def test_limite_de_tokens_por_minuto():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(requisicoes_por_minuto=1000, tokens_por_minuto=600, relogio=relogio)
+    assert limitador.adquirir(600) == 0.0
+    # 300 tokens a 10 tokens/s: 30 s de espera
+    assert limitador.adquirir(300) == pytest.approx(30.0)
+
+def test_ajustar_tokens_devolve_e_cobra_a_diferenca():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(requisicoes_por_minuto=1000, tokens_por_minuto=600, relogio=relogio)
+    limitador.adquirir(600)
+    limitador.ajustar_tokens(estimados=600, reais=300)  # devolve 300
+    assert limitador.adquirir(300) == 0.0
+
+    limitador.ajustar_tokens(estimados=300, reais=600)  # cobra mais 300: saldo -300
+    assert limitador.adquirir(60) == pytest.approx(36.0)
+
+# --- Retentativas ---
+
+def test_retenta_erros_transitorios():
+    relogio = RelogioFalso()
+    erros = [ErroApi(429), ErroApi(503)]
+    tentativas = []
+
+    def funcao():
+        if erros:
+            raise erros.pop(0)
+        return "ok"
+
+    resultado = executar_com_retentativas(funcao, max_tentativas=5, base=1.0, relogio=relogio,
+                                          aleatorio=sem_jitter,
+                                          ao_retentar=lambda t, erro, espera: tentativas.append((t, erro.code)))
+    assert resultado == "ok"
+    assert tentativas == [(1, 429), (2, 503)]
+    # Backoff exponencial: 1 s e 2 s (jitter no máximo)
+    assert relogio.esperas == [1.0, 2.0]
+
+def test_erro_fatal_nao_e_retentado():
+    relogio = RelogioFalso()
+    chamadas = []
+
+    def funcao():
+        chamadas.append(1)
+        raise ErroApi(400)
+
+    with pytest.raises(ErroApi):
+        executar_com_retentativas(funcao, relogio=relogio, aleatorio=sem_jitter)
+    assert len(chamadas) == 1
+    assert relogio.esperas == []
+
+def test_desiste_apos_max_tentativas():
+    relogio = RelogioFalso()
+    chamadas = []
+
+    def funcao():
+        chamadas.append(1)
+        raise ErroApi(503)
+
+    with pytest.raises(ErroApi):
+        executar_com_retentativas(funcao, max_tentativas=3, base=1.0, maximo=1.5, relogio=relogio,
+                                  aleatorio=sem_jitter)
+    assert len(chamadas) == 3
+    assert relogio.esperas == [1.0, 1.5]  # limitado por `maximo`
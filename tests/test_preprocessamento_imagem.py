@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from benchmarks.bench_imagens import gerar_imagem_sintetica  # noqa: E402
+from preprocessamento_imagem import caixa_papel, preprocessar_imagem  # noqa: E402
+
+def test_folha_sobre_fundo_escuro_e_recortada():
+    dados = gerar_imagem_sintetica(0)  # folha em (604, 151)-(3427, 2872) numa foto de 4032x3024
+    with Image.open(io.BytesIO(dados)) as foto:
+        papel = caixa_papel(foto.convert('L'))
+    assert papel == pytest.approx((604, 151, 3427, 2872), abs=8)
+
+    # Sem redução de tamanho, a saída mostra só o recorte
+    with Image.open(io.BytesIO(preprocessar_imagem(dados, max_lado=10000))) as saida:
+        largura, altura = saida.size
+    assert largura < 4032 and altura < 3024
+    assert largura <= papel[2] - papel[0] and altura <= papel[3] - papel[1]
+
+def test_digitalizacao_sem_fundo_nao_perde_o_texto():
+    imagem = Image.new('L', (1000, 1400), 240)
+    imagem.paste(30, (100, 100, 900, 1300))
+    saida = io.BytesIO()
+    imagem.save(saida, format='PNG')
+    assert caixa_papel(imagem) == (0, 0, 1000, 1400)
+    with Image.open(io.BytesIO(preprocessar_imagem(saida.getvalue(), max_lado=10000))) as processada:
+        assert processada.size[0] >= 800 and processada.size[1] >= 1200
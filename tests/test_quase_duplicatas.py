@@ -0,0 +1,29 @@
+import random
+
+import agent_corretor
+from backends import BackendStub
+from benchmarks.comum import TEMA, gerar_redacao
+from correcao import parse_correcao
+
+def corrigir(texto: str, **opcoes) -> str:
+    return agent_corretor.corrigir_bytes(texto.encode("utf-8"), "text/plain", TEMA, **opcoes)
+
+def test_redacao_editada_recebe_a_propria_correcao(usar_stub, armazenamento):
+    stub = usar_stub(BackendStub(latencia=0, desvio=0, taxa_erro=0, taxa_erro_fatal=0))
+    original = gerar_redacao(random.Random(3))
+    editada = original.replace(".", ", sem dúvida.", 1)
+    corrigir(original)
+
+    # Na hora: a correção da versão anterior, marcada como preliminar
+    preliminar = corrigir(editada)
+    assert parse_correcao(preliminar).reaproveitada >= 0.9
+
+    # A correção completa da versão editada já foi iniciada; corrigir_completa a aguarda
+    completa = agent_corretor.corrigir_completa(editada.encode("utf-8"), "text/plain", TEMA)
+    assert parse_correcao(completa).reaproveitada is None
+    assert stub.chamadas == 2
+
+    # E passa a ser a resposta para a redação editada
+    assert corrigir(editada) == completa
+    assert stub.chamadas == 2
+    assert completa == corrigir(editada, usar_cache=False)
@@ -0,0 +1,123 @@
+import argparse
+import multiprocessing
+import os
+import time
+from mimetypes import guess_type
+
+from correcao import parse_correcao
+from fila_trabalhos import FILA_PATH, RETENCAO_FINALIZADOS, TEMPO_MAXIMO_PROCESSAMENTO, FilaTrabalhos
+from limitador import REQUISICOES_POR_MINUTO, TOKENS_POR_MINUTO
+
+# --- Configuração dos Trabalhadores ---
+# Cada processo recebe uma fatia da cota; mais processos que requisições por minuto
+# estourariam a cota, já que cada fatia é arredondada para ao menos 1 RPM
+PROCESSOS = int(os.getenv('CORRETOR_PROCESSOS', str(min(os.cpu_count() or 1, REQUISICOES_POR_MINUTO))))
+INTERVALO_CONSULTA = float(os.getenv('CORRETOR_INTERVALO_FILA', '0.5'))
+INTERVALO_LIMPEZA = 300  # segundos entre remoções dos trabalhos finalizados antigos
+
+# --- Processo Trabalhador ---
+
+def processar(trabalho: dict, corretor, historico) -> tuple:
+    """Corrige um trabalho reservado e retorna (estado, resultado, id no histórico)."""
+    # Trabalhos enfileirados por versões anteriores não têm o tipo registrado
+    mime_type = trabalho['mime_type'] or guess_type(trabalho['nome_arquivo'])[0]
+    try:
+        resultado = corretor(trabalho['dados'], mime_type, trabalho['tema'])
+    except Exception as e:
+        return 'erro', f"Erro inesperado ao executar a correção: {e}", None
+    correcao = parse_correcao(resultado)
+    if not correcao.valida:
+        return 'erro', resultado, None
+    id_historico = None
+    if trabalho['aluno']:
+        id_historico = historico.adicionar(trabalho['aluno'], trabalho['tema'], resultado,
+                                           correcao, trabalho['turma'])
+    return 'concluido', resultado, id_historico
+
+def executar_trabalhador(caminho_fila: str, processos: int, intervalo: float = INTERVALO_CONSULTA,
+                         parar=None):
+    """
+    Laço de um processo trabalhador: reserva o próximo trabalho, corrige e
+    registra o resultado (e a correção no histórico, quando há aluno).
+    A cota da API é dividida entre os `processos`, já que cada um tem o seu limitador.
+    """
+    # Importados aqui para que cada processo configure o SDK e os caches por conta própria
+    from agent_corretor import corrigir_completa
+    from historico import RepositorioHistorico
+    from limitador import LimitadorTaxa, definir_limitador
+
+    definir_limitador(LimitadorTaxa(REQUISICOES_POR_MINUTO / processos, TOKENS_POR_MINUTO / processos))
+    fila = FilaTrabalhos(caminho_fila)
+    historico = RepositorioHistorico()
+    nome = f"{os.uname().nodename}:{os.getpid()}"
+    while parar is None or not parar.is_set():
+        trabalho = fila.reservar(nome)
+        if trabalho is None:
+            time.sleep(intervalo)
+            continue
+        # Ninguém acompanha o trabalho a ponto de ver um resultado preliminar: a correção
+        # de quase-duplicatas nunca é reaproveitada aqui (ver agent_corretor.corrigir_completa)
+        estado, resultado, id_historico = processar(trabalho, corrigir_completa, historico)
+        fila.concluir(trabalho['id'], resultado, estado, id_historico)
+
+def _iniciar(caminho_fila: str, processos: int, intervalo: float, parar) -> multiprocessing.Process:
+    processo = multiprocessing.get_context('spawn').Process(
+        target=executar_trabalhador, args=(caminho_fila, processos, intervalo, parar), daemon=True)
+    processo.start()
+    return processo
+
+def limitar_processos(processos: int) -> int:
+    """Número de processos que cabe na cota: no máximo um por requisição por minuto."""
+    return max(1, min(processos, REQUISICOES_POR_MINUTO))
+
+def supervisionar(caminho_fila: str = FILA_PATH, processos: int = PROCESSOS,
+                  intervalo: float = INTERVALO_CONSULTA, parar=None, retencao: float = RETENCAO_FINALIZADOS):
+    """
+    Mantém `processos` trabalhadores ativos (reiniciando os que morrerem),
+    devolve à fila os trabalhos que ficaram presos em um processo encerrado e
+    apaga os finalizados há mais de `retencao` segundos.
+    O número de processos é limitado à cota de requisições por minuto.
+    """
+    processos = limitar_processos(processos)
+    contexto = multiprocessing.get_context('spawn')
+    parar = parar or contexto.Event()
+    trabalhadores = [_iniciar(caminho_fila, processos, intervalo, parar) for _ in range(processos)]
+    fila = FilaTrabalhos(caminho_fila)
+    proxima_limpeza = 0.0
+    try:
+        while not parar.wait(max(intervalo, 1.0)):
+            for i, processo in enumerate(trabalhadores):
+                if not processo.is_alive():
+                    print(f"Trabalhador {processo.pid} encerrado (código {processo.exitcode}); reiniciando.")
+                    trabalhadores[i] = _iniciar(caminho_fila, processos, intervalo, parar)
+            recuperados = fila.recuperar_abandonados(TEMPO_MAXIMO_PROCESSAMENTO)
+            if recuperados:
+                print(f"{recuperados} trabalho(s) abandonado(s) devolvido(s) à fila.")
+            if time.monotonic() >= proxima_limpeza:
+                fila.remover_finalizados(retencao)
+                proxima_limpeza = time.monotonic() + INTERVALO_LIMPEZA
+    finally:
+        parar.set()
+        for processo in trabalhadores:
+            processo.join(timeout=intervalo + 5)
+
+if __name__ == '__main__':
+    # Como usar:
+    # CORRETOR_FILA=1 streamlit run new_app.py   (as interfaces só enfileiram)
+    # python trabalhador.py --processos 4        (quantos processos a cota da API comportar)
+    parser = argparse.ArgumentParser(description="Processos trabalhadores da fila de correções.")
+    parser.add_argument('--processos', type=int, default=PROCESSOS)
+    parser.add_argument('--fila', default=FILA_PATH, help="Caminho do banco SQLite da fila")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_CONSULTA,
+                        help="Segundos entre consultas quando a fila está vazia")
+    parser.add_argument('--retencao', type=float, default=RETENCAO_FINALIZADOS,
+                        help="Segundos que os trabalhos finalizados ficam na fila antes de serem apagados")
+    args = parser.parse_args()
+    processos = limitar_processos(args.processos)
+    if processos < args.processos:
+        print(f"A cota de {REQUISICOES_POR_MINUTO} RPM comporta só {processos} processo(s).")
+    print(f"Iniciando {processos} trabalhador(es) na fila {args.fila}.")
+    try:
+        supervisionar(args.fila, processos, args.intervalo, retencao=args.retencao)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,8 @@
+# --- Estados e Erros dos Trabalhos de Correção ---
+# Compartilhados pela fila em memória (servico_correcao.py), pela fila
+# persistente (fila_trabalhos.py) e pelas interfaces.
+
+ESTADOS_FINAIS = ('concluido', 'erro')
+
+class FilaCheia(Exception):
+    """A fila de correções atingiu o limite (backpressure)."""